@@ -2,6 +2,9 @@
 Script to run the SP aircraft model
 """
 
+from collections import OrderedDict
+import numpy as np
+
 # GPkit tools
 from gpkit import units, Model
 from gpkit import Variable, Model, units, SignomialsEnabled, SignomialEquality, Vectorize
@@ -10,6 +13,19 @@ from gpkit.constraints.bounded import Bounded as BCS
 # Constant relaxation heuristic for SP solve
 from relaxed_constants import relaxed_constants, post_process
 
+# Adaptive tolerance schedule for SP solve
+from tolerance_schedule import scheduled_localsolve
+
+# Per-iteration convergence recorder
+from convergence_trace import ConvergenceTrace
+
+# Sparse export of the final GP
+from gp_artifact import export_gp
+
+# Elimination of monomial equality variables before each GP
+from presolve import presolved_solver
+from solver_select import fallback_solver, save_attempts
+
 # Mission model
 from aircraft import Mission
 
@@ -36,14 +52,45 @@ from saveSol import updateOpenVSP, gendes, gencsm
 # Aircraft options:
 # currently one of: 'D8_eng_wing', 'optimal737', 'optimal777', 'optimalD8', 'D8_no_BLI', 'M072_737'
 
-def optimize_aircraft(m, substitutions, fixedBPR=False, pRatOpt=True, mutategparg=False, x0 = None):
+# Production configurations: substitution function, fixedBPR, pRatOpt,
+# and the standard design mission range [nmi] and number of passengers
+CONFIGS = OrderedDict([
+    ('optimal737',  (get_optimal737_subs,  True,  False, 3000., 180.)),
+    ('M072_737',    (get_M072_737_subs,    True,  False, 3000., 180.)),
+    ('D8_eng_wing', (get_D8_eng_wing_subs, True,  False, 3000., 180.)),
+    ('D8_no_BLI',   (get_D8_no_BLI_subs,   True,  False, 3000., 180.)),
+    ('optimalD8',   (get_optimalD8_subs,   False, True,  3000., 180.)),
+    ('optimal777',  (get_optimal777_subs,  True,  False, 6000., 450.)),
+])
+
+def build_mission(config, Nclimb=3, Ncruise=2, Nmission=1, atmosphere='standard'):
     """
-    Optimizes an aircraft of a given configuration
+    Builds a production configuration flying its standard design mission
+    :param config: one of the keys of CONFIGS
+    :param Nclimb: number of climb segments
+    :param Ncruise: number of cruise segments
+    :param Nmission: number of missions
+    :param atmosphere: 'standard' or 'fitted', see Mission
+    :return: (model with fuel burn objective, substitutions, fixedBPR, pRatOpt)
+    """
+    getsubs, fixedBPR, pRatOpt, Rreq, npass = CONFIGS[config]
+    m = Mission(Nclimb, Ncruise, config, Nmission, atmosphere)
+    m.cost = m['W_{f_{total}}'].sum()
+    substitutions = getsubs()
+    if Nmission == 1:
+        substitutions.update({'R_{req}': Rreq*units('nmi'),
+                              'n_{pass}': npass})
+    else:
+        substitutions.update({'R_{req}': Rreq*np.ones(Nmission)*units('nmi'),
+                              'n_{pass}': npass*np.ones(Nmission)})
+    return m, substitutions, fixedBPR, pRatOpt
+
+def configure_aircraft(m, substitutions, fixedBPR=False, pRatOpt=True):
+    """
+    Applies the configuration options and substitutions to an aircraft model
     :param m: aircraft model with objective and configuration
     :param fixedBPR: boolean specifying whether or not BPR is fixed (depends on config)
     :param pRatOpt: boolean specifying whether or not pressure ratio is optimized (depends on config)
-    :param mutategparg: boolean whether to keep each GP solve intact
-    :return: solution of aircraft model
     """
 
     if fixedBPR:
@@ -57,9 +104,72 @@ def optimize_aircraft(m, substitutions, fixedBPR=False, pRatOpt=True, mutategpar
         del substitutions['\pi_{hc_D}']
 
     m.substitutions.update(substitutions)
+
+def relax_aircraft(m, substitutions, fixedBPR=False, pRatOpt=True, exclude=None):
+    """
+    Applies the configuration options and substitutions to an aircraft model
+    and wraps it for the relaxed constants SP solve
+    :param m: aircraft model with objective and configuration
+    :param fixedBPR: boolean specifying whether or not BPR is fixed (depends on config)
+    :param pRatOpt: boolean specifying whether or not pressure ratio is optimized (depends on config)
+    :param exclude: names of constants that must hold exactly, and are not relaxed
+    :return: bounded model with relaxed constants
+    """
+
+    configure_aircraft(m, substitutions, fixedBPR, pRatOpt)
     m_relax = Model(m.cost, BCS(m))
-    m_relax = relaxed_constants(m_relax)
-    sol = m_relax.localsolve(verbosity=4, iteration_limit=200, reltol=0.01, mutategp=mutategparg, x0 = x0)
+    return relaxed_constants(m_relax, exclude=exclude)
+
+def optimize_aircraft(m, substitutions, fixedBPR=False, pRatOpt=True, mutategparg=False, x0 = None,
+                      schedule=None, artifact=None, presolve=False, solver=None):
+    """
+    Optimizes an aircraft of a given configuration
+    :param m: aircraft model with objective and configuration
+    :param fixedBPR: boolean specifying whether or not BPR is fixed (depends on config)
+    :param pRatOpt: boolean specifying whether or not pressure ratio is optimized (depends on config)
+    :param mutategparg: boolean whether to keep each GP solve intact
+    :param x0: initial guess for the SP solve
+    :param schedule: list of tolerance stages (see tolerance_schedule.DEFAULT_SCHEDULE),
+                     None solves with a fixed reltol of 0.01
+    :param artifact: (optional) .npz file to export the last GP approximation to,
+                     see gp_artifact
+    :param presolve: boolean whether to eliminate monomial equality variables from each GP
+                     (see presolve), the per GP reductions are kept in sol.presolve;
+                     presolve solves with cvxopt, so it cannot be combined with solver
+    :param solver: (optional) GP backend name, list of backends to fall back through
+                   on a failed GP, or solver function (e.g. solver_select.auto_solver(config));
+                   the backend attempts are kept in sol.solver_attempts
+    :return: solution of aircraft model, with the convergence history in sol.trace
+    """
+
+    if presolve and solver is not None:
+        raise ValueError("presolve solves every GP with cvxopt and cannot be combined with "
+                         "solver %r; pass solver_select's 'cvxopt_presolved' backend instead"
+                         % (solver,))
+    m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    trace = ConvergenceTrace()
+    history = []
+    kwargs = {'solver': presolved_solver(history)} if presolve else {}
+    if solver is not None:
+        if not callable(solver):
+            solver = fallback_solver([solver] if isinstance(solver, str) else list(solver))
+        kwargs = {'solver': solver}
+    if schedule is None:
+        sol = m_relax.localsolve(verbosity=4, iteration_limit=200, reltol=0.01, mutategp=mutategparg, x0 = x0,
+                                 **kwargs)
+        trace.record_program(sol.program)
+    else:
+        sol = scheduled_localsolve(m_relax, schedule, verbosity=4, mutategp=mutategparg, x0 = x0, trace=trace,
+                                   **kwargs)
+    sol.trace = trace
+    if presolve:
+        sol.presolve = history
+    if solver is not None:
+        sol.solver_attempts = getattr(solver, 'attempts', None)
+        if hasattr(solver, 'filename'):
+            save_attempts(solver)
+    if artifact:
+        export_gp(sol.program.gps[-1], artifact)
     post_process(sol)
     return sol
 
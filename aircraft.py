@@ -10,7 +10,7 @@ from numpy import pi
 TCS.reltol = 1e-3
 
 # importing from D8_integration
-from stand_alone_simple_profile import FlightState
+from stand_alone_simple_profile import FlightState, segment_bands
 from vertical_tail import VerticalTail
 from horizontal_tail import HorizontalTail
 from wing import Wing
@@ -730,9 +730,11 @@ class Mission(Model):
     aircraft: string representing the aircraft model
     Nmission: specifies whether single-point or multi-point optimization
               Nmission >/= 1 requires specification of range and number of passengers for each mission
+    atmosphere: 'standard' (lapse rate signomial per segment) or 'fitted' (GP compatible
+                monomial fits over each segment's altitude band, see FittedAtmosphere)
     """
 
-    def setup(self, Nclimb, Ncruise, config, Nmission = 1):
+    def setup(self, Nclimb, Ncruise, config, Nmission = 1, atmosphere = 'standard'):
         # define global variables
         global wingengine, rearengine, doublebubble, tube, piHT, conventional
         global largeAC, multimission
@@ -779,7 +781,8 @@ class Mission(Model):
         # vectorize
         with Vectorize(Nmission):
              with Vectorize(Nclimb + Ncruise):
-                 self.flightstate = flightstate = FlightState()
+                 self.flightstate = flightstate = FlightState(atmosphere,
+                                                              segment_bands(Nclimb, Ncruise))
 
         # Build required submodels
         self.aircraft = aircraft = Aircraft(Nclimb, Ncruise, flightstate, eng, fitDrag, BLI, Nmission)
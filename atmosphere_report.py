@@ -0,0 +1,77 @@
+"""
+Compares the standard and fitted atmosphere on the production configurations
+
+    python atmosphere_report.py                 # every configuration
+    python atmosphere_report.py optimal737 optimalD8
+
+For each configuration the SP iterations, solve time and fuel burn of both
+atmosphere models are reported, along with the fit error bounds and the
+actual temperature error at the solved segment altitudes; a fitted solve
+whose error exceeds the bound fails.
+"""
+
+import sys
+from time import time
+import numpy as np
+from collections import OrderedDict
+
+from gpkit.small_scripts import mag
+from SPaircraft import CONFIGS, build_mission, relax_aircraft
+from stand_alone_simple_profile import standard_temperature
+
+ATMOSPHERES = ['standard', 'fitted']
+
+def solve_atmosphere(config, atmosphere, Nclimb=3, Ncruise=2):
+    """
+    Solves a configuration with one atmosphere model
+
+    RETURNS
+    -------
+    dictionary of SP iterations, solve time [s], W_{f_{total}} [lbf], the
+    maximum temperature error at the solved altitudes and, for the fitted
+    atmosphere, the fit error bounds
+    """
+    m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise,
+                                                        atmosphere=atmosphere)
+    m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    starttime = time()
+    sol = m_relax.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+    out = {'sp_iterations': len(sol.program.gps), 'time': time() - starttime,
+           'W_{f_{total}}': float(np.sum(mag(sol('W_{f_{total}}').to('lbf'))))}
+    h = mag(sol(m.flightstate['h']).to('m'))
+    T = mag(sol(m.flightstate['T_{atm}']).to('K'))
+    out['T_error'] = float(np.abs(T/standard_temperature(h) - 1).max())
+    if atmosphere == 'fitted':
+        out['fit_errors'] = m.flightstate.atm.errors
+        # FittedAtmosphere bounds every segment to its band, so this only
+        # fails if the bands and the fits disagree
+        if out['T_error'] > (1 + 1e-3)*out['fit_errors']['T']:
+            raise ValueError("%s: fitted temperature is off by %.2e at the solved altitudes, "
+                             "more than its %.2e bound" % (config, out['T_error'],
+                                                           out['fit_errors']['T']))
+    return out
+
+def compare_atmospheres(config, Nclimb=3, Ncruise=2):
+    "returns {atmosphere: solve_atmosphere result} of a configuration"
+    return dict((atmosphere, solve_atmosphere(config, atmosphere, Nclimb, Ncruise))
+                for atmosphere in ATMOSPHERES)
+
+def summary(results):
+    "prints the comparison of every configuration"
+    print("%-12s %9s %9s %9s %9s %9s %9s %9s" % (
+        "config", "SP std", "SP fit", "t std", "t fit", "dt [%]", "dW_f [%]", "T err"))
+    for config, r in results.items():
+        std, fit = r['standard'], r['fitted']
+        print("%-12s %9i %9i %9.1f %9.1f %9.1f %9.3f %9.2e" % (
+            config, std['sp_iterations'], fit['sp_iterations'], std['time'], fit['time'],
+            100*(fit['time']/std['time'] - 1),
+            100*(fit['W_{f_{total}}']/std['W_{f_{total}}'] - 1), fit['T_error']))
+
+if __name__ == "__main__":
+    results = OrderedDict()
+    for config in sys.argv[1:] or list(CONFIGS):
+        try:
+            results[config] = compare_atmospheres(config)
+        except Exception as error:
+            print("%s failed: %s" % (config, error))
+    summary(results)
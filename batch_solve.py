@@ -0,0 +1,198 @@
+"""
+Batched parametric solves that share one compiled model structure
+
+Jobs that differ only in constants (range, passengers, minimum Mach number,
+margin factors, ...) do not need the model to be rebuilt for each one:
+
+    gp mode: the converged GP of a design (a gp_artifact .npz) is compiled
+             once per worker; each batch member only changes the constant
+             dependent coefficient column, computed for the whole batch in
+             one sparse product. Exact for the GP approximation, so best
+             for local studies around the design point.
+    sp mode: each worker builds and wraps the Mission once and re-solves it
+             with new substitutions, warm started from the base design.
+"""
+
+import numpy as np
+from multiprocessing import Pool
+
+from gp_artifact import load_artifact
+
+def batch_size(batch):
+    "number of members of a batch (dictionary of name to value or array)"
+    sizes = set(np.size(v) for v in batch.values() if np.ndim(v))
+    if len(sizes) > 1:
+        raise ValueError("batch arrays differ in length: %s" % sorted(sizes))
+    return sizes.pop() if sizes else 1
+
+def constant_batch(artifact, batch):
+    """
+    Returns the constant values of every batch member
+
+    ARGUMENTS
+    ---------
+    artifact: GPArtifact
+    batch: dictionary of constant name (full or bare) to a value or an array
+           with one value per member, in the constant's units
+
+    RETURNS
+    -------
+    (nconstants, nbatch) array
+    """
+    n = batch_size(batch)
+    values = np.repeat(artifact.const_values[:, None], n, axis=1)
+    for name, value in batch.items():
+        idxs = artifact.constant_indices(name)
+        if not idxs:
+            raise KeyError("%s is not a constant of the artifact" % name)
+        values[idxs, :] = np.broadcast_to(value, (n,))
+    return values
+
+def log_coefficient_batch(artifact, values):
+    "(nmonomials, nbatch) log coefficients for (nconstants, nbatch) values"
+    row, col, data = artifact.C
+    g = np.repeat(np.log(artifact.c)[:, None], values.shape[1], axis=1)
+    np.add.at(g, row, data[:, None]*np.log(values[col, :]))
+    return g
+
+_ARTIFACT = None
+
+def _init_gp_worker(filename):
+    "loads and compiles the artifact once per worker"
+    global _ARTIFACT
+    _ARTIFACT = load_artifact(filename)
+    _ARTIFACT.compiled()
+
+def _gp_worker(g):
+    try:
+        return _ARTIFACT.solve_coefficients(g)
+    except Exception as error:
+        return {'status': 'error: %s' % error}
+
+def batch_gp(filename, batch, outputs=(), processes=None):
+    """
+    Solves a batch of constant vectors against one GP artifact
+
+    ARGUMENTS
+    ---------
+    filename: gp_artifact .npz file (see optimize_aircraft's artifact option)
+    batch: see constant_batch
+    outputs: free variable names (full or bare) to collect
+    processes: worker processes (default: cpu count, 1 for serial)
+
+    RETURNS
+    -------
+    dictionary with status (list), cost, outputs {name: array over the
+    batch} and sensitivities {batch constant: array over the batch}, the
+    sensitivity of a bare name summed over its elements
+    """
+    artifact = load_artifact(filename)
+    g = log_coefficient_batch(artifact, constant_batch(artifact, batch))
+    columns = [g[:, i] for i in range(g.shape[1])]
+    if processes == 1:
+        _init_gp_worker(filename)
+        results = [_gp_worker(column) for column in columns]
+    else:
+        pool = Pool(processes, _init_gp_worker, (filename,))
+        try:
+            results = pool.map(_gp_worker, columns)
+        finally:
+            pool.close()
+            pool.join()
+    return _collect(results, artifact, batch, outputs)
+
+def _collect(results, artifact, batch, outputs):
+    solved = ['cost' in r for r in results]
+    out = {'status': [r['status'] for r in results],
+           'cost': np.array([r['cost'] if ok else np.nan
+                             for r, ok in zip(results, solved)]),
+           'outputs': {}, 'sensitivities': {}}
+    for name in outputs:
+        out['outputs'][name] = np.array(
+            [artifact.value(r, name) if ok else np.nan
+             for r, ok in zip(results, solved)])
+    for name in batch:
+        names = [artifact.const_names[k] for k in artifact.constant_indices(name)]
+        out['sensitivities'][name] = np.array(
+            [sum(r['sensitivities'][n] for n in names) if ok else np.nan
+             for r, ok in zip(results, solved)])
+    return out
+
+_MODEL = None
+_X0 = None
+
+def _init_sp_worker(config, Nclimb, Ncruise):
+    "builds, wraps and solves the base design once per worker"
+    global _MODEL, _X0
+    from SPaircraft import build_mission, relax_aircraft
+    m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise)
+    _MODEL = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    _X0 = _MODEL.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)['freevariables']
+
+def _sp_worker(job):
+    from gpkit.small_scripts import mag
+    from relaxed_constants import update_constants
+    substitutions, outputs = job
+    update_constants(_MODEL, substitutions)
+    try:
+        sol = _MODEL.localsolve(verbosity=0, iteration_limit=200, reltol=0.01, x0=_X0)
+    except Exception as error:
+        return {'status': 'error: %s' % error}
+    return {'status': 'optimal', 'cost': float(mag(sol['cost'])),
+            'outputs': dict((name, mag(sol(name))) for name in outputs)}
+
+def batch_sp(config, batch, outputs=(), processes=None, Nclimb=3, Ncruise=2):
+    """
+    Solves a batch of substitutions on one production configuration, each
+    worker building the model once
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    batch: dictionary of substitution name to a value or an array with one
+           value per member
+    outputs: variable names to collect (in their model units)
+
+    RETURNS
+    -------
+    dictionary with status (list), cost and outputs {name: array over the batch}
+    """
+    n = batch_size(batch)
+    jobs = [(dict((name, np.broadcast_to(value, (n,))[i]) for name, value in batch.items()),
+             list(outputs)) for i in range(n)]
+    if processes == 1:
+        _init_sp_worker(config, Nclimb, Ncruise)
+        results = [_sp_worker(job) for job in jobs]
+    else:
+        pool = Pool(processes, _init_sp_worker, (config, Nclimb, Ncruise))
+        try:
+            results = pool.map(_sp_worker, jobs)
+        finally:
+            pool.close()
+            pool.join()
+    solved = ['cost' in r for r in results]
+    return {'status': [r['status'] for r in results],
+            'cost': np.array([r['cost'] if ok else np.nan
+                              for r, ok in zip(results, solved)]),
+            'outputs': dict((name, np.array([r['outputs'][name] if ok else np.nan
+                                             for r, ok in zip(results, solved)]))
+                            for name in outputs)}
+
+def test():
+    "checks that sp mode jobs with different constants solve differently"
+    result = batch_sp('optimal737', {'C_{wing}': np.array([1., 1.2])},
+                      outputs=['W_{f_{total}}'], processes=1)
+    assert result['status'] == ['optimal', 'optimal']
+    wf = [np.sum(w) for w in result['outputs']['W_{f_{total}}']]
+    assert wf[1] > wf[0]*1.001, "a heavier wing did not burn more fuel"
+
+if __name__ == "__main__":
+    # range sweep around an exported design: python batch_solve.py design.npz
+    import sys
+    from time import time
+    ranges = np.linspace(2500, 3500, 32)
+    starttime = time()
+    result = batch_gp(sys.argv[1], {'R_{req}': ranges})
+    print("%i solves in %.2f s" % (len(ranges), time() - starttime))
+    for R, cost, sens in zip(ranges, result['cost'], result['sensitivities']['R_{req}']):
+        print("R_{req} %6.0f nmi: cost %.6g, sensitivity to range %.3f" % (R, cost, sens))
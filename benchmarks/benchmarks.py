@@ -0,0 +1,84 @@
+"""
+asv benchmarks of every production configuration and legacy substitution set
+
+Each stage is measured separately: model construction, substitution and
+relaxed constants wrapping, and the SP solve (wall time, SP iterations, mean
+GP solve time and peak memory).
+"""
+
+from .common import CONFIGS, LEGACY, build, relax, solve, stage_profile
+from SPaircraft import relax_aircraft
+
+NAMES = list(CONFIGS) + sorted(LEGACY)
+
+class Build(object):
+    "construction of the Mission model"
+    params = NAMES
+    param_names = ['config']
+    timeout = 600
+
+    def time_build(self, name):
+        build(name)
+
+    def peakmem_build(self, name):
+        build(name)
+
+class Relax(object):
+    "substitutions, Bounded wrapping and relaxed constants"
+    params = NAMES
+    param_names = ['config']
+    timeout = 600
+
+    def setup(self, name):
+        self.args = build(name)
+
+    def time_relax(self, name):
+        m, substitutions, fixedBPR, pRatOpt = self.args
+        relax_aircraft(m, dict(substitutions), fixedBPR, pRatOpt)
+
+class Solve(object):
+    """
+    SP solve of the wrapped model. The solve statistics come from one solve
+    per configuration in setup_cache, so they are not repeated for every
+    tracked quantity.
+    """
+    params = NAMES
+    param_names = ['config']
+    timeout = 3600
+    number = 1
+    repeat = 1
+
+    def setup_cache(self):
+        stats = {}
+        for name in NAMES:
+            try:
+                stats[name] = stage_profile(name)
+            except Exception as error:
+                # a configuration that fails to solve shows as a failed benchmark
+                stats[name] = "%s: %s" % (type(error).__name__, error)
+        return stats
+
+    def setup(self, stats, name):
+        # (NotImplementedError would make asv skip, not fail, the benchmark)
+        if not isinstance(stats[name], dict):
+            raise RuntimeError("%s did not solve (%s)" % (name, stats[name]))
+        self.m_relax = relax(name)
+
+    def time_solve(self, stats, name):
+        solve(self.m_relax)
+
+    def peakmem_solve(self, stats, name):
+        solve(self.m_relax)
+
+    def track_sp_iterations(self, stats, name):
+        return stats[name]['sp_iterations']
+    track_sp_iterations.unit = "iterations"
+
+    def track_mean_gp_time(self, stats, name):
+        soltimes = stats[name]['gp_soltimes']
+        return sum(soltimes)/len(soltimes)
+    track_mean_gp_time.unit = "seconds"
+
+    def track_total_gp_time(self, stats, name):
+        return sum(stats[name]['gp_soltimes'])
+    track_total_gp_time.unit = "seconds"
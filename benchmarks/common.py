@@ -0,0 +1,143 @@
+"""
+Shared setup of the benchmark suite: production and legacy configurations
+built, wrapped and solved one stage at a time
+"""
+
+import os
+import sys
+import types
+import resource
+from time import time
+
+ROOT = os.environ.get('SPAIRCRAFT_ROOT',
+                      os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from gpkit import units
+from SPaircraft import CONFIGS, build_mission, relax_aircraft
+from aircraft import Mission
+from convergence_trace import ConvergenceTrace
+
+LEGACYDIR = os.path.join(ROOT, "subs", "Legacy_subs")
+
+# Mission only knows the production configurations, so each legacy
+# substitution set is flown on the production configuration with the same
+# geometry flags: legacy module: (configuration, range [nmi], passengers)
+# (range and passengers None keep those of the configuration)
+LEGACY = {
+    'D12': ('optimalD8', 6000., 450.),
+    'D80': ('optimalD8', None, None),
+    'D82': ('optimalD8', None, None),
+    'D82_737_engine': ('optimalD8', None, None),
+    'D8_M08': ('optimalD8', None, None),
+    'D8_big': ('optimalD8', 6000., 450.),
+    'D8_big_M072': ('optimalD8', 6000., 450.),
+    'D8_big_M08': ('optimalD8', 6000., 450.),
+    'D8_big_eng_wing': ('D8_eng_wing', 6000., 450.),
+    'D8_big_eng_wing_M072': ('D8_eng_wing', 6000., 450.),
+    'D8_big_no_BLI': ('D8_no_BLI', 6000., 450.),
+    'D8_big_no_BLI_M072': ('D8_no_BLI', 6000., 450.),
+    'D8_eng_wing_M08': ('D8_eng_wing', None, None),
+    'D8_no_BLI_M08': ('D8_no_BLI', None, None),
+    'D8_small': ('optimalD8', None, None),
+    'D8_small_M08': ('optimalD8', None, None),
+    'D8_small_eng_wing': ('D8_eng_wing', None, None),
+    'D8_small_eng_wing_M08': ('D8_eng_wing', None, None),
+    'D8_small_no_BLI': ('D8_no_BLI', None, None),
+    'D8_small_no_BLI_M08': ('D8_no_BLI', None, None),
+    'b737800': ('optimal737', None, None),
+    'b777300ER': ('optimal777', None, None),
+    'optimal_777_M072': ('optimal777', None, None),
+    'optimal_777_M08': ('optimal777', None, None),
+    'optimal_RJ': ('optimal737', None, None),
+    'optimal_RJ_M072': ('optimal737', None, None),
+}
+
+# mission size of the benchmarks
+NCLIMB = 3
+NCRUISE = 2
+
+def legacy_subs(name):
+    """
+    Returns the substitutions of a legacy module in subs/Legacy_subs
+    (not a package, so the file is executed directly)
+    """
+    filename = os.path.join(LEGACYDIR, name + ".py")
+    namespace = {'__file__': filename}
+    with open(filename) as f:
+        exec(compile(f.read(), filename, 'exec'), namespace)
+    getsubs = [v for v in namespace.values()
+               if isinstance(v, types.FunctionType)
+               and v.__code__.co_filename == filename]
+    return getsubs[0]()
+
+def build(name, Nclimb=NCLIMB, Ncruise=NCRUISE):
+    """
+    Builds a production configuration or a legacy substitution set
+
+    RETURNS
+    -------
+    model, substitutions, fixedBPR, pRatOpt (see SPaircraft.build_mission)
+    """
+    if name in CONFIGS:
+        return build_mission(name, Nclimb, Ncruise)
+    config, Rreq, npass = LEGACY[name]
+    _, fixedBPR, pRatOpt, configR, confignpass = CONFIGS[config]
+    m = Mission(Nclimb, Ncruise, config, 1)
+    m.cost = m['W_{f_{total}}'].sum()
+    substitutions = legacy_subs(name)
+    substitutions.setdefault('R_{req}', (Rreq or configR)*units('nmi'))
+    substitutions.setdefault('n_{pass}', npass or confignpass)
+    return m, substitutions, fixedBPR, pRatOpt
+
+def relax(name, Nclimb=NCLIMB, Ncruise=NCRUISE):
+    "builds a configuration and wraps it for the relaxed constants SP solve"
+    m, substitutions, fixedBPR, pRatOpt = build(name, Nclimb, Ncruise)
+    return relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+
+def solve(m_relax):
+    "solves a wrapped model as SPaircraft.optimize_aircraft does"
+    return m_relax.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+
+def peak_memory():
+    "returns the peak resident memory of this process [MB]"
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on linux, bytes on mac
+    return maxrss/(1024.**2 if sys.platform == 'darwin' else 1024.)
+
+def stage_profile(name, Nclimb=NCLIMB, Ncruise=NCRUISE):
+    """
+    Builds, wraps and solves a configuration, timing each stage
+
+    Peak memory is that of the whole process after each stage, so run one
+    configuration per process for comparable numbers.
+
+    RETURNS
+    -------
+    dictionary of build, relax and solve time [s], SP iterations, per GP
+    solve times [s], and peak memory [MB] after import and each stage
+    """
+    out = {'name': name, 'Nclimb': Nclimb, 'Ncruise': Ncruise,
+           'peakmem_import': peak_memory()}
+    starttime = time()
+    m, substitutions, fixedBPR, pRatOpt = build(name, Nclimb, Ncruise)
+    out['time_build'] = time() - starttime
+    out['peakmem_build'] = peak_memory()
+
+    starttime = time()
+    m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    out['time_relax'] = time() - starttime
+    out['peakmem_relax'] = peak_memory()
+
+    starttime = time()
+    sol = solve(m_relax)
+    out['time_solve'] = time() - starttime
+    out['peakmem_solve'] = peak_memory()
+
+    trace = ConvergenceTrace()
+    trace.record_program(sol.program)
+    out['sp_iterations'] = len(trace)
+    out['gp_soltimes'] = trace.soltime[:len(trace)].tolist()
+    out['cost'] = float(trace.cost[len(trace) - 1])
+    return out
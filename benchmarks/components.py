@@ -0,0 +1,244 @@
+"""
+Component micro-benchmarks: each subsystem model solved on its own
+
+    python -m benchmarks.components            # all components
+    python -m benchmarks.components wing ht
+
+Each component (and its performance model, where it has one) is flown at a
+synthetic cruise FlightState with fixed loads standing in for the rest of
+the aircraft. Substitutions come from a production configuration, limited
+to the component's variables, and Bounded closes whatever the fixed loads
+leave open, so the fixtures solve without the Mission around them. As for
+the full aircraft, the fixtures are solved with relaxed constants.
+"""
+
+import sys
+from time import time
+from collections import OrderedDict
+
+import numpy as np
+from numpy import pi
+from gpkit import Model, units, SignomialsEnabled
+from gpkit.constraints.bounded import Bounded as BCS
+from gpkit.constraints.tight import Tight as TCS
+from gpkit.small_scripts import mag
+
+try:
+    from .common import CONFIGS, peak_memory
+except (ValueError, ImportError):
+    # imported from this directory by the test runner, where benchmarks.py
+    # shadows the package; common puts the repository root on sys.path
+    from common import CONFIGS, peak_memory
+from convergence_trace import ConvergenceTrace
+from relaxed_constants import relaxed_constants
+from stand_alone_simple_profile import FlightState
+from wing import Wing, WingNoStruct
+from wingbox import WingBox
+from fuselage import Fuselage
+from horizontal_tail import HorizontalTail
+from vertical_tail import VerticalTail
+from landing_gear import LandingGear
+
+# configuration the component substitutions are taken from
+CONFIG = 'optimal737'
+
+# synthetic cruise state
+ALTITUDE = 35000.  # [ft]
+MACH = 0.78
+
+# maximum tail lifts [N] of the tail fixtures, also carried by the fuselage
+HT_LOAD = 1.5e5
+VT_LOAD = 1.2e5
+
+# wing lift curve slope and aspect ratio the ht fixture's downwash is taken at
+CLA_WING = 5.5
+AR_WING = 10.
+
+def _root_moment(surface, wingbox):
+    "wing root moment per root chord for lift proportional to chord, without load relief"
+    return TCS([wingbox['M_r']*surface['c_{root}'] >= surface['L_{max}']*surface['b']**2
+                /(12*surface['S'])*(surface['c_{root}'] + 2*surface['c_{tip}'])])
+
+def flight_state():
+    "returns a FlightState and the substitutions fixing it at cruise"
+    state = FlightState()
+    return state, {state['hft']: ALTITUDE*units('ft'), state['M']: MACH}
+
+def _wing(state):
+    wing = Wing()
+    perf = wing.dynamic(state)
+    return ([wing, perf, _root_moment(wing.wns, wing.wb)], wing['W_{wing}'] + perf['D_{wing}'],
+            {wing['L_{max}']: 1.9e6*units('N'),
+             wing['W_{fuel_{wing}}']: 1.5e5*units('N'),
+             perf['L_w']: 6.5e5*units('N')})
+
+def _wingbox(state):
+    surface = WingNoStruct()
+    wingbox = WingBox(surface, "wing")
+    # with no performance model the planform is fixed, at 737 class size
+    return ([surface, wingbox, _root_moment(surface, wingbox)], wingbox['W_{struct}'],
+            {surface['L_{max}']: 1.9e6*units('N'),
+             surface['W_{fuel_{wing}}']: 1.5e5*units('N'),
+             surface['S']: 125.*units('m^2'),
+             surface['b']: 34.*units('m')})
+
+def _fuselage(state):
+    fuse = Fuselage(1)
+    perf = fuse.dynamic(state)
+    # tail bending loads on the fuselage, as Aircraft sizes them from the
+    # tail weight (about 5000 lbf for a 737 class tail) and the maximum tail lifts
+    bending = [
+        fuse['A_{1h_{Land}}'] >= fuse['N_{land}']*(fuse['W_{tail}'] + fuse['W_{apu}'])
+                                 /(fuse['h_{fuse}']*fuse['\\sigma_{bend}']),
+        fuse['A_{1h_{MLF}}'] >= (fuse['N_{lift}']*(fuse['W_{tail}'] + fuse['W_{apu}'])
+                                 + fuse['r_{M_h}']*HT_LOAD*units('N'))
+                                /(fuse['h_{fuse}']*fuse['\\sigma_{M_h}']),
+        fuse['B_{1v}'] == fuse['r_{M_v}']*VT_LOAD*units('N')
+                          /(fuse['w_{fuse}']*fuse['\\sigma_{M_v}']),
+    ]
+    # tube floor loading and drag, as Aircraft sets them for a conventional
+    # fuselage, at the wing's maximum load factor
+    tube = [fuse['S_{floor}'] == 1./2.*fuse['P_{floor}'],
+            fuse['M_{floor}'] == 1./4.*fuse['P_{floor}']*fuse['w_{floor}'],
+            perf['C_{D_{fuse}}'] == 0.01107365,
+            fuse['M_{fuseD}'] == 0.80,
+            perf['D_{fuse}'] == 0.5*state['\\rho']*state['V']**2*perf['C_{D_{fuse}}']
+                                *fuse['l_{fuse}']*fuse['R_{fuse}']*state['M']**2/fuse['M_{fuseD}']**2]
+    return ([fuse, perf, bending, tube], fuse['W_{fuse}'] + perf['D_{fuse}'],
+            {fuse['W_{tail}']: 2.2e4*units('N'),
+             fuse['n_{pass}']: 180.,
+             fuse['N_{lift}']: 3.})
+
+def _ht(state):
+    ht = HorizontalTail()
+    perf = ht.dynamic(state, True)
+    # conventional tail root moment and the aircraft's tail lift and aspect
+    # ratio limits, with the wing downwash at a fixed wing lift curve slope
+    with SignomialsEnabled():
+        constraints = [
+            TCS([ht['M_r']*ht['c_{attach}'] >= 1./3.*ht['L_{ht_{tri_{out}}}']*ht['b_{ht_{out}}']
+                 + 1./2.*ht['L_{ht_{rect_{out}}}']*ht['b_{ht_{out}}']]),
+            ht['c_{attach}'] == ht['c_{root_{ht}}'],
+            ht['b_{ht_{out}}'] == 0.5*ht['b_{ht}'],
+            ht['M_{r_{out}}'] == ht['M_r'],
+            ht['L_{shear}'] >= ht['L_{ht_{rect_{out}}}'] + ht['L_{ht_{tri_{out}}}'],
+            ht['\\pi_{M-fac}'] == 1.0,
+            perf['C_{L_{\\alpha,ht}}'] + 2*CLA_WING/(pi*AR_WING)*ht['\\eta_{ht}']
+            *perf['C_{L_{\\alpha,ht_0}}'] <= perf['C_{L_{\\alpha,ht_0}}']*ht['\\eta_{ht}'],
+            ht['AR_{ht}'] >= 4.,
+            perf['C_{L_{ht}}'] >= 0.01,
+        ]
+    return ([ht, perf, constraints], ht['W_{ht}'] + perf['D_{ht}'],
+            {ht['L_{ht_{max}}']: HT_LOAD*units('N'),
+             perf['L_{ht}']: 2.0e4*units('N')})
+
+def _vt(state):
+    vt = VerticalTail()
+    perf = vt.dynamic(state, True)
+    return ([vt, perf], vt['W_{vt}'] + perf['D_{vt}'],
+            {vt['L_{vt_{max}}']: VT_LOAD*units('N')})
+
+def _landing_gear(state):
+    lg = LandingGear()
+    # gear loads of a 7.8e5 N maximum takeoff weight, 92% on the mains, and
+    # the landing energy of a 10 ft/s sink rate
+    return [lg], lg['W_{lg}'], {lg['L_m']: 7.2e5*units('N'),
+                                lg['L_n']: 6.2e4*units('N'),
+                                lg['L_{n_{dyn}}']: 6.5e4*units('N'),
+                                lg['E_{land}']: 3.7e5*units('J')}
+
+# component: function of a FlightState returning (models, objective, loads)
+FIXTURES = OrderedDict([
+    ('wing', _wing),
+    ('wingbox', _wingbox),
+    ('fuselage', _fuselage),
+    ('ht', _ht),
+    ('vt', _vt),
+    ('landing_gear', _landing_gear),
+])
+
+def component_subs(model, config=CONFIG):
+    "returns the substitutions of a configuration that apply to a model"
+    names = set(key.name for key in model.varkeys)
+    return dict((k, v) for k, v in CONFIGS[config][0]().items() if k in names)
+
+def build_component(name, config=CONFIG):
+    """
+    Builds a component fixture
+
+    RETURNS
+    -------
+    model with relaxed constants, ready for localsolve
+    """
+    state, substitutions = flight_state()
+    models, objective, loads = FIXTURES[name](state)
+    m = Model(objective, BCS([state] + models))
+    m.substitutions.update(component_subs(m, config))
+    m.substitutions.update(substitutions)
+    m.substitutions.update(loads)
+    return relaxed_constants(m)
+
+def component_profile(name, config=CONFIG):
+    """
+    Times the build and solve of a component fixture
+
+    RETURNS
+    -------
+    dictionary of build and solve time [s], SP iterations, GP size and peak
+    memory [MB]
+    """
+    starttime = time()
+    m = build_component(name, config)
+    out = {'name': name, 'time_build': time() - starttime}
+    starttime = time()
+    sol = m.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+    out['time_solve'] = time() - starttime
+    trace = ConvergenceTrace()
+    trace.record_program(sol.program)
+    n = len(trace)
+    out['sp_iterations'] = n
+    out['gp_variables'] = int(trace.nvars[n - 1])
+    out['gp_monomials'] = int(trace.nmonomials[n - 1])
+    out['peakmem'] = peak_memory()
+    return out
+
+class Components(object):
+    "asv benchmarks of the component fixtures"
+    params = list(FIXTURES)
+    param_names = ['component']
+
+    def setup(self, name):
+        self.m = build_component(name)
+
+    def time_build(self, name):
+        build_component(name)
+
+    def time_solve(self, name):
+        self.m.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+
+    def peakmem_solve(self, name):
+        self.m.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+
+def test():
+    "solves every fixture to a non trivial optimum with no constant left relaxed"
+    for name in FIXTURES:
+        sol = build_component(name).localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+        relaxed = [str(k) for k, v in sol['freevariables'].items()
+                   if "Relax" in (k.models or ()) and np.max(mag(v)) >= 1.00001]
+        assert not relaxed, "%s fixture relaxed %s" % (name, ", ".join(relaxed))
+        # a fixture that sizes its component to nothing has a vanishing cost
+        assert mag(sol['cost']) > 100., "%s fixture sized to nothing" % name
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(FIXTURES)
+    print("%-14s %8s %8s %5s %7s %9s %8s" % (
+        "component", "build", "solve", "SP", "vars", "monomials", "mem [MB]"))
+    for name in names:
+        try:
+            r = component_profile(name)
+        except Exception as error:
+            print("%-14s failed: %s" % (name, error))
+            continue
+        print("%-14s %8.3f %8.3f %5i %7i %9i %8.0f" % (
+            name, r['time_build'], r['time_solve'], r['sp_iterations'],
+            r['gp_variables'], r['gp_monomials'], r['peakmem']))
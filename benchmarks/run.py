@@ -0,0 +1,150 @@
+"""
+Runs the stage benchmarks without asv and stores them per commit
+
+    python -m benchmarks.run                 # all configurations
+    python -m benchmarks.run optimal737 D82  # a subset
+    python -m benchmarks.run --against <commit>
+
+Every configuration runs in its own process so peak memory is not shared
+between them. Results go to benchmarks/results/<commit>.json and are compared
+against an earlier commit (by default the most recent other results file).
+"""
+
+import os
+import sys
+import json
+import argparse
+import platform
+import subprocess
+from time import time
+
+from .common import ROOT, CONFIGS, LEGACY, stage_profile
+
+RESULTSDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# quantities compared between commits, all worse when larger
+COMPARED = ['time_build', 'time_relax', 'time_solve', 'sp_iterations',
+            'peakmem_build', 'peakmem_relax', 'peakmem_solve']
+
+# relative increase flagged as a regression
+RELTOL = 0.2
+
+def run_one(name):
+    "profiles one configuration in a fresh interpreter"
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'benchmarks.run', '--single', name], cwd=ROOT)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def run(names):
+    """
+    Profiles configurations, one process each
+
+    RETURNS
+    -------
+    dictionary of configuration to stage_profile output (None if it failed)
+    """
+    results = {}
+    for name in names:
+        starttime = time()
+        try:
+            results[name] = run_one(name)
+            print("%-24s %8.1f s" % (name, time() - starttime))
+        except subprocess.CalledProcessError:
+            results[name] = None
+            print("%-24s failed" % name)
+    return results
+
+def results_file(commit):
+    return os.path.join(RESULTSDIR, "%s.json" % commit)
+
+def save(results, commit):
+    "writes the results of a commit"
+    if not os.path.isdir(RESULTSDIR):
+        os.makedirs(RESULTSDIR)
+    with open(results_file(commit), 'w') as f:
+        json.dump({'commit': commit, 'time': time(),
+                   'python': platform.python_version(),
+                   'machine': platform.node(), 'results': results},
+                  f, indent=1, sort_keys=True)
+
+def load(commit):
+    with open(results_file(commit)) as f:
+        return json.load(f)
+
+def previous(commit):
+    "returns the commit of the most recent other results file"
+    if not os.path.isdir(RESULTSDIR):
+        return None
+    others = [f for f in os.listdir(RESULTSDIR)
+              if f.endswith(".json") and f != "%s.json" % commit]
+    if not others:
+        return None
+    latest = max(others, key=lambda f: os.path.getmtime(os.path.join(RESULTSDIR, f)))
+    return latest[:-len(".json")]
+
+def compare(old, new, reltol=RELTOL):
+    """
+    Compares the results of two commits
+
+    RETURNS
+    -------
+    list of (configuration, quantity, old value, new value) regressions
+    """
+    regressions = []
+    for name in sorted(new['results']):
+        before = old['results'].get(name)
+        after = new['results'][name]
+        if after is None:
+            if before is not None:
+                regressions.append((name, 'solve', 'ok', 'failed'))
+            continue
+        if before is None:
+            continue
+        for quantity in COMPARED:
+            if after[quantity] > (1 + reltol)*before[quantity]:
+                regressions.append((name, quantity, before[quantity], after[quantity]))
+    return regressions
+
+def summary(results):
+    "prints the stage table of a set of results"
+    print("%-24s %8s %8s %8s %5s %8s %8s" % (
+        "config", "build", "relax", "solve", "SP", "GP mean", "mem [MB]"))
+    for name in sorted(results):
+        r = results[name]
+        if r is None:
+            print("%-24s failed" % name)
+            continue
+        print("%-24s %8.2f %8.2f %8.2f %5i %8.3f %8.0f" % (
+            name, r['time_build'], r['time_relax'], r['time_solve'],
+            r['sp_iterations'], sum(r['gp_soltimes'])/len(r['gp_soltimes']),
+            r['peakmem_solve']))
+
+if __name__ == "__main__":
+    from build_profile import git_commit
+    parser = argparse.ArgumentParser(description="stage benchmarks per commit")
+    parser.add_argument('names', nargs='*', help="configurations (default: all)")
+    parser.add_argument('--legacy', action='store_true',
+                        help="include the legacy substitution sets")
+    parser.add_argument('--against', help="commit to compare against")
+    parser.add_argument('--reltol', type=float, default=RELTOL)
+    parser.add_argument('--single', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(stage_profile(args.single)))
+        sys.exit(0)
+
+    names = args.names or list(CONFIGS) + (sorted(LEGACY) if args.legacy else [])
+    commit = git_commit() or "uncommitted"
+    new = {'commit': commit, 'results': run(names)}
+    save(new['results'], commit)
+    summary(new['results'])
+
+    against = args.against or previous(commit)
+    if against is None:
+        sys.exit(0)
+    regressions = compare(load(against), new, args.reltol)
+    print("\n%i regressions against %s" % (len(regressions), against))
+    for name, quantity, before, after in regressions:
+        print("    %s %s: %s -> %s" % (name, quantity, before, after))
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,215 @@
+"""
+Scaling of model size, solve time and memory with the mission discretization
+
+    python -m benchmarks.scaling                  # default sweeps
+    python -m benchmarks.scaling --no-solve       # model size only
+    python -m benchmarks.scaling --segments 2 4 8 --missions 1 2
+
+Mission vectorizes the flight state, flight segments and engine performance
+over Nclimb + Ncruise segments and Nmission missions. Each point is built
+(and solved) in its own process; power laws y ~ N**k are fitted to every
+recorded quantity and to the constraints and posynomial terms of each model
+class, so superlinear constraint blocks stand out.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+from time import time
+import numpy as np
+
+from .common import ROOT, peak_memory, solve
+from build_profile import BuildProfiler, git_commit
+from convergence_trace import ConvergenceTrace
+from SPaircraft import build_mission, relax_aircraft
+
+# total number of flight segments (split evenly between climb and cruise)
+SEGMENTS = [2, 4, 8, 16, 32, 64]
+# number of missions, flown with the benchmark segments
+MISSIONS = [1, 2, 4, 8, 16, 32]
+NCLIMB = 3
+NCRUISE = 2
+
+# quantities power laws are fitted to
+QUANTITIES = ['variables', 'constraints', 'posynomial_terms', 'gp_variables',
+              'gp_monomials', 'time_build', 'time_relax', 'time_solve',
+              'mean_gp_time', 'sp_iterations', 'peakmem']
+
+# exponents above this are reported as superlinear
+SUPERLINEAR = 1.1
+
+def scaling_point(config, Nclimb, Ncruise, Nmission, solve_model=True):
+    """
+    Builds (and solves) one discretization of a configuration
+
+    RETURNS
+    -------
+    dictionary of model size (total and per model class), stage times, SP
+    iterations, GP size and peak memory [MB]
+    """
+    out = {'config': config, 'Nclimb': Nclimb, 'Ncruise': Ncruise,
+           'Nmission': Nmission}
+    starttime = time()
+    with BuildProfiler() as prof:
+        m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise, Nmission)
+    out['time_build'] = time() - starttime
+    totals = prof.totals()
+    for key in ['variables', 'constraints', 'posynomial_terms']:
+        out[key] = totals[key]
+    out['classes'] = dict((name, {'constraints': entry['constraints'],
+                                  'posynomial_terms': entry['posynomial_terms']})
+                          for name, entry in prof.by_class().items())
+
+    starttime = time()
+    m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    out['time_relax'] = time() - starttime
+    if solve_model:
+        starttime = time()
+        sol = solve(m_relax)
+        out['time_solve'] = time() - starttime
+        trace = ConvergenceTrace()
+        trace.record_program(sol.program)
+        n = len(trace)
+        out['sp_iterations'] = n
+        out['mean_gp_time'] = float(np.nanmean(trace.soltime[:n]))
+        out['gp_variables'] = int(trace.nvars[n - 1])
+        out['gp_monomials'] = int(trace.nmonomials[n - 1])
+    out['peakmem'] = peak_memory()
+    return out
+
+def run_point(config, Nclimb, Ncruise, Nmission, solve_model=True):
+    "runs scaling_point in a fresh interpreter, None if it fails"
+    command = [sys.executable, '-m', 'benchmarks.scaling', '--single',
+               config, str(Nclimb), str(Ncruise), str(Nmission)]
+    if not solve_model:
+        command.append('--no-solve')
+    try:
+        output = subprocess.check_output(command, cwd=ROOT)
+    except subprocess.CalledProcessError:
+        return None
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+def sweep(config='optimal737', segments=SEGMENTS, missions=MISSIONS, solve_model=True):
+    """
+    Runs the segment sweep (one mission) and the mission sweep
+    (NCLIMB + NCRUISE segments)
+
+    RETURNS
+    -------
+    dictionary with 'segments' and 'missions' lists of scaling_point outputs
+    (failed points are left out)
+    """
+    out = {'segments': [], 'missions': []}
+    for N in segments:
+        Nclimb = max(N//2, 1)
+        point = run_point(config, Nclimb, N - Nclimb, 1, solve_model)
+        print("%3i segments: %s" % (N, "failed" if point is None else
+                                      "%.1f s" % point['time_build']))
+        if point is not None:
+            out['segments'].append(point)
+    for N in missions:
+        point = run_point(config, NCLIMB, NCRUISE, N, solve_model)
+        print("%3i missions: %s" % (N, "failed" if point is None else
+                                      "%.1f s" % point['time_build']))
+        if point is not None:
+            out['missions'].append(point)
+    return out
+
+def size(point, sweep_name):
+    "the swept size of a scaling point"
+    if sweep_name == 'segments':
+        return point['Nclimb'] + point['Ncruise']
+    return point['Nmission']
+
+def power_law(n, y):
+    """
+    Least squares fit of y = a*n**k in log space
+
+    RETURNS
+    -------
+    exponent k, coefficient a (NaN if fewer than two positive points)
+    """
+    n, y = np.asarray(n, dtype=float), np.asarray(y, dtype=float)
+    ok = (n > 0) & (y > 0) & np.isfinite(y)
+    if ok.sum() < 2 or len(np.unique(n[ok])) < 2:
+        return np.nan, np.nan
+    k, loga = np.polyfit(np.log(n[ok]), np.log(y[ok]), 1)
+    return float(k), float(np.exp(loga))
+
+def exponents(results):
+    """
+    Fits complexity exponents to each sweep
+
+    RETURNS
+    -------
+    dictionary of sweep name to
+        quantities: {quantity: exponent}
+        classes: {model class: {constraints, posynomial_terms exponents}}
+    """
+    out = {}
+    for sweep_name in ['segments', 'missions']:
+        points = results[sweep_name]
+        n = [size(p, sweep_name) for p in points]
+        quantities = {}
+        for q in QUANTITIES:
+            quantities[q] = power_law(n, [p.get(q, np.nan) for p in points])[0]
+        classes = {}
+        names = set(name for p in points for name in p['classes'])
+        for name in names:
+            classes[name] = dict(
+                (q, power_law(n, [p['classes'].get(name, {}).get(q, np.nan)
+                                  for p in points])[0])
+                for q in ['constraints', 'posynomial_terms'])
+        out[sweep_name] = {'quantities': quantities, 'classes': classes}
+    return out
+
+def summary(results, fitted=None):
+    "prints the sweeps, the fitted exponents and the superlinear model classes"
+    if fitted is None:
+        fitted = exponents(results)
+    for sweep_name in ['segments', 'missions']:
+        print("\n%s sweep" % sweep_name)
+        print("%5s %8s %8s %9s %8s %8s %5s %8s" % (
+            "N", "vars", "constr", "terms", "build", "solve", "SP", "mem [MB]"))
+        for p in results[sweep_name]:
+            print("%5i %8i %8i %9i %8.2f %8.2f %5s %8.0f" % (
+                size(p, sweep_name), p['variables'], p['constraints'],
+                p['posynomial_terms'], p['time_build'], p.get('time_solve', np.nan),
+                p.get('sp_iterations', "-"), p['peakmem']))
+        print("exponents: " + ", ".join(
+            "%s %.2f" % (q, k) for q, k in sorted(fitted[sweep_name]['quantities'].items())
+            if np.isfinite(k)))
+        for name, ks in sorted(fitted[sweep_name]['classes'].items()):
+            if max(ks.values()) > SUPERLINEAR:
+                print("    superlinear: %s (constraints %.2f, terms %.2f)" % (
+                    name, ks['constraints'], ks['posynomial_terms']))
+
+if __name__ == "__main__":
+    from .run import RESULTSDIR
+    parser = argparse.ArgumentParser(description="mission discretization scaling")
+    parser.add_argument('--config', default='optimal737')
+    parser.add_argument('--segments', type=int, nargs='*', default=SEGMENTS)
+    parser.add_argument('--missions', type=int, nargs='*', default=MISSIONS)
+    parser.add_argument('--no-solve', dest='solve', action='store_false')
+    parser.add_argument('--single', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        config, Nclimb, Ncruise, Nmission = args.single
+        print(json.dumps(scaling_point(config, int(Nclimb), int(Ncruise),
+                                       int(Nmission), args.solve)))
+        sys.exit(0)
+
+    results = sweep(args.config, args.segments, args.missions, args.solve)
+    fitted = exponents(results)
+    summary(results, fitted)
+    directory = os.path.join(RESULTSDIR, "scaling")
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    filename = os.path.join(directory, "%s_%s.json" % (
+        args.config, git_commit() or "uncommitted"))
+    with open(filename, 'w') as f:
+        json.dump({'commit': git_commit(), 'config': args.config,
+                   'results': results, 'exponents': fitted}, f, indent=1)
@@ -0,0 +1,328 @@
+"""
+Per-submodel construction time and size instrumentation
+"""
+
+import json
+import hashlib
+import subprocess
+import numpy as np
+from time import time
+from collections import OrderedDict
+
+from gpkit import Model
+from gpkit.constraints.set import ConstraintSet
+from gpkit.nomials import SignomialInequality
+
+# quantities recorded for every model instance; the self_ versions exclude
+# the submodels built inside that instance
+COUNTS = ['variables', 'constraints', 'posynomial_terms', 'signomial_constraints']
+
+class _Record(object):
+    "construction record of one model instance"
+    def __init__(self, name):
+        self.name = name
+        self.time = 0.
+        self.children = []
+        self.counts = dict((k, 0) for k in COUNTS)
+        self.varkeys = set()
+
+    @property
+    def self_time(self):
+        return self.time - sum(child.time for child in self.children)
+
+def _count_constraints(constraintset, counts):
+    """
+    Counts the constraints of a constraint set, not descending into submodels
+    (they are counted by their own record)
+    """
+    for item in constraintset:
+        if isinstance(item, Model):
+            continue
+        if isinstance(item, ConstraintSet) or isinstance(item, (list, tuple, np.ndarray)):
+            _count_constraints(item, counts)
+        elif hasattr(item, 'left'):
+            counts['constraints'] += 1
+            for side in [item.left, item.right]:
+                counts['posynomial_terms'] += len(getattr(side, 'exps', ()))
+            if isinstance(item, SignomialInequality):
+                counts['signomial_constraints'] += 1
+
+class BuildProfiler(object):
+    """
+    Context manager timing and sizing every Model built inside it
+
+    Model.__init__ is wrapped for the duration of the context, so every
+    submodel (Aircraft, Fuselage, Wing, FlightSegment, ...) is recorded with
+    its inclusive construction time and its own variables and constraints.
+
+    >>> with BuildProfiler() as prof:
+    ...     m = Mission(Nclimb, Ncruise, 'optimal737', 1)
+    >>> prof.summary()
+    """
+    def __init__(self):
+        self.roots = []
+        self.records = []
+        self._stack = []
+        self._init = None
+
+    def __enter__(self):
+        # the function itself, so __exit__ puts back exactly what was there
+        # (Model.__init__ is an unbound method in python 2)
+        self._init = Model.__dict__['__init__']
+        init = self._init
+        profiler = self
+
+        def profiled_init(model, *args, **kwargs):
+            record = _Record(type(model).__name__)
+            if profiler._stack:
+                profiler._stack[-1].children.append(record)
+            else:
+                profiler.roots.append(record)
+            profiler._stack.append(record)
+            starttime = time()
+            try:
+                init(model, *args, **kwargs)
+            finally:
+                record.time = time() - starttime
+                profiler._stack.pop()
+            profiler._measure(model, record)
+            profiler.records.append(record)
+
+        Model.__init__ = profiled_init
+        return self
+
+    def __exit__(self, *args):
+        Model.__init__ = self._init
+
+    def _measure(self, model, record):
+        "fills in the size counts of a finished model"
+        record.varkeys = set(model.varkeys)
+        childkeys = set()
+        for child in record.children:
+            childkeys.update(child.varkeys)
+        record.counts['variables'] = len(record.varkeys - childkeys)
+        _count_constraints(model, record.counts)
+
+    def by_class(self):
+        """
+        Aggregates the records by model class
+
+        RETURNS
+        -------
+        OrderedDict of class name to instances, total and self construction
+        time [s] and the self counts summed over instances, sorted by self time
+        """
+        classes = {}
+        for record in self.records:
+            entry = classes.setdefault(record.name, dict(
+                [('instances', 0), ('time', 0.), ('self_time', 0.)] +
+                [(k, 0) for k in COUNTS]))
+            entry['instances'] += 1
+            entry['self_time'] += record.self_time
+            for k in COUNTS:
+                entry[k] += record.counts[k]
+        # inclusive time counted once per outermost instance of each class
+        for name in classes:
+            classes[name]['time'] = sum(r.time for r in self._outermost(name))
+        return OrderedDict(sorted(classes.items(),
+                                  key=lambda item: -item[1]['self_time']))
+
+    def _outermost(self, name, records=None, inside=False):
+        "records of a class that are not nested in another of the same class"
+        found = []
+        for record in (self.roots if records is None else records):
+            if record.name == name and not inside:
+                found.append(record)
+            found += self._outermost(name, record.children,
+                                     inside or record.name == name)
+        return found
+
+    def totals(self):
+        "total construction time and counts over all recorded models"
+        out = {'time': sum(r.time for r in self.roots)}
+        for k in COUNTS:
+            out[k] = sum(r.counts[k] for r in self.records)
+        return out
+
+    def tree(self, records=None, depth=0, maxdepth=None):
+        """
+        Returns the construction tree as nested dictionaries
+        """
+        out = []
+        if maxdepth is not None and depth > maxdepth:
+            return out
+        for record in (self.roots if records is None else records):
+            node = OrderedDict([('name', record.name),
+                                ('time', record.time),
+                                ('self_time', record.self_time)])
+            node.update(record.counts)
+            node['children'] = self.tree(record.children, depth + 1, maxdepth)
+            out.append(node)
+        return out
+
+    def to_dict(self, **metadata):
+        """
+        Returns the JSON serializable profile, with the git commit and any
+        extra metadata (e.g. config, Nclimb, Ncruise)
+        """
+        out = OrderedDict([('commit', git_commit())])
+        out.update(sorted(metadata.items()))
+        out['totals'] = self.totals()
+        out['classes'] = self.by_class()
+        out['tree'] = self.tree()
+        return out
+
+    def save(self, filename, **metadata):
+        "writes to_dict to a JSON file"
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(**metadata), f, indent=1)
+
+    def summary(self):
+        "prints the per-class table"
+        print("%-28s %5s %9s %9s %7s %7s %8s %6s" % (
+            "model", "N", "t [s]", "t_self", "vars", "constr", "terms", "SP"))
+        for name, entry in self.by_class().items():
+            print("%-28s %5i %9.3f %9.3f %7i %7i %8i %6i" % (
+                name, entry['instances'], entry['time'], entry['self_time'],
+                entry['variables'], entry['constraints'],
+                entry['posynomial_terms'], entry['signomial_constraints']))
+        totals = self.totals()
+        print("%-28s %5s %9.3f %9s %7i %7i %8i %6i" % (
+            "total", "", totals['time'], "", totals['variables'],
+            totals['constraints'], totals['posynomial_terms'],
+            totals['signomial_constraints']))
+
+def test():
+    "profiles a small model and checks Model.__init__ is restored, also after a failed build"
+    from gpkit import Variable
+    from landing_gear import LandingGear
+
+    class Gear(Model):
+        "landing gear and one variable of its own"
+        def setup(self):
+            self.lg = LandingGear()
+            x = Variable('x')
+            return [self.lg, x >= 1]
+
+    class Broken(Model):
+        "a model that fails to build"
+        def setup(self):
+            raise ValueError("broken setup")
+
+    original = Model.__dict__['__init__']
+    with BuildProfiler() as prof:
+        Gear()
+    assert Model.__dict__['__init__'] is original
+    assert [r.name for r in prof.roots] == ['Gear']
+    assert [r.name for r in prof.roots[0].children] == ['LandingGear']
+    assert prof.roots[0].counts['variables'] == 1
+    assert prof.roots[0].counts['constraints'] == 1
+    lg = prof.roots[0].children[0]
+    assert lg.counts['variables'] > 0 and lg.counts['constraints'] > 0
+    assert prof.totals()['variables'] == lg.counts['variables'] + 1
+    classes = prof.by_class()
+    assert classes['Gear']['instances'] == classes['LandingGear']['instances'] == 1
+
+    try:
+        with BuildProfiler() as prof:
+            Broken()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("the failed build did not raise")
+    assert Model.__dict__['__init__'] is original
+    assert not prof._stack and not prof.records
+
+def git_commit(path=None):
+    "returns the current git commit hash, or None outside a git checkout"
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=path,
+                                       stderr=subprocess.STDOUT).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def git_dirty(path=None):
+    """
+    returns a hash of the uncommitted changes to tracked files, None for a
+    clean tree or outside a git checkout
+    """
+    try:
+        diff = subprocess.check_output(['git', 'diff', 'HEAD'], cwd=path,
+                                       stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return hashlib.sha1(diff).hexdigest() if diff.strip() else None
+
+def profile_mission(config, Nclimb=3, Ncruise=2, Nmission=1, filename=None):
+    """
+    Profiles the construction of a production configuration's Mission
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    Nclimb, Ncruise, Nmission: mission discretization
+    filename: (optional) JSON file to write the profile to
+
+    RETURNS
+    -------
+    BuildProfiler holding the records
+    """
+    from SPaircraft import build_mission
+
+    with BuildProfiler() as prof:
+        build_mission(config, Nclimb, Ncruise, Nmission)
+    if filename:
+        prof.save(filename, config=config, Nclimb=Nclimb, Ncruise=Ncruise,
+                  Nmission=Nmission)
+    return prof
+
+def compare_profiles(old, new, reltol=0.05):
+    """
+    Compares two saved profiles and prints the classes whose size changed
+    or whose self construction time changed by more than reltol
+
+    ARGUMENTS
+    ---------
+    old, new: profile JSON filenames or dictionaries from to_dict
+
+    RETURNS
+    -------
+    dictionary of class name to (old entry, new entry) for changed classes
+    """
+    profiles = []
+    for profile in [old, new]:
+        if not isinstance(profile, dict):
+            with open(profile) as f:
+                profile = json.load(f)
+        profiles.append(profile)
+    old, new = profiles
+
+    changed = {}
+    for name in sorted(set(old['classes']) | set(new['classes'])):
+        a = old['classes'].get(name)
+        b = new['classes'].get(name)
+        if a is None or b is None:
+            changed[name] = (a, b)
+            continue
+        sizechange = any(a[k] != b[k] for k in COUNTS + ['instances'])
+        dt = (b['self_time'] - a['self_time'])/max(a['self_time'], 1e-9)
+        if sizechange or abs(dt) > reltol:
+            changed[name] = (a, b)
+
+    print("%s -> %s" % (old.get('commit'), new.get('commit')))
+    for name, (a, b) in changed.items():
+        if a is None or b is None:
+            print("%-28s %s" % (name, "added" if a is None else "removed"))
+            continue
+        print("%-28s t_self %8.3f -> %8.3f  vars %6i -> %6i  constr %6i -> %6i"
+              "  terms %7i -> %7i" % (name, a['self_time'], b['self_time'],
+                                     a['variables'], b['variables'],
+                                     a['constraints'], b['constraints'],
+                                     a['posynomial_terms'], b['posynomial_terms']))
+    return changed
+
+if __name__ == '__main__':
+    import sys
+    config = sys.argv[1] if len(sys.argv) > 1 else 'optimal737'
+    prof = profile_mission(config, filename='build_profile_%s.json' % config)
+    prof.summary()
@@ -0,0 +1,225 @@
+"""
+Technology insertion chains with chained warm starts and cached steps
+
+A chain is a list of steps, each a delta on the step before it:
+
+    {'name': 'Slow to M = 0.72', 'config': 'M072_737'}
+    {'name': 'Optimize engine', 'fixedBPR': False, 'pRatOpt': True}
+    {'name': 'Lighter wing', 'substitutions': {'C_{wing}': 0.9}}
+
+config, fixedBPR and pRatOpt carry over until a step changes them (the
+first step's flags default to its CONFIGS entry) and substitutions
+accumulate on top of each step's configuration substitutions. Every step
+is warm started from the previous step's solution, mapped onto the new
+model by variable name, and its solution record (see solution_archive) is
+cached under a hash of the chain up to that step and the model code version
+(git commit and uncommitted changes), so appending a step only solves the
+new step and changing the models invalidates the cache. Independent chains
+run concurrently.
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+from multiprocessing import Pool
+
+from solution_archive import key_name, solution_record, unit_factor, _unitstr
+
+CACHEDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".chain_cache")
+
+# the six step chain of killer_plots.standard_killer_plot
+STANDARD_CHAIN = [
+    {'name': 'Optimized 737-800 M = 0.8', 'config': 'optimal737',
+     'fixedBPR': True, 'pRatOpt': False},
+    {'name': 'Slow to M = 0.72', 'config': 'M072_737'},
+    {'name': 'D8 fuselage, Pi tail', 'config': 'D8_eng_wing'},
+    {'name': 'Rear podded engines', 'config': 'D8_no_BLI'},
+    {'name': 'Integrated engines, BLI = D8', 'config': 'optimalD8'},
+    {'name': 'Optimize engine', 'fixedBPR': False, 'pRatOpt': True},
+]
+
+def resolve_steps(chain):
+    """
+    Expands a chain of deltas into full step definitions
+
+    RETURNS
+    -------
+    list of {name, config, fixedBPR, pRatOpt, substitutions} dictionaries
+    """
+    from SPaircraft import CONFIGS
+    steps = []
+    current = {'substitutions': {}}
+    for i, delta in enumerate(chain):
+        step = dict(current)
+        step['substitutions'] = dict(current['substitutions'])
+        step['substitutions'].update(delta.get('substitutions', {}))
+        if 'config' in delta:
+            step['config'] = delta['config']
+            if i == 0:
+                step['fixedBPR'], step['pRatOpt'] = CONFIGS[delta['config']][1:3]
+        elif i == 0:
+            raise ValueError("the first step of a chain needs a config")
+        for flag in ['fixedBPR', 'pRatOpt']:
+            if flag in delta:
+                step[flag] = delta[flag]
+        step['name'] = delta.get('name', "step %i" % i)
+        steps.append(step)
+        current = step
+    return steps
+
+def code_version():
+    """
+    returns the model code version: the git commit and a hash of the
+    uncommitted changes, None outside a git checkout
+    """
+    from build_profile import git_commit, git_dirty
+    path = os.path.dirname(os.path.abspath(__file__))
+    commit = git_commit(path)
+    return commit and [commit, git_dirty(path)]
+
+def step_hash(steps, Nclimb, Ncruise, version=None):
+    """
+    hash of a step and every step before it (the last of steps), for a
+    model code version (see code_version)
+    """
+    definition = [(s['config'], s['fixedBPR'], s['pRatOpt'],
+                   sorted((k, str(v)) for k, v in s['substitutions'].items()))
+                  for s in steps]
+    text = json.dumps([Nclimb, Ncruise, version, definition], sort_keys=True)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def warm_start(record, model, substitutions=()):
+    """
+    Maps a solution record onto a model by variable name, skipping the
+    model's constants and the names in substitutions
+
+    RETURNS
+    -------
+    x0 dictionary over the model's free variables that the record has
+    """
+    x0 = {}
+    for key in model.varkeys:
+        if key in model.substitutions or key.name in substitutions:
+            continue
+        name = key_name(key)
+        if name not in record['variables']:
+            continue
+        value = record['variables'][name]
+        if getattr(key, 'idx', None) is not None:
+            try:
+                value = np.asarray(value)[key.idx]
+            except (IndexError, TypeError):
+                continue
+        elif np.ndim(value):
+            continue
+        value = float(value)*unit_factor(record['units'][name], _unitstr(key))
+        if value > 0:
+            x0[key] = value
+    return x0
+
+def _cached(filename):
+    if filename and os.path.exists(filename):
+        with open(filename) as f:
+            return json.load(f)
+    return None
+
+def run_chain(chain, Nclimb=3, Ncruise=2, cachedir=CACHEDIR, refresh=False):
+    """
+    Solves the steps of a chain in order, each warm started from the last
+
+    ARGUMENTS
+    ---------
+    chain: list of step deltas (see the module docstring)
+    cachedir: directory of cached step records, None to not cache
+    refresh: re-solve every step, overwriting its cached record
+
+    RETURNS
+    -------
+    list of solution records, one per step, with the step definition and
+    whether it came from the cache in their metadata
+    """
+    from SPaircraft import build_mission, optimize_aircraft
+    if cachedir and not os.path.isdir(cachedir):
+        os.makedirs(cachedir)
+    steps = resolve_steps(chain)
+    version = code_version()
+    if version is None and cachedir and not refresh:
+        print("chain: model code version unknown outside a git checkout, not caching")
+        cachedir = None
+    records = []
+    for i, step in enumerate(steps):
+        digest = step_hash(steps[:i + 1], Nclimb, Ncruise, version)
+        filename = os.path.join(cachedir, digest + ".json") if cachedir else None
+        record = None if refresh else _cached(filename)
+        if record is not None:
+            record['metadata']['cached'] = True
+            records.append(record)
+            continue
+        m, substitutions, _, _ = build_mission(step['config'], Nclimb, Ncruise)
+        substitutions.update(step['substitutions'])
+        x0 = warm_start(records[-1], m, substitutions) if records else None
+        sol = optimize_aircraft(m, substitutions, step['fixedBPR'], step['pRatOpt'], x0=x0)
+        record = solution_record(sol, step['config'], step=step['name'], hash=digest,
+                                 fixedBPR=step['fixedBPR'], pRatOpt=step['pRatOpt'],
+                                 substitutions=dict((k, str(v)) for k, v
+                                                    in step['substitutions'].items()),
+                                 Nclimb=Nclimb, Ncruise=Ncruise, code_version=version)
+        if filename:
+            with open(filename, 'w') as f:
+                json.dump(record, f)
+        record['metadata']['cached'] = False
+        records.append(record)
+    return records
+
+def _run_chain(args):
+    return run_chain(*args)
+
+def run_chains(chains, Nclimb=3, Ncruise=2, cachedir=CACHEDIR, processes=None,
+               refresh=False):
+    """
+    Runs independent chains concurrently, one process per chain
+
+    RETURNS
+    -------
+    list of run_chain results, in the order of chains
+    """
+    pool = Pool(processes, maxtasksperchild=1)
+    try:
+        return pool.map(_run_chain, [(chain, Nclimb, Ncruise, cachedir, refresh)
+                                     for chain in chains])
+    finally:
+        pool.close()
+        pool.join()
+
+def test():
+    "checks step resolution and that cache keys change with the chain and code"
+    chain = STANDARD_CHAIN + [{'name': 'Lighter wing', 'substitutions': {'C_{wing}': 0.9}}]
+    steps = resolve_steps(chain)
+    assert [s['config'] for s in steps] == ['optimal737', 'M072_737', 'D8_eng_wing',
+                                            'D8_no_BLI', 'optimalD8', 'optimalD8', 'optimalD8']
+    assert [s['fixedBPR'] for s in steps] == [True]*5 + [False]*2
+    assert steps[-1]['substitutions'] == {'C_{wing}': 0.9} and not steps[-2]['substitutions']
+    try:
+        resolve_steps([{'name': 'no config'}])
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("a chain without a first config resolved")
+
+    version = ['abc', None]
+    base = step_hash(steps[:3], 3, 2, version)
+    assert base == step_hash(resolve_steps(chain)[:3], 3, 2, version)
+    assert base != step_hash(steps[:3], 4, 2, version)
+    assert base != step_hash(steps[:3], 3, 2, ['abc', 'dirty'])
+    lighter = resolve_steps(chain[:2] + [{'substitutions': {'C_{wing}': 0.8}}])
+    assert step_hash(lighter[:2], 3, 2, version) == step_hash(steps[:2], 3, 2, version)
+    assert step_hash(lighter, 3, 2, version) != step_hash(steps[:3], 3, 2, version)
+
+if __name__ == "__main__":
+    from solution_archive import column
+    records = run_chain(STANDARD_CHAIN)
+    wf = column(records, 'W_{f_{total}}', 'lbf')
+    for record, w in zip(records, wf):
+        print("%-32s W_f %8.0f lbf  %.3f%s" % (record['metadata']['step'], w, w/wf[0],
+                                             "  (cached)" if record['metadata']['cached'] else ""))
@@ -0,0 +1,207 @@
+"""
+Compact per-iteration convergence history of the relaxed constants SP solve
+"""
+
+import warnings
+import numpy as np
+from gpkit.small_scripts import mag
+
+# relaxation values above 1 + RELAXTOL count as relaxed
+# (same threshold as relaxed_constants.post_process)
+RELAXTOL = 1e-5
+
+class ConvergenceTrace(object):
+    """
+    Records cost, relaxation product, relaxed constant names, GP size and
+    GP solve time for every GP of an SP solve into preallocated arrays.
+    No GP objects are kept, so traces can be saved and plotted offline.
+
+    Relaxed constant names are stored as indices into the names list, with
+    relaxed_ptr[i]:relaxed_ptr[i+1] slicing relaxed_ids for iteration i.
+    """
+    FIELDS = ['cost', 'relaxation', 'soltime']
+    COUNTS = ['stage', 'nrelaxed', 'nvars', 'nmonomials', 'nposynomials']
+
+    def __init__(self, size=64):
+        self.n = 0
+        for field in self.FIELDS:
+            setattr(self, field, np.full(size, np.nan))
+        for field in self.COUNTS:
+            setattr(self, field, np.zeros(size, dtype=int))
+        self.relaxed_ptr = np.zeros(size + 1, dtype=int)
+        self.relaxed_ids = np.zeros(0, dtype=int)
+        self.names = []
+        self._nameidx = {}
+
+    def __len__(self):
+        return self.n
+
+    def _grow(self):
+        "doubles the preallocated storage"
+        size = 2*len(self.cost)
+        for field in self.FIELDS + self.COUNTS:
+            old = getattr(self, field)
+            new = np.full(size, np.nan) if field in self.FIELDS else np.zeros(size, dtype=int)
+            new[:len(old)] = old
+            setattr(self, field, new)
+        ptr = np.zeros(size + 1, dtype=int)
+        ptr[:len(self.relaxed_ptr)] = self.relaxed_ptr
+        self.relaxed_ptr = ptr
+
+    def record_gp(self, gp, stage=0, result=None):
+        """
+        Appends one solved GP approximation to the trace
+
+        ARGUMENTS
+        ---------
+        gp: a solved GeometricProgram (an element of sol.program.gps)
+        stage: index of the tolerance stage the GP belongs to
+        result: the GP's result, if gp.result no longer holds it
+        """
+        if self.n == len(self.cost):
+            self._grow()
+        i = self.n
+        if result is None:
+            result = gp.result
+        relaxkeys = [k for k in gp.varlocs if "Relax" in (k.models or ())]
+        relaxvals = np.array([mag(result['freevariables'][k]) for k in relaxkeys])
+        ids = []
+        for k, val in zip(relaxkeys, relaxvals):
+            if val >= 1. + RELAXTOL:
+                name = relaxed_name(k)
+                if name not in self._nameidx:
+                    self._nameidx[name] = len(self.names)
+                    self.names.append(name)
+                ids.append(self._nameidx[name])
+
+        self.cost[i] = mag(result['cost'])
+        self.relaxation[i] = np.prod(relaxvals) if len(relaxvals) else 1.
+        self.soltime[i] = result.get('soltime', np.nan)
+        self.stage[i] = stage
+        self.nrelaxed[i] = len(ids)
+        self.nvars[i] = len(gp.varlocs)
+        self.nmonomials[i] = len(gp.cs)
+        self.nposynomials[i] = len(gp.k)
+        self.relaxed_ids = np.append(self.relaxed_ids, ids).astype(int)
+        self.relaxed_ptr[i+1] = len(self.relaxed_ids)
+        self.n += 1
+
+    def record_program(self, program, stage=0):
+        """
+        Appends every GP of a solved SignomialProgram (sol.program)
+
+        A mutategp=True solve mutates one GP object, so every entry of
+        program.gps holds the last GP's result; the per GP results gpkit
+        keeps in program.results are recorded instead. When those cannot
+        be matched to the GPs (a GP fell back to a feasibility solve) the
+        trace is optional, so it warns and records nothing.
+
+        RETURNS
+        -------
+        whether the program was recorded
+        """
+        gps = program.gps
+        if len(set(id(gp) for gp in gps)) == len(gps):
+            for gp in gps:
+                self.record_gp(gp, stage)
+            return True
+        results = getattr(program, 'results', None)
+        if results is None or len(results) != len(gps):
+            warnings.warn("cannot trace this mutategp=True solve GP by GP, leaving"
+                          " it out of the trace; solve with mutategp=False to trace it")
+            return False
+        for gp, result in zip(gps, results):
+            self.record_gp(gp, stage, result)
+        return True
+
+    def relaxed(self, i):
+        """
+        Returns the names of the constants relaxed in GP iteration i
+        """
+        ids = self.relaxed_ids[self.relaxed_ptr[i]:self.relaxed_ptr[i+1]]
+        return [self.names[j] for j in ids]
+
+    def to_dict(self):
+        """
+        Returns the trimmed arrays as a dictionary of lists (JSON friendly)
+        """
+        out = dict((field, getattr(self, field)[:self.n].tolist())
+                   for field in self.FIELDS + self.COUNTS)
+        out['relaxed_ptr'] = self.relaxed_ptr[:self.n+1].tolist()
+        out['relaxed_ids'] = self.relaxed_ids.tolist()
+        out['names'] = list(self.names)
+        return out
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a trace from the output of to_dict (or a loaded .npz)
+        """
+        n = len(data['cost'])
+        trace = cls(max(n, 1))
+        for field in cls.FIELDS + cls.COUNTS:
+            getattr(trace, field)[:n] = data[field]
+        trace.relaxed_ptr[:n+1] = data['relaxed_ptr']
+        trace.relaxed_ids = np.array(data['relaxed_ids'], dtype=int)
+        trace.names = [str(name) for name in data['names']]
+        trace._nameidx = dict((name, j) for j, name in enumerate(trace.names))
+        trace.n = n
+        return trace
+
+    def save(self, filename):
+        """
+        Saves the trace as a compressed .npz file
+        """
+        data = self.to_dict()
+        np.savez_compressed(filename, **dict((k, np.array(v)) for k, v in data.items()))
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Loads a trace saved with save
+        """
+        with np.load(filename) as data:
+            return cls.from_dict(dict((k, data[k]) for k in data.files))
+
+def relaxed_name(key):
+    """
+    Returns the name of the constant a relaxation variable belongs to
+    """
+    name = "%s_%s" % (key.name, ".".join(m for m in key.models if m != "Relax"))
+    if key.idx is not None:
+        name += str(list(key.idx))
+    return name
+
+def load_traces(filenames):
+    """
+    Loads many saved traces into a list
+    """
+    return [ConvergenceTrace.load(f) for f in filenames]
+
+def test():
+    "checks that mutated and fresh GP solves give the same per GP trace"
+    from gpkit import Variable, Model, SignomialsEnabled
+    x = Variable('x')
+    y = Variable('y')
+    with SignomialsEnabled():
+        constraints = [x >= 1 - y, y <= 0.1]
+    traces = []
+    for mutategp in [False, True]:
+        sol = Model(x, constraints).localsolve(verbosity=0, reltol=1e-6, mutategp=mutategp)
+        trace = ConvergenceTrace()
+        trace.record_program(sol.program)
+        traces.append(trace)
+    assert len(traces[0]) == len(traces[1]) > 2
+    assert np.allclose(traces[0].cost[:len(traces[0])], traces[1].cost[:len(traces[1])])
+    assert traces[1].cost[0] > 1.01*traces[1].cost[len(traces[1]) - 1]
+    assert np.all(np.isfinite(traces[1].soltime[:len(traces[1])]))
+
+    # a mutated GP that fell back to a feasibility solve has fewer results
+    # than GPs; it is left out of the trace with a warning, not an error
+    program = type('Program', (object,), {})()
+    gp = sol.program.gps[0]
+    program.gps, program.results = [gp, gp, object()], sol.program.results[:2]
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter('always')
+        assert not trace.record_program(program)
+    assert len(caught) == 1 and len(trace) == len(traces[1])
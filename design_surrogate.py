@@ -0,0 +1,197 @@
+"""
+Per configuration surrogate of optimal designs, trained from a result archive
+
+Records archived with their request substitutions and design parameters
+(see design_record) train one doe.Surrogate per output: the cost and each
+entry of Aircraft.design_parameters, over the substitution names seen in
+the archive. New records are added as solves finish and a background
+thread refits the surrogates, so predictions never wait for a fit.
+"""
+
+import threading
+from time import sleep
+import numpy as np
+from collections import OrderedDict
+
+from doe import Surrogate
+from solution_archive import solution_record, append_record, load_archive
+
+# records needed before predictions are made
+MIN_RECORDS = 4
+
+def design_record(m, sol, config, substitutions):
+    """
+    Returns an archive record of a solved Mission with the request
+    substitutions and the design parameter values in its metadata
+    """
+    from gpkit.small_scripts import mag
+    design = OrderedDict((name, float(np.sum(mag(sol(key)))))
+                         for name, key in m.aircraft.design_parameters.items())
+    return solution_record(sol, config, substitutions=dict(substitutions),
+                           design_parameters=design)
+
+def _input_value(value):
+    "returns a substitution as one float (the mean of a vector), NaN if not numeric"
+    try:
+        return float(np.mean(np.asarray(value, dtype=float)))
+    except (TypeError, ValueError):
+        return np.nan
+
+class DesignSurrogate(object):
+    """
+    Surrogate of the cost and design parameters of one configuration
+
+    ARGUMENTS
+    ---------
+    config: configuration name; archive records of other configurations are
+            ignored
+    filename: (optional) JSON lines archive to train from and append to
+    kind: surrogate kind, see doe.Surrogate
+    """
+    def __init__(self, config, filename=None, kind='rbf'):
+        self.config = config
+        self.filename = filename
+        self.kind = kind
+        self.records = []
+        self.surrogates = None
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()
+        if filename:
+            try:
+                records = load_archive(filename)
+            except IOError:
+                records = []
+            for record in records:
+                self.add_record(record, archive=False)
+            self.refit()
+
+    def add_record(self, record, archive=True):
+        "adds a solved design (see design_record) and marks the fit stale"
+        metadata = record.get('metadata', {})
+        if (record['config'] != self.config or 'design_parameters' not in metadata
+                or 'substitutions' not in metadata):
+            return
+        with self.lock:
+            self.records.append(record)
+        if archive and self.filename:
+            append_record(self.filename, record)
+        self.dirty.set()
+
+    def refit(self):
+        """
+        Refits every surrogate to the records so far; the fit is left as it
+        was until MIN_RECORDS records set every input (see inputs)
+        """
+        self.dirty.clear()
+        with self.lock:
+            records = list(self.records)
+        inputs = self.inputs(records)
+        X = np.array([[_input_value(r['metadata']['substitutions'].get(name))
+                       for name in inputs] for r in records], dtype=float).reshape(-1, len(inputs))
+        with np.errstate(invalid='ignore'):
+            complete = np.all(np.isfinite(X) & (X > 0), axis=1)
+        if not inputs or complete.sum() < MIN_RECORDS:
+            return
+        X = X[complete]
+        records = [r for r, ok in zip(records, complete) if ok]
+        factors = OrderedDict()
+        for j, name in enumerate(inputs):
+            low, high = X[:, j].min(), X[:, j].max()
+            if high <= low:
+                low, high = 0.9*low, 1.1*high
+            factors[name] = (low, high)
+        outputs = OrderedDict([('cost', [r['cost'] for r in records])])
+        for record in records:
+            for name in record['metadata']['design_parameters']:
+                outputs[name] = [r['metadata']['design_parameters'].get(name, np.nan)
+                                 for r in records]
+        surrogates = OrderedDict()
+        for name, y in outputs.items():
+            surrogate = Surrogate(factors, self.kind)
+            surrogate.add(X, np.abs(np.array(y, dtype=float)))
+            if len(surrogate) >= MIN_RECORDS:
+                surrogates[name] = surrogate.fit()
+        # swapped in whole, so predictions use a consistent fit
+        self.surrogates = surrogates
+
+    @staticmethod
+    def inputs(records):
+        """
+        Returns the substitution names the surrogates are fit over: those
+        with a positive numeric value in at least half the records, so a
+        few requests setting extra names do not leave too few records that
+        set every input
+        """
+        counts = OrderedDict()
+        for record in records:
+            for name, value in record['metadata']['substitutions'].items():
+                if _input_value(value) > 0:
+                    counts[name] = counts.get(name, 0) + 1
+        return sorted(name for name, count in counts.items() if 2*count >= len(records))
+
+    def predict(self, substitutions):
+        """
+        Estimates the optimum for a request
+
+        ARGUMENTS
+        ---------
+        substitutions: {name: value}; inputs the request does not set are
+                       taken at the middle of their archive range
+
+        RETURNS
+        -------
+        dictionary of cost, design_parameters {name: value} and uncertainty
+        (largest standard deviation of log output), None before MIN_RECORDS
+        designs that set every input are archived
+        """
+        surrogates = self.surrogates
+        if not surrogates or 'cost' not in surrogates:
+            return None
+        factors = list(surrogates.values())[0].factors
+        x = [[float(substitutions.get(name, np.sqrt(low*high)))
+              for name, (low, high) in factors.items()]]
+        out = {'design_parameters': OrderedDict(), 'uncertainty': 0.}
+        for name, surrogate in surrogates.items():
+            value, std = surrogate.predict(np.array(x))
+            if name == 'cost':
+                out['cost'] = float(value[0])
+            else:
+                out['design_parameters'][name] = float(value[0])
+            out['uncertainty'] = max(out['uncertainty'], float(std[0]))
+        return out
+
+    def start_refresher(self, interval=1.):
+        "starts a daemon thread refitting whenever new records arrived"
+        def refresh():
+            while True:
+                self.dirty.wait()
+                try:
+                    self.refit()
+                except Exception as error:
+                    print("surrogate refit failed: %s" % error)
+                sleep(interval)
+        thread = threading.Thread(target=refresh)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+def test():
+    "checks the refit guard and fitting records with differing inputs"
+    def record(R, npass, extra=None):
+        substitutions = {'R_{req}': R, 'n_{pass}': npass}
+        substitutions.update(extra or {})
+        return {'config': 'toy', 'cost': 10*R**0.8*npass**0.5, 'metadata': {
+            'substitutions': substitutions, 'design_parameters': {'S': 0.3*npass}}}
+    surrogate = DesignSurrogate('toy', kind='polynomial')
+    surrogate.add_record(record(3000., 180.), archive=False)
+    surrogate.add_record(record(2000., 150., {'M_{min}': 0.8}), archive=False)
+    surrogate.add_record({'config': 'other'}, archive=False)
+    surrogate.refit()
+    assert surrogate.predict({}) is None
+    for R, npass in [(2500., 200.), (3500., 140.), (4000., 210.), (1500., 120.)]:
+        surrogate.add_record(record(R, npass), archive=False)
+    surrogate.refit()
+    assert list(surrogate.surrogates['cost'].factors) == ['R_{req}', 'n_{pass}']
+    out = surrogate.predict({'R_{req}': 3000., 'n_{pass}': 160.})
+    assert abs(out['cost']/(10*3000.**0.8*160.**0.5) - 1) < 1e-3
+    assert abs(out['design_parameters']['S']/48. - 1) < 1e-3
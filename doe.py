@@ -0,0 +1,393 @@
+"""
+Design of experiments over Mission substitutions with incremental surrogates
+
+    python doe.py optimal737 128
+
+A Latin hypercube or Sobol design over selected substitutions is solved in
+a process pool (the batch_solve workers build the model once), and a
+surrogate of each output is refit as the solves come in. The surrogates
+work in log space on the inputs scaled to the design ranges:
+
+    monomial:   log y linear in log x, i.e. a monomial fit
+    polynomial: log y quadratic in log x
+    rbf:        monomial trend plus Gaussian RBF interpolation of the
+                residuals, with a kriging variance
+
+and return the standard deviation of log y (roughly the relative error)
+with every prediction, so refine_points can place the next solves where
+the surrogates are least certain.
+"""
+
+import numpy as np
+from collections import OrderedDict
+from multiprocessing import Pool
+
+from batch_solve import _init_sp_worker, _sp_worker
+
+# substitution: (low, high) of the default design, in the units of the
+# substitution files (737 class aircraft)
+FACTORS = OrderedDict([
+    ('R_{req}', (2000., 4000.)),
+    ('n_{pass}', (120., 220.)),
+    ('M_{min}', (0.72, 0.82)),
+    ('T_{t_{4.1_{max-Cruise}}}', (1050., 1200.)),
+    ('C_{wing}', (0.9, 1.1)),
+    ('C_{fuse}', (0.9, 1.1)),
+    ('C_{engsys}', (0.9, 1.1)),
+])
+
+# units the factors are given in, where they have units
+FACTOR_UNITS = {'R_{req}': 'nmi', 'T_{t_{4.1_{max-Cruise}}}': 'K'}
+
+# outputs a surrogate is fit to
+OUTPUTS = ['W_{f_{total}}', 'W_{total}', 'b', 'S', 'AR', 'l_{fuse}']
+
+# Sobol direction numbers (Joe and Kuo) for dimensions 2 and up: degree s,
+# polynomial coefficients a and initial direction numbers m
+SOBOL_DIRECTIONS = [
+    (1, 0, [1]),
+    (2, 1, [1, 3]),
+    (3, 1, [1, 3, 1]),
+    (3, 2, [1, 1, 1]),
+    (4, 1, [1, 1, 3, 3]),
+    (4, 4, [1, 3, 5, 13]),
+    (5, 2, [1, 1, 5, 5, 17]),
+    (5, 4, [1, 1, 5, 5, 5]),
+    (5, 7, [1, 1, 7, 11, 19]),
+    (5, 11, [1, 1, 5, 1, 1]),
+    (5, 13, [1, 1, 1, 3, 11]),
+]
+
+def latin_hypercube(n, d, seed=None):
+    "n Latin hypercube points in the unit cube [0, 1)^d"
+    rng = np.random.RandomState(seed)
+    u = np.empty((n, d))
+    for j in range(d):
+        u[:, j] = (rng.permutation(n) + rng.uniform(size=n))/n
+    return u
+
+def sobol(n, d, seed=None, bits=30):
+    """
+    First n points (after the origin) of the Sobol sequence in [0, 1)^d,
+    digitally shifted at random when a seed is given
+    """
+    if d > len(SOBOL_DIRECTIONS) + 1:
+        raise ValueError("Sobol directions are tabulated up to %i dimensions"
+                         % (len(SOBOL_DIRECTIONS) + 1))
+    V = np.zeros((d, bits), dtype=np.int64)
+    V[0] = 1 << (bits - 1 - np.arange(bits))
+    for j in range(1, d):
+        s, a, m = SOBOL_DIRECTIONS[j - 1]
+        for i in range(bits):
+            if i < s:
+                V[j, i] = m[i] << (bits - 1 - i)
+            else:
+                v = V[j, i - s] ^ (V[j, i - s] >> s)
+                for k in range(1, s):
+                    if (a >> (s - 1 - k)) & 1:
+                        v ^= V[j, i - k]
+                V[j, i] = v
+    x = np.zeros(d, dtype=np.int64)
+    points = np.empty((n, d), dtype=np.int64)
+    for i in range(n):
+        # gray code: flip the direction of the lowest zero bit of i
+        c = 0
+        while (i >> c) & 1:
+            c += 1
+        x ^= V[:, c]
+        points[i] = x
+    if seed is not None:
+        points ^= np.random.RandomState(seed).randint(0, 1 << bits, d).astype(np.int64)
+    return points/float(1 << bits)
+
+def scale(u, factors=FACTORS):
+    "maps unit cube points to {factor: values} over the factor ranges"
+    return OrderedDict((name, low + (high - low)*u[:, j])
+                       for j, (name, (low, high)) in enumerate(factors.items()))
+
+def design(n, factors=FACTORS, method='sobol', seed=None):
+    "returns a design of n points, {factor: values}"
+    if method == 'lhs':
+        u = latin_hypercube(n, len(factors), seed)
+    elif method == 'sobol':
+        u = sobol(n, len(factors), seed)
+    else:
+        raise ValueError("unknown design method %s" % method)
+    return scale(u, factors)
+
+class Surrogate(object):
+    """
+    Log space surrogate of one output over the design factors
+
+    Points are added with add; the monomial and polynomial kinds update
+    their normal equations incrementally, the rbf kind refits on the next
+    prediction. predict is vectorized over query points.
+    """
+    KINDS = ['monomial', 'polynomial', 'rbf']
+    LENGTHSCALES = [0.1, 0.2, 0.3, 0.5, 0.8, 1.2, 2.]
+
+    def __init__(self, factors=FACTORS, kind='rbf', nugget=1e-6):
+        if kind not in self.KINDS:
+            raise ValueError("unknown surrogate kind %s" % kind)
+        self.factors = OrderedDict(factors)
+        self.kind = kind
+        self.nugget = nugget
+        self.lower = np.log([low for low, _ in self.factors.values()])
+        self.upper = np.log([high for _, high in self.factors.values()])
+        self.u = np.zeros((0, len(self.factors)))
+        self.logy = np.zeros(0)
+        p = self.features(self.u).shape[1]
+        self.XtX = np.zeros((p, p))
+        self.Xty = np.zeros(p)
+        self.yty = 0.
+        self._fit = None
+
+    def __len__(self):
+        return len(self.logy)
+
+    def unit(self, X):
+        "scales {factor: values} (or an (n, d) array) to log unit coordinates"
+        if isinstance(X, dict):
+            X = np.column_stack([np.atleast_1d(X[name]) for name in self.factors])
+        return (np.log(np.atleast_2d(X)) - self.lower)/(self.upper - self.lower)
+
+    def features(self, u):
+        "regression features of unit coordinates"
+        columns = [np.ones(len(u)), u]
+        if self.kind == 'polynomial':
+            d = u.shape[1]
+            columns += [(u[:, i]*u[:, j])[:, None] for i in range(d) for j in range(i, d)]
+        return np.column_stack(columns)
+
+    def _trend_features(self, u):
+        return np.column_stack([np.ones(len(u)), u])
+
+    def add(self, X, y):
+        "adds solved points: X {factor: values} or (n, d) array, y outputs"
+        u = self.unit(X)
+        logy = np.log(np.atleast_1d(np.asarray(y, dtype=float)))
+        ok = np.isfinite(logy)
+        u, logy = u[ok], logy[ok]
+        self.u = np.vstack([self.u, u])
+        self.logy = np.concatenate([self.logy, logy])
+        if self.kind != 'rbf':
+            F = self.features(u)
+            self.XtX += np.dot(F.T, F)
+            self.Xty += np.dot(F.T, logy)
+            self.yty += np.dot(logy, logy)
+        self._fit = None
+
+    def _fit_regression(self):
+        p = len(self.Xty)
+        n = len(self.logy)
+        XtXinv = np.linalg.pinv(self.XtX + 1e-10*np.eye(p))
+        beta = np.dot(XtXinv, self.Xty)
+        sse = self.yty - 2*np.dot(beta, self.Xty) + np.dot(beta, np.dot(self.XtX, beta))
+        s2 = max(sse, 0.)/max(n - p, 1)
+        return {'beta': beta, 'XtXinv': XtXinv, 's2': s2}
+
+    def _kernel(self, ua, ub, lengthscale):
+        d2 = ((ua**2).sum(axis=1)[:, None] + (ub**2).sum(axis=1)[None, :]
+              - 2*np.dot(ua, ub.T))
+        return np.exp(-np.maximum(d2, 0.)/(2*lengthscale**2))
+
+    def _fit_rbf(self):
+        u, logy = self.u, self.logy
+        F = self._trend_features(u)
+        trend = np.linalg.lstsq(F, logy, rcond=None)[0]
+        r = logy - np.dot(F, trend)
+        best = None
+        for lengthscale in self.LENGTHSCALES:
+            K = self._kernel(u, u, lengthscale) + self.nugget*np.eye(len(u))
+            try:
+                Kinv = np.linalg.inv(K)
+            except np.linalg.LinAlgError:
+                continue
+            alpha = np.dot(Kinv, r)
+            # closed form leave one out residuals
+            loo = np.mean((alpha/np.diag(Kinv))**2)
+            if best is None or loo < best[0]:
+                best = (loo, lengthscale, Kinv, alpha)
+        _, lengthscale, Kinv, alpha = best
+        return {'trend': trend, 'lengthscale': lengthscale, 'Kinv': Kinv,
+                'alpha': alpha, 's2': np.dot(r, alpha)/len(r)}
+
+    def fit(self):
+        "fits the surrogate to the points added so far"
+        if len(self) == 0:
+            raise ValueError("the surrogate has no points")
+        if self.kind == 'rbf':
+            self._fit = self._fit_rbf()
+        else:
+            self._fit = self._fit_regression()
+        return self
+
+    def predict(self, X):
+        """
+        Predicts the output at query points
+
+        RETURNS
+        -------
+        (values, log_std): predicted outputs and the standard deviation of
+        their logs
+        """
+        if self._fit is None:
+            self.fit()
+        u = self.unit(X)
+        fit = self._fit
+        if self.kind == 'rbf':
+            k = self._kernel(u, self.u, fit['lengthscale'])
+            logy = np.dot(self._trend_features(u), fit['trend']) + np.dot(k, fit['alpha'])
+            var = fit['s2']*(1 + self.nugget - np.einsum('ij,jk,ik->i', k, fit['Kinv'], k))
+        else:
+            F = self.features(u)
+            logy = np.dot(F, fit['beta'])
+            var = fit['s2']*np.einsum('ij,jk,ik->i', F, fit['XtXinv'], F)
+        return np.exp(logy), np.sqrt(np.maximum(var, 0.))
+
+    def loo_error(self):
+        "RMS leave one out error of log y (rbf) or residual standard deviation"
+        if self._fit is None:
+            self.fit()
+        if self.kind == 'rbf':
+            fit = self._fit
+            return float(np.sqrt(np.mean((fit['alpha']/np.diag(fit['Kinv']))**2)))
+        return float(np.sqrt(self._fit['s2']))
+
+def refine_points(surrogates, n, factors=FACTORS, ncandidates=2000, seed=None):
+    """
+    Returns the n of ncandidates random points where the surrogates are
+    least certain (largest log standard deviation of any output)
+    """
+    u = np.random.RandomState(seed).uniform(size=(ncandidates, len(factors)))
+    candidates = scale(u, factors)
+    std = np.max([s.predict(candidates)[1] for s in surrogates.values()], axis=0)
+    best = np.argsort(-std)[:n]
+    return OrderedDict((name, values[best]) for name, values in candidates.items())
+
+def _jobs(points, factors, outputs):
+    from gpkit import units
+    names = list(factors)
+    n = len(points[names[0]])
+    return [(dict((name, points[name][i]*units(FACTOR_UNITS[name])
+                   if name in FACTOR_UNITS else points[name][i]) for name in names),
+             list(outputs)) for i in range(n)]
+
+def run_doe(config, n=64, factors=FACTORS, outputs=OUTPUTS, method='sobol', kind='rbf',
+            refine=0, update_every=16, processes=None, seed=0, Nclimb=3, Ncruise=2):
+    """
+    Solves a design over a production configuration, fitting a surrogate of
+    each output as the solves come in
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    n: number of design points
+    factors: {substitution: (low, high)}, see FACTORS
+    outputs: scalar variable names to fit
+    method: 'sobol' or 'lhs'
+    kind: surrogate kind, see Surrogate
+    refine: number of extra points placed by refine_points after the design
+    update_every: solved points between surrogate refits
+    processes: worker processes (default: cpu count, 1 for serial)
+
+    RETURNS
+    -------
+    dictionary with the surrogates {output: Surrogate}, the solved points
+    {factor: values}, outputs {name: values} and status of every point
+    """
+    factors = OrderedDict(factors)
+    surrogates = OrderedDict((name, Surrogate(factors, kind)) for name in outputs)
+    points = OrderedDict((name, []) for name in factors)
+    values = OrderedDict((name, []) for name in outputs)
+    status = []
+
+    if processes == 1:
+        pool = None
+        _init_sp_worker(config, Nclimb, Ncruise)
+    else:
+        pool = Pool(processes, _init_sp_worker, (config, Nclimb, Ncruise))
+
+    def solve(batch):
+        jobs = _jobs(batch, factors, outputs)
+        results = (pool.imap(_sp_worker, jobs) if pool is not None
+                   else (_sp_worker(job) for job in jobs))
+        pending = []
+        for i, result in enumerate(results):
+            status.append(result['status'])
+            if 'cost' not in result:
+                continue
+            pending.append(i)
+            for name in factors:
+                points[name].append(batch[name][i])
+            for name in outputs:
+                values[name].append(float(result['outputs'][name]))
+            if len(pending) == update_every:
+                _update(surrogates, batch, pending, values)
+                pending = []
+        if pending:
+            _update(surrogates, batch, pending, values)
+
+    try:
+        solve(design(n, factors, method, seed))
+        if refine:
+            solve(refine_points(surrogates, refine, factors, seed=seed))
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return {'surrogates': surrogates,
+            'points': OrderedDict((k, np.array(v)) for k, v in points.items()),
+            'outputs': OrderedDict((k, np.array(v)) for k, v in values.items()),
+            'status': status}
+
+def _update(surrogates, batch, pending, values):
+    "adds the pending points of a batch to every surrogate and refits"
+    X = dict((name, np.asarray(batch[name])[pending]) for name in batch)
+    for name, surrogate in surrogates.items():
+        surrogate.add(X, values[name][-len(pending):])
+        surrogate.fit()
+
+def test():
+    "checks the designs' stratification and the surrogates on a known monomial"
+    for seed in [None, 3]:
+        # under any digital shift, the 63 points after the origin put at
+        # most one point in every 1/64 of each axis (the origin fills the last)
+        u = sobol(63, 12, seed)
+        assert ((u >= 0) & (u < 1)).all()
+        assert all(len(set(np.floor(64*u[:, j]))) == 63 for j in range(12))
+    u = latin_hypercube(50, 3, seed=1)
+    assert all(sorted(np.floor(50*u[:, j])) == list(range(50)) for j in range(3))
+    factors = OrderedDict([('x', (1., 4.)), ('y', (10., 20.))])
+    X = design(32, factors, seed=0)
+    assert (X['x'] >= 1).all() and (X['x'] < 4).all() and (X['y'] >= 10).all()
+
+    law = lambda X: 3.*X['x']**1.5*X['y']**-0.5
+    query = design(16, factors, 'lhs', seed=2)
+    for kind in Surrogate.KINDS:
+        surrogate = Surrogate(factors, kind)
+        for i in range(0, 32, 8):
+            batch = OrderedDict((name, v[i:i+8]) for name, v in X.items())
+            surrogate.add(batch, law(batch))
+        y, std = surrogate.predict(query)
+        assert np.allclose(y, law(query), rtol=1e-3), kind
+        assert std.shape == y.shape and (std >= 0).all()
+    # away from its points the rbf kind is less certain
+    surrogate = Surrogate(factors, 'rbf')
+    surrogate.add(X, law(X)*np.exp(0.05*np.sin(7*X['x'])))
+    near = surrogate.predict(OrderedDict((name, v[:1]) for name, v in X.items()))[1]
+    far = surrogate.predict(OrderedDict([('x', [4.]), ('y', [10.])]))[1]
+    assert near[0] < far[0]
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+    config = sys.argv[1] if len(sys.argv) > 1 else 'optimal737'
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    result = run_doe(config, n)
+    query = design(10000, method='lhs', seed=1)
+    for name, surrogate in result['surrogates'].items():
+        starttime = time()
+        surrogate.predict(query)
+        print("%-16s LOO error %.2e, %.0f predictions/s" % (
+            name, surrogate.loo_error(), 10000/(time() - starttime)))
@@ -0,0 +1,320 @@
+"""
+Aircraft family optimization with shared component sizing
+
+    python family.py optimal737
+
+The variants of a family fly their own missions with their own fuselage
+(sized by their passenger count), but share the sizing of the components
+in SHARED: the same wing, tails and engine on every airframe. Shared
+weights are linked too, so each shared structure is as heavy as its most
+demanding variant needs. The family is solved either
+
+    monolithically: one SP over every variant with monomial equalities
+                    linking the shared variables, or
+    decomposed:     one subproblem per variant, solved in parallel, each
+                    penalized by v/z + z/v for every shared variable v
+                    against a common target z. After each round the
+                    targets move to the geometric mean over variants and
+                    the penalty weight grows, until the variants agree.
+
+compare_family benchmarks both against solving every variant on its own.
+"""
+
+import sys
+import numpy as np
+from time import time
+from collections import OrderedDict
+from multiprocessing import Pool
+
+from gpkit import Model, Variable, units
+from gpkit.constraints.bounded import Bounded as BCS
+from gpkit.small_scripts import mag
+
+from relaxed_constants import relaxed_constants
+
+# component: (Aircraft attribute, variables shared across the family)
+SHARED = OrderedDict([
+    ('wing', ('wing', ['S', 'b', 'c_{root}', 'c_{tip}', '\\tan(\\Lambda)', 'W_{wing}'])),
+    ('ht', ('HT', ['S_{ht}', 'b_{ht}', 'c_{root_{ht}}', 'c_{tip_{ht}}', 'W_{ht}'])),
+    ('vt', ('VT', ['S_{vt}', 'b_{vt}', 'c_{root_{vt}}', 'c_{tip_{vt}}', 'W_{vt}'])),
+    ('engine', ('engine', ['d_{f}', 'W_{engine}'])),
+])
+
+# a 737 class family: passengers and design range [nmi] of each variant
+VARIANTS = [
+    {'name': 'short', 'n_{pass}': 140., 'R_{req}': 3000.},
+    {'name': 'baseline', 'n_{pass}': 180., 'R_{req}': 3000.},
+    {'name': 'stretch', 'n_{pass}': 210., 'R_{req}': 2500.},
+]
+
+def build_variant(config, variant, Nclimb=3, Ncruise=2):
+    """
+    Builds a family variant with its substitutions applied
+
+    RETURNS
+    -------
+    Mission with fuel burn objective
+    """
+    from SPaircraft import build_mission, configure_aircraft
+    m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise)
+    substitutions.update({'n_{pass}': variant['n_{pass}'],
+                          'R_{req}': variant['R_{req}']*units('nmi')})
+    substitutions.update(variant.get('substitutions', {}))
+    configure_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    return m
+
+def shared_variables(m, components=SHARED):
+    "returns {'component:name': variable} of a variant's shared variables"
+    out = OrderedDict()
+    for component in components:
+        attribute, names = SHARED[component]
+        submodel = getattr(m.aircraft, attribute)
+        for name in names:
+            out["%s:%s" % (component, name)] = submodel[name]
+    return out
+
+def _unitstr(expr):
+    u = getattr(expr, 'units', None)
+    return str(getattr(u, 'units', u)) if u is not None else "-"
+
+def _value(sol, expr, unitstr):
+    value = sol(expr)
+    if unitstr != "-" and hasattr(value, 'to'):
+        value = value.to(unitstr)
+    return float(np.sum(mag(value)))
+
+def family_model(config, variants=VARIANTS, components=SHARED, Nclimb=3, Ncruise=2):
+    """
+    Builds the monolithic family model: total fuel burn of every variant,
+    with the shared variables linked
+
+    RETURNS
+    -------
+    (relaxed model, list of variant Missions)
+    """
+    models = [build_variant(config, v, Nclimb, Ncruise) for v in variants]
+    shared = [shared_variables(m, components) for m in models]
+    links = [s[label] == shared[0][label] for s in shared[1:] for label in s]
+    cost = sum(m.cost for m in models)
+    return relaxed_constants(Model(cost, BCS([models, links]))), models
+
+def _result(sol, models, variants, components, soltime):
+    shared = [shared_variables(m, components) for m in models]
+    return {'time': soltime, 'sp_iterations': len(sol.program.gps),
+            'W_{f_{total}}': OrderedDict((v['name'], _value(sol, m.cost, 'lbf'))
+                                         for v, m in zip(variants, models)),
+            'shared': [OrderedDict((label, _value(sol, expr, _unitstr(expr)))
+                                   for label, expr in s.items()) for s in shared]}
+
+def solve_monolithic(config, variants=VARIANTS, components=SHARED, Nclimb=3, Ncruise=2):
+    """
+    Solves the family as one SP
+
+    RETURNS
+    -------
+    dictionary of solve time [s], SP iterations, W_{f_{total}} [lbf] per
+    variant and the shared variable values of every variant
+    """
+    model, models = family_model(config, variants, components, Nclimb, Ncruise)
+    starttime = time()
+    sol = model.localsolve(verbosity=0, iteration_limit=200, reltol=0.01)
+    return _result(sol, models, variants, components, time() - starttime)
+
+# penalty weight of the first, uncoordinated round (a zero coefficient
+# would drop out of the posynomial)
+UNCOORDINATED = 1e-30
+
+_STATE = {}
+
+def _subproblem(config, variant, components, Nclimb, Ncruise):
+    """
+    Builds a variant with its cost penalized by mu*W_ref*sum(v/z + z/v)
+    over the shared variables, z, mu and W_ref being constants that are
+    not relaxed
+    """
+    m = build_variant(config, variant, Nclimb, Ncruise)
+    shared = shared_variables(m, components)
+    mu = Variable('\\mu_{family}', UNCOORDINATED, '-', 'Family coordination penalty weight')
+    Wref = Variable('W_{ref_{family}}', 1., 'lbf', 'Family penalty reference weight')
+    targets = OrderedDict()
+    penalty = 0
+    for label, expr in shared.items():
+        z = targets[label] = Variable('z_{%s}' % label, 1., _unitstr(expr),
+                                      'Family target of %s' % label)
+        penalty = penalty + expr/z + z/expr
+    exclude = [mu.key.name, Wref.key.name] + [z.key.name for z in targets.values()]
+    model = relaxed_constants(Model(m.cost + mu*Wref*penalty, BCS(m)), exclude=exclude)
+    return model, m, shared, targets, mu, Wref
+
+def _solve_subproblem(job):
+    """
+    Solves one variant subproblem for given targets and penalty weight,
+    warm started from the worker's last solution of that variant
+    """
+    i, config, variant, components, Nclimb, Ncruise, targets, mu, Wref = job
+    if i not in _STATE:
+        _STATE[i] = {'problem': _subproblem(config, variant, components, Nclimb, Ncruise),
+                     'x0': None}
+    model, m, shared, zvars, muvar, Wrefvar = _STATE[i]['problem']
+    model.substitutions.update({muvar: mu, Wrefvar: Wref})
+    model.substitutions.update(dict((zvars[label], value) for label, value in targets.items()))
+    starttime = time()
+    try:
+        sol = model.localsolve(verbosity=0, iteration_limit=200, reltol=0.01,
+                               x0=_STATE[i]['x0'])
+    except Exception as error:
+        return {'status': 'error: %s' % error}
+    _STATE[i]['x0'] = sol['freevariables']
+    return {'status': 'optimal', 'time': time() - starttime,
+            'sp_iterations': len(sol.program.gps),
+            'W_{f_{total}}': _value(sol, m.cost, 'lbf'),
+            'shared': OrderedDict((label, _value(sol, expr, _unitstr(expr)))
+                                  for label, expr in shared.items())}
+
+def coordinate(results, mu, rounds, mu0=1e-3, growth=4.):
+    """
+    Coordination update after a round of variant subproblems
+
+    ARGUMENTS
+    ---------
+    results: subproblem result of each variant, with its shared values and
+             W_{f_{total}}
+    mu: penalty weight of the round
+    rounds: number of the round, from 1
+
+    RETURNS
+    -------
+    spread: largest relative spread (max/min - 1) of any shared variable
+            across variants
+    targets: {label: geometric mean over variants} for the next round
+    Wref: mean fuel burn of the variants, the next penalty reference weight
+    mu: penalty weight of the next round
+    """
+    labels = list(results[0]['shared'])
+    values = np.array([[r['shared'][label] for label in labels] for r in results])
+    spread = float(np.max(values.max(axis=0)/values.min(axis=0) - 1))
+    targets = dict(zip(labels, np.exp(np.log(values).mean(axis=0))))
+    Wref = float(np.mean([r['W_{f_{total}}'] for r in results]))
+    return spread, targets, Wref, (mu0 if rounds == 1 else mu*growth)
+
+def solve_decomposed(config, variants=VARIANTS, components=SHARED, mu0=1e-3, growth=4.,
+                     rtol=0.005, max_rounds=12, Nclimb=3, Ncruise=2):
+    """
+    Solves the family by coordinating parallel variant subproblems, each
+    variant in its own worker process so its model and warm start persist
+    between rounds
+
+    ARGUMENTS
+    ---------
+    mu0: penalty weight of the first coordinated round
+    growth: factor the penalty weight grows by each round
+    rtol: largest relative spread of any shared variable across variants
+          at convergence
+
+    RETURNS
+    -------
+    dictionary like solve_monolithic, with the rounds, the total and the
+    critical path (slowest subproblem of each round) solve time [s] and
+    the final spread
+    """
+    pools = [Pool(1) for _ in variants]
+    starttime = time()
+    targets = {}
+    mu, Wref = UNCOORDINATED, 1.
+    critical = 0.
+    try:
+        for rounds in range(1, max_rounds + 1):
+            jobs = [pool.apply_async(_solve_subproblem, [(i, config, v, components, Nclimb,
+                                                          Ncruise, targets, mu, Wref)])
+                    for i, (pool, v) in enumerate(zip(pools, variants))]
+            results = [job.get() for job in jobs]
+            failed = [v['name'] for v, r in zip(variants, results) if r['status'] != 'optimal']
+            if failed:
+                raise RuntimeError("variant subproblems failed: %s" % ", ".join(failed))
+            critical += max(r['time'] for r in results)
+            spread, nexttargets, nextWref, nextmu = coordinate(results, mu, rounds,
+                                                               mu0, growth)
+            if rounds > 1 and spread < rtol:
+                break
+            targets, Wref, mu = nexttargets, nextWref, nextmu
+    finally:
+        for pool in pools:
+            pool.close()
+            pool.join()
+    return {'time': time() - starttime, 'critical_path_time': critical, 'rounds': rounds,
+            'spread': spread, 'sp_iterations': sum(r['sp_iterations'] for r in results),
+            'W_{f_{total}}': OrderedDict((v['name'], r['W_{f_{total}}'])
+                                         for v, r in zip(variants, results)),
+            'shared': [r['shared'] for r in results]}
+
+def _solve_alone(job):
+    config, variant, Nclimb, Ncruise = job
+    m = build_variant(config, variant, Nclimb, Ncruise)
+    starttime = time()
+    sol = relaxed_constants(Model(m.cost, BCS(m))).localsolve(
+        verbosity=0, iteration_limit=200, reltol=0.01)
+    return {'time': time() - starttime, 'W_{f_{total}}': _value(sol, m.cost, 'lbf')}
+
+def compare_family(config, variants=VARIANTS, components=SHARED, processes=None,
+                   Nclimb=3, Ncruise=2):
+    """
+    Benchmarks the monolithic and decomposed family solves against solving
+    every variant on its own (the fuel burn a family gives up for
+    commonality)
+
+    RETURNS
+    -------
+    dictionary of the individual, monolithic and decomposed results
+    """
+    pool = Pool(processes or len(variants))
+    try:
+        alone = pool.map(_solve_alone, [(config, v, Nclimb, Ncruise) for v in variants])
+    finally:
+        pool.close()
+        pool.join()
+    out = {'individual': alone,
+           'monolithic': solve_monolithic(config, variants, components, Nclimb, Ncruise),
+           'decomposed': solve_decomposed(config, variants, components,
+                                          Nclimb=Nclimb, Ncruise=Ncruise)}
+    print("%-10s %14s %14s %14s" % ("variant", "alone [lbf]", "monolithic", "decomposed"))
+    for v, a in zip(variants, alone):
+        print("%-10s %14.0f %14.0f %14.0f" % (
+            v['name'], a['W_{f_{total}}'], out['monolithic']['W_{f_{total}}'][v['name']],
+            out['decomposed']['W_{f_{total}}'][v['name']]))
+    print("solve time: alone %.1f s (sum), monolithic %.1f s, decomposed %.1f s "
+          "(%i rounds, %.1f s critical path, spread %.2e)" % (
+              sum(a['time'] for a in alone), out['monolithic']['time'],
+              out['decomposed']['time'], out['decomposed']['rounds'],
+              out['decomposed']['critical_path_time'], out['decomposed']['spread']))
+    return out
+
+def test():
+    "checks the coordination update and the shared variables of a built variant"
+    results = [{'shared': OrderedDict([('wing:S', 100.), ('engine:d_{f}', 2.)]),
+                'W_{f_{total}}': 3e4},
+               {'shared': OrderedDict([('wing:S', 400.), ('engine:d_{f}', 2.)]),
+                'W_{f_{total}}': 5e4}]
+    spread, targets, Wref, mu = coordinate(results, UNCOORDINATED, 1, mu0=1e-3, growth=4.)
+    assert np.isclose(spread, 3.)
+    assert np.isclose(targets['wing:S'], 200.) and np.isclose(targets['engine:d_{f}'], 2.)
+    assert Wref == 4e4 and mu == 1e-3
+    # the penalty weight grows by the growth factor every later round
+    for rounds in range(2, 5):
+        _, _, _, mu = coordinate(results, mu, rounds, mu0=1e-3, growth=4.)
+        assert np.isclose(mu, 1e-3*4.**(rounds - 1))
+    # variants that agree have no spread and keep their values as targets
+    spread, targets, _, _ = coordinate(results[:1]*3, mu, 5)
+    assert spread == 0. and np.isclose(targets['wing:S'], 100.)
+
+    m = build_variant('optimal737', VARIANTS[0])
+    shared = shared_variables(m)
+    assert list(shared) == ["%s:%s" % (component, name)
+                            for component, (_, names) in SHARED.items() for name in names]
+    for label, expr in shared.items():
+        component, name = label.split(":", 1)
+        assert expr.key.name == name
+        assert expr.key in getattr(m.aircraft, SHARED[component][0]).varkeys
+    assert list(shared_variables(m, ['engine'])) == ['engine:d_{f}', 'engine:W_{engine}']
+
+if __name__ == "__main__":
+    compare_family(sys.argv[1] if len(sys.argv) > 1 else 'optimal737')
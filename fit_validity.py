@@ -0,0 +1,427 @@
+"""
+Checks that solved designs stay inside the training domain of the drag fits
+"""
+
+import os
+import sys
+import numpy as np
+from gpkit.small_scripts import mag
+
+from fits import load_fit, evaluate_fit, ACTIVE
+
+# where each fit input comes from in a solution:
+#   input name: ([(variable name, model name), ...], scale)
+# the input is the product of the variables times scale, broadcast over the
+# flight segments of the performance model
+FIT_INPUTS = {
+    'wing_cdp': {
+        'Re/1000': ([('Re_w', 'WingPerformance')], 1./1000),
+        'tau': ([('\\tau', 'WingNoStruct')], 1.),
+        'cos(Lambda)M': ([('\\cos(\\Lambda)', 'WingNoStruct'), ('M', 'FlightState')], 1.),
+        'CL': ([('C_{L}', 'WingPerformance')], 1.),
+    },
+    'ht_cd0': {
+        'Re': ([('Re_{c_h}', 'HorizontalTailPerformance')], 1.),
+        'tau': ([('\\tau_{ht}', 'HorizontalTailNoStruct')], 1.),
+        'M': ([('M', 'FlightState')], 1.),
+    },
+    'vt_cdvis': {
+        'Re': ([('Re_{vt}', 'VerticalTailPerformance')], 1.),
+        'tau': ([('\\tau_{vt}', 'VerticalTailNoStruct')], 1.),
+        'M': ([('M', 'FlightState')], 1.),
+    },
+}
+
+# polar data each fit was trained on (or, for fits whose training data is
+# not recorded, the data of their slot they are checked against):
+#   (directory, template, thickness range, Re range [k], M range, tau scale,
+#    {fit input: (polar dataset column, scale to the fit's input units)},
+#    polar column of the output)
+# polar dataset columns are tau, Re, M, CL, CD (see model_fitting/xfoil_polars.py)
+WING_C_SERIES = (os.path.join("model_fitting", "Wing_Fits"), "blade.c%s.Re%dk.M%s.pol",
+                 ["100", "110", "120", "130", "140", "145"], range(10000, 35000, 5000),
+                 [0.4, 0.5, 0.6, 0.7, 0.8, 0.9], 1./1000)
+TASOPT_TAIL = (os.path.join("model_fitting", "Tail Fits"), "blade.t%s.cl0.Re%dk.M%s.pol",
+               ["100", "120", "140"], range(500, 9500, 500), [0.4, 0.6, 0.8])
+NACA_TAIL = (os.path.join("model_fitting", "Tail Fits"), "naca%s.cl0.Re%dk.M%s.pol",
+             ["0008", "0009", "0010", "0015", "0020"], range(500, 9500, 500), [0.4, 0.6, 0.8])
+FIT_POLARS = {
+    'wing_cdp_v0': WING_C_SERIES + ({'CL': (3, 1.), 'cos(Lambda)M': (2, 1.)}, 4),
+    'wing_cdp_v1': WING_C_SERIES + ({'Re/1000': (1, 1.), 'tau': (0, 1.),
+                                     'cos(Lambda)M': (2, 1.), 'CL': (3, 1.)}, 4),
+    # the thesis tail fits take Re and tau as the models do
+    'ht_cd0_v0': TASOPT_TAIL + (1./1000, {'tau': (0, 1.), 'Re': (1, 1000.)}, 4),
+    'vt_cdvis_v0': NACA_TAIL + (1./100, {'tau': (0, 1.), 'Re': (1, 1000.)}, 4),
+    # the TASOPT and NACA tail fits were trained on Re in thousands and the
+    # thickness as named in the polar files (100 for blade.t100, 8 for naca0008),
+    # see TRAINING_SCALE
+    'ht_cd0_v1': TASOPT_TAIL + (1., {'Re': (1, 1.), 'tau': (0, 1.), 'M': (2, 1.)}, 4),
+    'vt_cdvis_v1': NACA_TAIL + (1., {'Re': (1, 1.), 'tau': (0, 1.), 'M': (2, 1.)}, 4),
+}
+
+# factor from each input as the models pass it to the units the fit was
+# trained in, for fits trained on differently scaled inputs (see FIT_POLARS);
+# operating points are checked against the training data in those units
+TRAINING_SCALE = {
+    'ht_cd0_v1': {'Re': 1./1000, 'tau': 1000.},
+    'vt_cdvis_v1': {'Re': 1./1000, 'tau': 100.},
+}
+
+# points further outside the domain than this (in log space) are flagged
+LOGTOL = 1e-3
+
+def solution_value(sol, name, model=None):
+    """
+    Returns the magnitude of a (vector) variable of a solution, by name and
+    the name of one of its models
+    """
+    matches = [k for k in sol['variables']
+               if k.name == name and getattr(k, 'idx', None) is None
+               and (model is None or model in k.models)]
+    if not matches:
+        raise KeyError("%s (%s) is not in the solution" % (name, model))
+    # the largest match is the vectorized (per segment) one
+    values = [np.asarray(mag(sol['variables'][k]), dtype=float) for k in matches]
+    return max(values, key=np.size)
+
+def operating_points(sol, slot):
+    """
+    Returns the fit input values at every flight segment of a solution
+
+    RETURNS
+    -------
+    dictionary of fit input name to flat array of segment values
+    """
+    fit = load_fit(slot)
+    values = {}
+    for name in fit.INPUTS:
+        variables, scale = FIT_INPUTS[slot][name]
+        value = scale
+        for varname, model in variables:
+            value = value*solution_value(sol, varname, model)
+        values[name] = value
+    shape = np.broadcast(*[np.empty(np.shape(v)) for v in values.values()]).shape
+    return dict((name, np.broadcast_to(v, shape).ravel())
+                for name, v in values.items())
+
+def training_points(points, name):
+    "converts (npoints, ninputs) model inputs of a fit to its training units"
+    name = ACTIVE.get(name, name)
+    scale = TRAINING_SCALE.get(name, {})
+    return points*np.array([scale.get(i, 1.) for i in load_fit(name).INPUTS])
+
+def stack_points(sols, slot):
+    """
+    Stacks the operating points of many solutions into one array
+
+    RETURNS
+    -------
+    points: (npoints, ninputs) array in fit.INPUTS column order
+    design: index into sols of each point
+    segment: index of each point within its design
+    """
+    fit = load_fit(slot)
+    points, design, segment = [], [], []
+    for i, sol in enumerate(sols):
+        ops = operating_points(sol, slot)
+        n = len(ops[fit.INPUTS[0]])
+        points.append(np.column_stack([ops[name] for name in fit.INPUTS]))
+        design.append(np.full(n, i, dtype=int))
+        segment.append(np.arange(n))
+    if not points:
+        return np.zeros((0, len(fit.INPUTS))), np.zeros(0, int), np.zeros(0, int)
+    return np.vstack(points), np.concatenate(design), np.concatenate(segment)
+
+def data_hull(logpoints):
+    """
+    Returns the convex hull of training points as halfspaces A*x + b <= 0
+
+    Uses scipy when it is installed and falls back to the bounding box.
+
+    ARGUMENTS
+    ---------
+    logpoints: (npoints, ninputs) array of log training inputs
+    """
+    logpoints = np.asarray(logpoints, dtype=float)
+    try:
+        from scipy.spatial import ConvexHull
+        # one equation per simplex; coplanar simplices share a facet
+        equations = np.unique(np.round(ConvexHull(logpoints).equations, 12), axis=0) + 0.
+        return equations[:, :-1], equations[:, -1]
+    except Exception:
+        # no scipy, or degenerate (e.g. gridded in fewer dimensions) data
+        return box_domain(logpoints.min(axis=0), logpoints.max(axis=0))
+
+def box_domain(lo, hi):
+    "returns the halfspaces of the box lo <= x <= hi"
+    n = len(lo)
+    A = np.vstack([-np.eye(n), np.eye(n)])
+    b = np.concatenate([np.asarray(lo, dtype=float), -np.asarray(hi, dtype=float)])
+    return A, b
+
+def fit_domain(fit):
+    """
+    Returns the stored training domain of a fit in log space
+
+    RETURNS
+    -------
+    A, b: halfspaces A*log(u) + b <= 0, from HULL_A/HULL_B if the fit has
+          them, else from RANGES; inputs without a recorded range are not
+          constrained. None if nothing is recorded.
+    """
+    if getattr(fit, 'HULL_A', None) is not None:
+        return np.array(fit.HULL_A, dtype=float), np.array(fit.HULL_B, dtype=float)
+    rows, b = [], []
+    for j, name in enumerate(fit.INPUTS):
+        if fit.RANGES.get(name) is None:
+            continue
+        lo, hi = np.log(fit.RANGES[name])
+        row = np.zeros(len(fit.INPUTS))
+        row[j] = -1.
+        rows.append(row)
+        b.append(lo)
+        row = np.zeros(len(fit.INPUTS))
+        row[j] = 1.
+        rows.append(row)
+        b.append(-hi)
+    if not rows:
+        return None
+    return np.array(rows), np.array(b)
+
+def polar_data(name, root=None):
+    """
+    Returns the polar data a fit was trained on (see FIT_POLARS) as
+    (inputs, output) arrays in fit.INPUTS column order and the fit's input
+    units, or None if the fit has no polars
+
+    ARGUMENTS
+    ---------
+    name: slot name (the ACTIVE fit) or fit module name
+    """
+    name = ACTIVE.get(name, name)
+    if name not in FIT_POLARS:
+        return None
+    if root is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(os.path.join(root, "model_fitting"))
+    from xfoil_polars import polar_dataset
+    directory, template, thick, re, M, tau_scale, columns, output = FIT_POLARS[name]
+    data = polar_dataset(template, thick, re, M, tau_scale,
+                         directory=os.path.join(root, directory))
+    fit = load_fit(name)
+    inputs = np.column_stack([data[:, columns[i][0]]*columns[i][1] for i in fit.INPUTS])
+    # unconverged polars have no points, but drop any zero (e.g. CL) the logs cannot take
+    ok = np.all(inputs > 0, axis=1) & (data[:, output] > 0)
+    return inputs[ok], np.asarray(data[ok, output])
+
+def training_domain(name, root=None):
+    """
+    Returns the training ranges and log space hull of a fit's polar data
+
+    RETURNS
+    -------
+    ranges: {input: (min, max)}
+    hull: (A, b), see data_hull
+    """
+    fit = load_fit(name)
+    inputs, _ = polar_data(name, root)
+    ranges = dict((i, (float(inputs[:, j].min()), float(inputs[:, j].max())))
+                  for j, i in enumerate(fit.INPUTS))
+    return ranges, data_hull(np.log(inputs))
+
+def store_domains(names=None, root=None):
+    """
+    Rewrites fit modules with the training ranges and hull of their polars
+    (see FIT_POLARS), through model_fitting/fit_codegen.py
+    """
+    if root is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+    sys.path.append(os.path.join(root, "model_fitting"))
+    from fit_codegen import rewrite_fit
+    for name in names or sorted(FIT_POLARS):
+        ranges, hull = training_domain(name, root)
+        rewrite_fit(name, ranges=ranges, hull=hull)
+
+def nearest(points, data, k=1, chunk=2048):
+    """
+    Finds the k nearest data points to each point, in log space normalized
+    by the data spread
+
+    RETURNS
+    -------
+    index of the nearest data point(s), distance(s) to it; (npoints, k)
+    arrays for k > 1
+    """
+    logdata = np.log(data)
+    scale = logdata.std(axis=0)
+    scale[scale == 0] = 1.
+    logdata = logdata/scale
+    logpoints = np.log(points)/scale
+    try:
+        from scipy.spatial import cKDTree
+        dist, idx = cKDTree(logdata).query(logpoints, k)
+        return idx, dist
+    except ImportError:
+        pass
+    idx = np.zeros((len(points), k), dtype=int)
+    dist = np.zeros((len(points), k))
+    datanorm = (logdata**2).sum(axis=1)
+    for i in range(0, len(points), chunk):
+        block = logpoints[i:i+chunk]
+        d2 = ((block**2).sum(axis=1)[:, None] + datanorm[None, :]
+              - 2*np.dot(block, logdata.T))
+        part = np.argsort(d2, axis=1)[:, :k]
+        idx[i:i+chunk] = part
+        dist[i:i+chunk] = np.sqrt(np.maximum(d2[np.arange(len(block))[:, None], part], 0))
+    if k == 1:
+        return idx[:, 0], dist[:, 0]
+    return idx, dist
+
+def interpolate(points, data, y, k=None, ridge=1e-6):
+    """
+    Estimates the data output at each point by a distance weighted, local
+    linear fit of log(y) over log(data) to the k nearest data points
+
+    RETURNS
+    -------
+    estimated output at each point
+    """
+    d = data.shape[1]
+    if k is None:
+        k = min(len(data), 3*(d + 1))
+    idx, dist = nearest(points, data, k)
+    idx, dist = idx.reshape(len(points), k), dist.reshape(len(points), k)
+    X = np.concatenate([np.ones((len(points), k, 1)),
+                        np.log(data)[idx] - np.log(points)[:, None, :]], axis=2)
+    w = 1./(dist + 1e-3*(dist.max(axis=1, keepdims=True) + 1e-12))
+    XtW = X.transpose(0, 2, 1)*w[:, None, :]
+    XtWX = np.einsum('nik,nkj->nij', XtW, X) + ridge*np.eye(d + 1)
+    XtWy = np.einsum('nik,nk->ni', XtW, np.log(y)[idx])
+    # the intercept of the local fit centered on each point is log(y) there
+    return np.exp(np.linalg.solve(XtWX, XtWy[:, :, None])[:, 0, 0])
+
+def check_slot(sols, slot, logtol=LOGTOL, residuals=True):
+    """
+    Checks the operating points of many solutions against one fit
+
+    RETURNS
+    -------
+    dictionary of arrays over all operating points:
+        points, design, segment: see stack_points
+        violation: largest halfspace violation in log space (<= 0 inside),
+                   of the points in the fit's training units
+        extrapolated: violation > logtol
+        fit: fitted output at the point, as the model evaluates it
+        nearest_distance: normalized log distance to the nearest polar point
+        residual: log(fit/data) at the point, the data interpolated from the
+                  nearest polar points (see interpolate); NaN where
+                  extrapolated, as the interpolation only holds in the data
+    """
+    fit = load_fit(slot)
+    points, design, segment = stack_points(sols, slot)
+    trained = training_points(points, slot)
+    out = {'fit_name': ACTIVE.get(slot, slot), 'inputs': list(fit.INPUTS),
+           'points': points, 'design': design, 'segment': segment}
+    domain = fit_domain(fit)
+    if domain is None or not len(points):
+        out['violation'] = np.full(len(points), np.nan)
+        out['extrapolated'] = np.zeros(len(points), dtype=bool)
+    else:
+        A, b = domain
+        out['violation'] = (np.dot(np.log(trained), A.T) + b).max(axis=1)
+        out['extrapolated'] = out['violation'] > logtol
+    out['fit'] = (evaluate_fit(fit, dict(zip(fit.INPUTS, points.T)))
+                  if len(points) else np.zeros(0))
+
+    polars = polar_data(slot) if residuals else None
+    if polars is None or not len(points):
+        out['nearest_distance'] = np.full(len(points), np.nan)
+        out['residual'] = np.full(len(points), np.nan)
+    else:
+        data, y = polars
+        _, dist = nearest(trained, data)
+        out['nearest_distance'] = dist
+        out['residual'] = np.full(len(points), np.nan)
+        inside = ~out['extrapolated']
+        if inside.any():
+            out['residual'][inside] = np.log(out['fit'][inside]
+                                             /interpolate(trained[inside], data, y))
+    return out
+
+def check_fits(sols, slots=None, logtol=LOGTOL, residuals=True):
+    """
+    Checks solved designs against the training domains of the drag fits
+
+    ARGUMENTS
+    ---------
+    sols: solution or list of solutions
+    slots: fit slots to check (default: all slots with known inputs)
+    logtol: allowed distance outside the domain in log space
+    residuals: also compare the fit against the polar data
+
+    RETURNS
+    -------
+    dictionary of slot to the check_slot result
+    """
+    if not isinstance(sols, (list, tuple)):
+        sols = [sols]
+    if slots is None:
+        slots = sorted(FIT_INPUTS)
+    return dict((slot, check_slot(sols, slot, logtol, residuals)) for slot in slots)
+
+def report(results):
+    "prints the extrapolated operating points of check_fits"
+    for slot in sorted(results):
+        r = results[slot]
+        n = len(r['design'])
+        flagged = np.nonzero(r['extrapolated'])[0]
+        print("%s (%s): %i of %i operating points outside the fit domain, "
+              "%i designs affected" % (slot, r['fit_name'], len(flagged), n,
+                                       len(np.unique(r['design'][flagged]))))
+        if np.isnan(r['violation']).all() and n:
+            print("    no training domain recorded for this fit")
+        if np.isfinite(r['residual']).any():
+            print("    max |log(fit/data)| at the operating points inside it: %.4f"
+                  % np.nanmax(np.abs(r['residual'])))
+        for i in flagged[:20]:
+            print("    design %i segment %i: %s (%.3f outside)" % (
+                r['design'][i], r['segment'][i],
+                ", ".join("%s=%.4g" % (name, v)
+                          for name, v in zip(r['inputs'], r['points'][i])),
+                r['violation'][i]))
+        if len(flagged) > 20:
+            print("    ...")
+
+def test():
+    "checks the stored fit domains against the polars and the interpolation"
+    from fits import available_fits
+    for name in available_fits():
+        fit = load_fit(name)
+        A, b = fit_domain(fit)
+        inputs, y = polar_data(name)
+        assert (np.dot(np.log(inputs), A.T) + b).max() < LOGTOL
+        assert (np.dot(np.log(2*inputs.max(axis=0)), A.T) + b).max() > np.log(2) - LOGTOL
+    # a power law is linear in log space, so it is interpolated exactly
+    data = np.exp(np.random.RandomState(0).rand(400, 3))
+    law = lambda x: 2.*x[:, 0]**1.5*x[:, 1]**-0.5*x[:, 2]
+    points = np.exp(0.2 + 0.6*np.random.RandomState(1).rand(50, 3))
+    assert np.allclose(interpolate(points, data, law(data)), law(points), rtol=1e-4)
+
+    # the ht fit is checked in its training units: a tail at Re 2e6 is inside
+    # the polars, at Re 2e7 outside, and only the first gets a residual
+    from gpkit.varkey import VarKey
+    def key(name, model):
+        return VarKey(name, models=['Aircraft', model], modelnums=[0, 0])
+    sol = {'variables': {key('Re_{c_h}', 'HorizontalTailPerformance'): np.array([2e6, 2e7]),
+                         key('\\tau_{ht}', 'HorizontalTailNoStruct'): 0.12,
+                         key('M', 'FlightState'): np.array([0.6, 0.6])}}
+    result = check_slot([sol], 'ht_cd0')
+    assert result['fit_name'] == 'ht_cd0_v1'
+    assert list(result['extrapolated']) == [False, True]
+    assert np.isfinite(result['residual'][0]) and np.isnan(result['residual'][1])
+    # the model passes Re and tau unscaled, so its drag is off from the data
+    fit = load_fit('ht_cd0_v1')
+    data, y = polar_data('ht_cd0_v1')
+    point = np.array([[2000., 120., 0.6]])
+    expected = evaluate_fit(fit, {'Re': 2e6, 'tau': 0.12, 'M': 0.6})/interpolate(point, data, y)
+    assert np.isclose(result['residual'][0], np.log(expected))
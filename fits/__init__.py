@@ -0,0 +1,221 @@
+"""
+Versioned GP compatible drag fits
+
+Each fit is a module <slot>_v<N>.py written by model_fitting/fit_codegen.py
+(fits that predate it were transcribed from the model source and written
+with fit_codegen.rewrite_fit) holding:
+    TYPE: gpfit fit type, 'SMA', 'ISMA' or 'MA'
+    OUTPUT: name of the fitted quantity
+    INPUTS: names of the fit inputs, in exponent column order
+    ALPHA: output exponent (a list with one entry per term for ISMA)
+    C: coefficient of each term
+    EXPONENTS: input exponents of each term
+    RANGES: training range of each input (in the units the fit was trained in)
+    HULL_A, HULL_B: convex hull of the training inputs in log space,
+                    HULL_A*log(u) + HULL_B <= 0 (see fit_validity.store_domains)
+    RMS: RMS error of the fit in log space, None if not recorded
+    SOURCE: data and script the fit was made from
+
+Performance models ask for a fit by slot name (e.g. 'wing_cdp'); the version
+used for each slot is set in ACTIVE, so fits can be swapped with set_fit
+before a model is built without editing the model source.
+"""
+
+import os
+import re
+from importlib import import_module
+
+# fit version used by the performance models for each slot
+ACTIVE = {
+    'wing_cdp': 'wing_cdp_v1',
+    'ht_cd0': 'ht_cd0_v1',
+    'vt_cdvis': 'vt_cdvis_v1',
+}
+
+FITDIR = os.path.dirname(os.path.abspath(__file__))
+
+def available_fits(slot=None):
+    """
+    Returns the sorted fit module names, optionally only those of one slot
+    """
+    names = []
+    for filename in os.listdir(FITDIR):
+        match = re.match(r"^(\w+)_v(\d+)\.py$", filename)
+        if match and (slot is None or match.group(1) == slot):
+            names.append((match.group(1), int(match.group(2))))
+    return ["%s_v%i" % name for name in sorted(names)]
+
+def latest_version(slot):
+    "returns the highest stored version number of a slot, 0 if there is none"
+    versions = [int(name.rsplit("_v", 1)[1]) for name in available_fits(slot)]
+    return max(versions) if versions else 0
+
+def set_fit(slot, name):
+    """
+    Selects the fit used for a slot by models built afterwards
+
+    ARGUMENTS
+    ---------
+    slot: slot name, e.g. 'wing_cdp'
+    name: fit module name, e.g. 'wing_cdp_v0', or 'latest'
+    """
+    if name == 'latest':
+        name = "%s_v%i" % (slot, latest_version(slot))
+    load_fit(name)
+    ACTIVE[slot] = name
+
+def load_fit(name):
+    """
+    Imports a fit module
+
+    ARGUMENTS
+    ---------
+    name: slot name (loads the ACTIVE version) or fit module name
+
+    RETURNS
+    -------
+    fit module
+    """
+    name = ACTIVE.get(name, name)
+    return import_module("fits." + name)
+
+def fit_posynomial(fit, inputs, output=None, terms=None):
+    """
+    Returns the sum of the fit terms in the given input expressions
+
+    ARGUMENTS
+    ---------
+    fit: fit module
+    inputs: dictionary of input name to monomial expression
+    output: output expression, multiplied in with -ALPHA[i] for ISMA fits
+    terms: (optional) indices of the terms to include
+    """
+    if terms is None:
+        terms = range(len(fit.C))
+    posy = 0
+    for i in terms:
+        term = fit.C[i]
+        for name, exponent in zip(fit.INPUTS, fit.EXPONENTS[i]):
+            term = term*inputs[name]**exponent
+        if fit.TYPE == 'ISMA':
+            term = term*output**-fit.ALPHA[i]
+        posy = posy + term
+    return posy
+
+def fit_constraint(fit, output, inputs):
+    """
+    Returns the constraints of a fit for a model
+
+    ARGUMENTS
+    ---------
+    fit: fit module or name (see load_fit)
+    output: expression of the fitted quantity, e.g. C_{D_{p}}
+    inputs: dictionary of input name to monomial expression
+
+    RETURNS
+    -------
+    list of constraints: one posynomial constraint for SMA and ISMA fits,
+    one monomial constraint per term for MA fits
+    """
+    if not hasattr(fit, 'TYPE'):
+        fit = load_fit(fit)
+    if fit.TYPE == 'SMA':
+        return [output**fit.ALPHA >= fit_posynomial(fit, inputs)]
+    if fit.TYPE == 'ISMA':
+        return [fit_posynomial(fit, inputs, output) <= 1]
+    if fit.TYPE == 'MA':
+        return [output >= fit_posynomial(fit, inputs, terms=[i])
+                for i in range(len(fit.C))]
+    raise ValueError("unknown fit type %s" % fit.TYPE)
+
+def evaluate_fit(fit, inputs):
+    """
+    Evaluates a fit numerically
+
+    ARGUMENTS
+    ---------
+    fit: fit module or name
+    inputs: dictionary of input name to float or numpy array
+
+    RETURNS
+    -------
+    fitted output value(s)
+    """
+    import numpy as np
+    if not hasattr(fit, 'TYPE'):
+        fit = load_fit(fit)
+    logu = np.array([np.log(np.asarray(inputs[name], dtype=float))
+                     for name in fit.INPUTS])
+    logterms = (np.log(fit.C)[:, None] +
+                np.dot(np.array(fit.EXPONENTS), logu.reshape(len(fit.INPUTS), -1)))
+    if fit.TYPE == 'SMA':
+        out = np.exp(np.log(np.exp(logterms).sum(axis=0))/fit.ALPHA)
+    elif fit.TYPE == 'MA':
+        out = np.exp(logterms.max(axis=0))
+    else:
+        # ISMA: solve sum(exp(logterms_i - alpha_i*log y)) = 1 by bisection
+        alpha = np.array(fit.ALPHA)[:, None]
+        lo = np.full(logterms.shape[1], -50.)
+        hi = np.full(logterms.shape[1], 50.)
+        for _ in range(100):
+            mid = (lo + hi)/2
+            f = np.exp(logterms - alpha*mid).sum(axis=0)
+            lo = np.where(f > 1, mid, lo)
+            hi = np.where(f > 1, hi, mid)
+        out = np.exp((lo + hi)/2)
+    return out.reshape(np.shape(inputs[fit.INPUTS[0]]))
+
+def compare_fits(slot, names, configs=None):
+    """
+    Solves every configuration with each fit of a slot, for A/B comparisons
+    of solve time and fuel burn
+
+    ARGUMENTS
+    ---------
+    slot: slot name, e.g. 'wing_cdp'
+    names: fit module names to compare
+    configs: list of configuration names (default: all production configs)
+
+    RETURNS
+    -------
+    results: dictionary keyed by (fit, config) with the solve time [s],
+             number of GP solves and W_{f_{total}} [lbf], None if the solve failed
+    """
+    from time import time
+    import numpy as np
+    from gpkit.small_scripts import mag
+    from SPaircraft import CONFIGS, build_mission, optimize_aircraft
+
+    if configs is None:
+        configs = list(CONFIGS)
+    active = ACTIVE[slot]
+    results = {}
+    try:
+        for name in names:
+            set_fit(slot, name)
+            for config in configs:
+                m, substitutions, fixedBPR, pRatOpt = build_mission(config)
+                starttime = time()
+                try:
+                    sol = optimize_aircraft(m, substitutions, fixedBPR, pRatOpt)
+                except Exception:
+                    results[(name, config)] = None
+                    continue
+                results[(name, config)] = {
+                    'time': time() - starttime,
+                    'gps': len(sol.program.gps),
+                    'W_{f_{total}}': float(np.sum(mag(sol('W_{f_{total}}').to('lbf')))),
+                }
+    finally:
+        ACTIVE[slot] = active
+
+    print("%-12s %-14s %10s %6s %14s" % ("config", "fit", "t [s]", "GPs", "W_f [lbf]"))
+    for config in configs:
+        for name in names:
+            r = results[(name, config)]
+            if r is None:
+                print("%-12s %-14s %10s" % (config, name, "failed"))
+            else:
+                print("%-12s %-14s %10.1f %6i %14.1f" % (config, name, r['time'],
+                                                         r['gps'], r['W_{f_{total}}']))
+    return results
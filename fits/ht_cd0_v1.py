@@ -0,0 +1,37 @@
+"ht_cd0_v1: Martin's TASOPT tail drag fit"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = 'SMA'
+OUTPUT = 'CD0h'
+INPUTS = ['Re', 'tau', 'M']
+ALPHA = 6.48983
+C = [
+    5.28751e-20,
+    1.67605e-28,
+    7.09757e-25,
+    3.73076e-14,
+    1.44343e-12,
+]
+EXPONENTS = [
+    [0.900672, 0.912222, 8.64547],
+    [0.350958, 6.29187, 10.2559],
+    [1.39489, 1.96239, 0.567066],
+    [-2.57406, 3.12793, 0.448159],
+    [-3.91046, 4.66279, 7.68852],
+]
+RANGES = {
+    'Re': (500.0, 9000.0),
+    'tau': (100.0, 140.0),
+    'M': (0.4, 0.8),
+}
+RMS = 0.01140494297
+SOURCE = 'model_fitting/Tail Fits/tasopt_tail_cl0_fits.py, blade.t100-t140 cl=0 polars; the script sweeps Re in thousands and thickness in thousandths, which is not the scaling of the model inputs; RANGES and HULL are in the script scaling, which fit_validity.TRAINING_SCALE converts model operating points to'
+HULL_A = [
+    [-1.0, 0.0, 0.0],
+    [0.0, -1.0, 0.0],
+    [0.0, 0.0, -1.0],
+    [0.0, 0.0, 1.0],
+    [0.0, 1.0, 0.0],
+    [1.0, 0.0, 0.0],
+]
+HULL_B = [6.214608098422, 4.605170185988, -0.916290731874, 0.223143551314, -4.941642422609, -9.104979856318]
@@ -0,0 +1,32 @@
+"vt_cdvis_v0: Philippe thesis vertical tail viscous drag fit"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = 'SMA'
+OUTPUT = 'CDvis'
+INPUTS = ['tau', 'Re']
+ALPHA = 0.125
+C = [
+    0.19,
+    18300.0,
+    0.118,
+    0.198,
+]
+EXPONENTS = [
+    [0.0075, 0.0017],
+    [3.54, -0.494],
+    [0.0082, 0.00165],
+    [0.00774, 0.00168],
+]
+RANGES = {
+    'tau': (0.08, 0.2),
+    'Re': (500000.0, 9000000.0),
+}
+RMS = None
+SOURCE = 'Philippe thesis fit; its training data is not recorded, so RANGES and HULL are those of the NACA 0008-0020 cl=0 polars the slot is checked against'
+HULL_A = [
+    [-1.0, 0.0],
+    [0.0, -1.0],
+    [0.0, 1.0],
+    [1.0, 0.0],
+]
+HULL_B = [-2.525728644308, 13.122363377404, -16.0127351353, 1.609437912434]
@@ -0,0 +1,35 @@
+"vt_cdvis_v1: Martin's TASOPT tail fit"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = 'SMA'
+OUTPUT = 'CDvis'
+INPUTS = ['Re', 'tau', 'M']
+ALPHA = 1.18909
+C = [
+    2.43701e-77,
+    0.00304307,
+    0.000196709,
+    6.59349e-50,
+]
+EXPONENTS = [
+    [-0.52841, 133.796, 1022.7],
+    [-0.409988, 1.22062, 1.55119],
+    [0.214479, -0.0383195, -0.137561],
+    [-0.498092, 1.55922, -114.577],
+]
+RANGES = {
+    'Re': (500.0, 9000.0),
+    'tau': (8.0, 20.0),
+    'M': (0.4, 0.8),
+}
+RMS = 0.0130593057734
+SOURCE = 'model_fitting/Tail Fits/naca_cl0_fits.py, NACA 0008-0020 cl=0 polars; the script sweeps Re in thousands and thickness in percent, which is not the scaling of the model inputs; RANGES and HULL are in the script scaling, which fit_validity.TRAINING_SCALE converts model operating points to'
+HULL_A = [
+    [-1.0, 0.0, 0.0],
+    [0.0, -1.0, 0.0],
+    [0.0, 0.0, -1.0],
+    [0.0, 0.0, 1.0],
+    [0.0, 1.0, 0.0],
+    [1.0, 0.0, 0.0],
+]
+HULL_B = [6.214608098422, 2.07944154168, -0.916290731874, 0.223143551314, -2.995732273554, -9.104979856318]
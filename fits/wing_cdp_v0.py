@@ -0,0 +1,32 @@
+"wing_cdp_v0: original Philippe thesis wing profile drag fit"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = 'SMA'
+OUTPUT = 'CDp'
+INPUTS = ['CL', 'cos(Lambda)M']
+ALPHA = 6.5
+C = [
+    10245874800.0,
+    2.85612227e-13,
+    2.08095341e-14,
+    1944119.25,
+]
+EXPONENTS = [
+    [15.587947404823325, 156.86410659495155],
+    [1.2774976672501526, 6.25343280027237],
+    [0.8825277088649582, 0.0273667615730107],
+    [5.654741336026169, 146.51920742858428],
+]
+RANGES = {
+    'CL': (0.3, 0.7),
+    'cos(Lambda)M': (0.4, 0.9),
+}
+RMS = None
+SOURCE = 'Philippe thesis fit; its training data is not recorded, so RANGES and HULL are those of the blade.c100-c145 polars the slot is checked against'
+HULL_A = [
+    [-1.0, 0.0],
+    [0.0, -1.0],
+    [0.0, 1.0],
+    [1.0, 0.0],
+]
+HULL_B = [-1.203972804326, -0.916290731874, 0.105360515658, 0.356674943939]
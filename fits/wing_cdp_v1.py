@@ -0,0 +1,55 @@
+"wing_cdp_v1: Martin's TASOPT c series airfoil fit"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = 'SMA'
+OUTPUT = 'CDp'
+INPUTS = ['Re/1000', 'tau', 'cos(Lambda)M', 'CL']
+ALPHA = 1.6515
+C = [
+    1.61418,
+    0.0466407,
+    190.811,
+    2.82283e-12,
+]
+EXPONENTS = [
+    [-0.550434, 1.29151, 3.03609, 1.77743],
+    [-0.389048, 0.784123, -0.340157, 0.950763],
+    [-0.218621, 3.94654, 19.2524, 1.15233],
+    [1.18147, -1.75664, 0.10563, -1.44114],
+]
+RANGES = {
+    'Re/1000': (10000.0, 30000.0),
+    'tau': (0.1, 0.145),
+    'cos(Lambda)M': (0.4, 0.9),
+    'CL': (0.3, 0.7),
+}
+RMS = 0.0517691862877
+SOURCE = 'model_fitting/Wing_Fits/TASOPT_c_series_airfoil_fits.py, blade.c100-c145 polars'
+HULL_A = [
+    [-1.0, 0.0, 0.0, 0.0],
+    [-0.184684945806, -0.785679994212, -0.3355835339, -0.485779897961],
+    [-0.152880388849, 0.0, 0.526286854868, 0.836450675831],
+    [-0.098545845562, 0.414420675522, 0.853927014841, 0.298919509814],
+    [-0.068921243686, 0.377087089419, 0.843125445089, 0.377087089419],
+    [-0.060852864854, 0.388357709911, 0.833458761514, 0.388357709911],
+    [-0.059969308829, 0.632586006914, 0.728802298567, 0.255119257329],
+    [-0.042081324639, 0.665911697072, 0.694742139361, 0.268559367022],
+    [-0.010790518243, -0.524615339682, 0.849221312199, 0.059037894559],
+    [0.0, -1.0, 0.0, 0.0],
+    [0.0, -0.777367481278, 0.629046738368, 0.0],
+    [0.0, -0.541794427973, 0.838667495873, 0.055638378694],
+    [0.0, 0.0, -1.0, 0.0],
+    [0.0, 0.0, 0.0, -1.0],
+    [0.0, 0.0, 0.0, 1.0],
+    [0.0, 0.0, 1.0, 0.0],
+    [0.0, 0.355598920692, 0.571340774552, 0.739675014407],
+    [0.0, 0.901995825316, 0.387947865727, 0.189472912551],
+    [0.0, 1.0, 0.0, 0.0],
+    [0.042937688529, -0.542134533396, 0.839193960061, 0.0],
+    [0.066974977851, -0.367357383666, 0.921970056088, -0.102635864513],
+    [0.094230473054, -0.349928728518, 0.925337332418, -0.111450994338],
+    [0.131480966407, -0.323471467204, 0.924064891406, -0.155508976742],
+    [0.177360702741, 0.921500804522, 0.274544455894, -0.209773187339],
+    [1.0, 0.0, 0.0, 0.0],
+]
+HULL_B = [9.210340371976, -0.925558396485, 1.823858933218, 2.005061435557, 1.685586926536, 1.634901111976, 2.027497129179, 1.924288777122, -0.898031517711, -2.302585092994, -1.649587051028, -1.040539714315, -0.916290731874, -1.203972804326, 0.356674943939, 0.105360515658, 1.077983727974, 1.895921669519, 1.931021536562, -1.503692772903, -1.454152628649, -1.704859067478, -2.081281094172, -0.240263576677, -10.308952660644]
@@ -0,0 +1,234 @@
+"""
+Golden solution regression harness over every configuration and substitution set
+
+    python golden_regression.py              # check against golden/
+    python golden_regression.py --update     # (re)write the golden values
+    python golden_regression.py optimal737 D82 --processes 2
+
+The golden values are committed in golden/, one JSON file per pair; a pair
+without one fails, and --update refuses to store a solve that failed or
+only converged by relaxing constants.
+
+Every production configuration and legacy substitution set (see
+benchmarks/common.py) is solved in a process pool. Key outputs are compared
+against the stored golden values with per variable relative tolerances, and
+the solve time and SP iterations against the golden ones, so a change that
+breaks or slows a configuration fails even if nobody runs it every day.
+"""
+
+import os
+import sys
+import json
+import traceback
+from time import time
+from multiprocessing import Pool
+import numpy as np
+from gpkit.small_scripts import mag
+
+from benchmarks.common import CONFIGS, LEGACY, build, solve
+from SPaircraft import relax_aircraft
+from convergence_trace import ConvergenceTrace
+
+GOLDENDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+
+# outputs compared against the golden values: SP variable, units
+OUTPUTS = [
+    ('W_{f_{total}}', 'lbf'), ('W_{total}', 'lbf'), ('W_{engsys}', 'lbf'),
+    ('W_{fuse}', 'lbf'), ('W_{wing}', 'lbf'), ('W_{ht}', 'lbf'), ('W_{vt}', 'lbf'),
+    ('W_{lg}', 'lbf'), ('b', 'ft'), ('S', 'ft^2'), ('AR', None),
+    ('S_{ht}', 'ft^2'), ('S_{vt}', 'ft^2'), ('C_D', None), ('L/D', None),
+    ('TSFC', None),
+]
+
+# relative tolerance of each output (the SP solve itself converges to 1%)
+DEFAULT_RELTOL = 0.01
+RELTOLS = {
+    'C_D': 0.02,
+    'L/D': 0.02,
+    'TSFC': 0.02,
+    'W_{ht}': 0.02,
+    'W_{vt}': 0.02,
+    'W_{lg}': 0.02,
+}
+
+# largest relaxation of any constant at a solution that counts as optimal
+RELAX_TOL = 1.00001
+
+# solve time may grow by this factor plus TIME_SLACK seconds, and the SP
+# iterations by ITERATION_SLACK, before it counts as a regression
+TIME_FACTOR = 1.5
+TIME_SLACK = 5.
+ITERATION_SLACK = 2
+
+def solve_pair(name):
+    """
+    Solves one configuration or legacy substitution set
+
+    RETURNS
+    -------
+    dictionary with status ('solved', 'relaxed' when a constant stayed
+    relaxed at the solution, or 'failed'), cost, outputs, solve time [s]
+    and SP iterations, or the error of a failed solve
+    """
+    starttime = time()
+    try:
+        m, substitutions, fixedBPR, pRatOpt = build(name)
+        m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+        soltime = time()
+        sol = solve(m_relax)
+        soltime = time() - soltime
+    except Exception:
+        return {'name': name, 'status': 'failed', 'error': traceback.format_exc(),
+                'time_total': time() - starttime}
+    trace = ConvergenceTrace()
+    trace.record_program(sol.program)
+    relaxed = sorted(str(k) for k, v in sol['freevariables'].items()
+                     if "Relax" in (k.models or ()) and np.max(mag(v)) >= RELAX_TOL)
+    outputs = {}
+    for var, unit in OUTPUTS:
+        try:
+            value = sol(var)
+        except (KeyError, ValueError):
+            continue
+        if unit is not None:
+            value = value.to(unit)
+        value = mag(value)
+        outputs[var] = np.asarray(value, dtype=float).tolist()
+    return {'name': name, 'status': 'relaxed' if relaxed else 'solved',
+            'cost': float(mag(sol['cost'])), 'outputs': outputs, 'time_solve': soltime,
+            'time_total': time() - starttime, 'sp_iterations': len(trace),
+            'relaxed': relaxed}
+
+def solve_all(names, processes=None):
+    "solves every pair in a process pool (one process per solve)"
+    if processes == 1:
+        return [solve_pair(name) for name in names]
+    pool = Pool(processes, maxtasksperchild=1)
+    try:
+        return pool.map(solve_pair, names, chunksize=1)
+    finally:
+        pool.close()
+        pool.join()
+
+def golden_file(name, goldendir=GOLDENDIR):
+    return os.path.join(goldendir, "%s.json" % name)
+
+def load_golden(name, goldendir=GOLDENDIR):
+    "returns the golden result of a pair, None if there is none"
+    filename = golden_file(name, goldendir)
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        return json.load(f)
+
+def save_golden(result, goldendir=GOLDENDIR):
+    "writes a result as the golden result of its pair, which must have solved"
+    if result['status'] != 'solved':
+        raise ValueError("%s %s, not storing it as golden" % (result['name'], result['status']))
+    if not os.path.isdir(goldendir):
+        os.makedirs(goldendir)
+    result = dict((k, v) for k, v in result.items() if k != 'error')
+    with open(golden_file(result['name'], goldendir), 'w') as f:
+        json.dump(result, f, indent=1, sort_keys=True)
+
+def check(result, golden, reltols=None, timing=True):
+    """
+    Compares a result against its golden result, and its solve time and SP
+    iterations too if timing
+
+    RETURNS
+    -------
+    list of failure messages (empty if the result matches)
+    """
+    tols = dict(RELTOLS)
+    tols.update(reltols or {})
+    if result['status'] == 'failed':
+        return ["no longer solves: %s" % result['error'].strip().splitlines()[-1]]
+    if result['status'] == 'relaxed':
+        return ["only solves with relaxed constants: %s" % ", ".join(result['relaxed'])]
+    failures = []
+    for var, expected in sorted(golden['outputs'].items()):
+        if var not in result['outputs']:
+            failures.append("%s missing from the solution" % var)
+            continue
+        expected = np.asarray(expected, dtype=float)
+        value = np.asarray(result['outputs'][var], dtype=float)
+        if value.shape != expected.shape:
+            failures.append("%s shape %s, golden %s" % (var, value.shape, expected.shape))
+            continue
+        diff = np.abs(value - expected)/np.abs(expected)
+        tol = tols.get(var, DEFAULT_RELTOL)
+        if (diff > tol).any():
+            failures.append("%s off by %.2f%% (tolerance %.2f%%)" % (
+                var, 100*diff.max(), 100*tol))
+    if not timing:
+        return failures
+    if result['time_solve'] > TIME_FACTOR*golden['time_solve'] + TIME_SLACK:
+        failures.append("solve time %.1f s, golden %.1f s" % (
+            result['time_solve'], golden['time_solve']))
+    if result['sp_iterations'] > golden['sp_iterations'] + ITERATION_SLACK:
+        failures.append("%i SP iterations, golden %i" % (
+            result['sp_iterations'], golden['sp_iterations']))
+    return failures
+
+def regression(names=None, processes=None, update=False, goldendir=GOLDENDIR, timing=True):
+    """
+    Solves every pair and checks it against the golden results
+
+    ARGUMENTS
+    ---------
+    names: configurations and legacy substitution sets (default: all)
+    processes: worker processes (default: cpu count, 1 for serial)
+    update: write the results as the new golden results instead; pairs
+            that did not solve are reported as failures and not written
+    timing: also fail on solve time and SP iteration regressions
+
+    RETURNS
+    -------
+    dictionary of name to list of failures (a missing golden result is one)
+    """
+    if not names:
+        names = list(CONFIGS) + sorted(LEGACY)
+    results = solve_all(names, processes)
+    report = {}
+    for result in results:
+        name = result['name']
+        if update:
+            try:
+                save_golden(result, goldendir)
+                report[name] = []
+            except ValueError as error:
+                report[name] = [str(error)]
+        else:
+            golden = load_golden(name, goldendir)
+            report[name] = (["no golden result in %s" % golden_file(name, goldendir)]
+                            if golden is None else check(result, golden, timing=timing))
+        print("%-24s %-7s %7.1f s  %s" % (
+            name, result['status'], result['time_total'],
+            "FAILED" if report[name] else "updated" if update else "ok"))
+        for failure in report[name]:
+            print("    " + failure)
+    return report
+
+def test():
+    """
+    Runs the regression over every pair, failing on any changed output;
+    solve time and SP iterations depend on the machine and are only
+    checked from the command line. Not in TESTS until golden/ is committed.
+    """
+    report = regression(timing=False)
+    failed = sorted(name for name, failures in report.items() if failures)
+    assert not failed, "golden regression failed for %s" % ", ".join(failed)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="golden solution regression harness")
+    parser.add_argument('names', nargs='*', help="pairs to run (default: all)")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--update', action='store_true',
+                        help="write the results as the golden results")
+    args = parser.parse_args()
+    report = regression(args.names, args.processes, args.update)
+    failed = [name for name, failures in report.items() if failures]
+    print("%i of %i failed" % (len(failed), len(report)))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,299 @@
+"""
+Sparse artifact of a solved GP that re-solves with new constants without gpkit
+
+The artifact keeps the GP in log space form: every monomial i of posynomial
+p_idxs[i] is
+
+    c[i] * prod_j x_j**A[i, j] * prod_k v_k**C[i, k]
+
+with x the free variables and v the constants (substitutions). Changing a
+constant only rescales the coefficient column, so a design point can be
+re-optimized from the .npz file alone, e.g.
+
+    python gp_artifact.py design.npz "R_{req}=3500" "n_{pass}=160"
+"""
+
+import numpy as np
+
+def _value(key, value):
+    "magnitude of a substitution in the units of its variable"
+    from gpkit.small_scripts import mag
+    units = getattr(key, 'units', None)
+    if units is not None and hasattr(value, 'to'):
+        value = value.to(units)
+    return float(mag(value))
+
+def _bare(key):
+    """
+    Returns the name of the constant a key sets: a relaxed constant's value
+    is held by <name>_{before} in the Relax model (see
+    relaxed_constants.update_constants)
+    """
+    if "Relax" in (key.models or []) and key.name.endswith("_{before}"):
+        return key.name[:-len("_{before}")]
+    return key.name
+
+def _unitstr(key):
+    units = getattr(key, 'units', None)
+    if units is None:
+        return ""
+    return str(getattr(units, 'units', units))
+
+def export_gp(gp, filename):
+    """
+    Writes a solved GP (e.g. sol.program.gps[-1]) as an .npz artifact
+
+    The GP's posynomials are taken before substitution, so every constant
+    keeps its own exponent column.
+
+    RETURNS
+    -------
+    the GPArtifact that was written
+    """
+    from gpkit.small_scripts import mag
+    posys = [gp.cost] + list(gp.as_posyslt1())
+    free = list(gp.varlocs)
+    freeidx = dict((key, j) for j, key in enumerate(free))
+    consts, constidx = [], {}
+    c, p_idxs = [], []
+    A = ([], [], [])
+    C = ([], [], [])
+    for p, posy in enumerate(posys):
+        for exp, coeff in zip(posy.exps, posy.cs):
+            i = len(c)
+            c.append(float(mag(coeff)))
+            p_idxs.append(p)
+            for key, e in exp.items():
+                if key in freeidx:
+                    A[0].append(i)
+                    A[1].append(freeidx[key])
+                    A[2].append(float(e))
+                else:
+                    if key not in constidx:
+                        constidx[key] = len(consts)
+                        consts.append(key)
+                    C[0].append(i)
+                    C[1].append(constidx[key])
+                    C[2].append(float(e))
+    result = getattr(gp, 'result', None)
+    x = np.full(len(free), np.nan)
+    if result:
+        for j, key in enumerate(free):
+            x[j] = float(mag(result['freevariables'][key]))
+    artifact = GPArtifact(
+        c=np.array(c), p_idxs=np.array(p_idxs, dtype=int),
+        A=(np.array(A[0], dtype=int), np.array(A[1], dtype=int), np.array(A[2])),
+        C=(np.array(C[0], dtype=int), np.array(C[1], dtype=int), np.array(C[2])),
+        var_names=[str(k) for k in free], var_bare=[k.name for k in free],
+        var_units=[_unitstr(k) for k in free], x=x,
+        const_names=[str(k) for k in consts], const_bare=[_bare(k) for k in consts],
+        const_units=[_unitstr(k) for k in consts],
+        const_values=np.array([_value(k, gp.substitutions[k]) for k in consts]),
+        cost_units=_unitstr(gp.cost))
+    artifact.save(filename)
+    return artifact
+
+class GPArtifact(object):
+    """
+    Log space GP with constant exponent columns, loadable without gpkit
+
+    A and C are (row, col, data) triplets over monomials x free variables
+    and monomials x constants.
+    """
+    ARRAYS = ['c', 'p_idxs', 'x', 'const_values']
+    NAMES = ['var_names', 'var_bare', 'var_units', 'const_names', 'const_bare',
+             'const_units']
+
+    def __init__(self, c, p_idxs, A, C, var_names, var_bare, var_units, x,
+                 const_names, const_bare, const_units, const_values, cost_units=""):
+        self.c = np.asarray(c, dtype=float)
+        self.p_idxs = np.asarray(p_idxs, dtype=int)
+        self.A = A
+        self.C = C
+        self.var_names = list(var_names)
+        self.var_bare = list(var_bare)
+        self.var_units = list(var_units)
+        self.x = np.asarray(x, dtype=float)
+        self.const_names = list(const_names)
+        self.const_bare = list(const_bare)
+        self.const_units = list(const_units)
+        self.const_values = np.asarray(const_values, dtype=float)
+        self.cost_units = cost_units
+        self.nposys = int(self.p_idxs.max()) + 1 if len(self.p_idxs) else 0
+
+    @property
+    def shape(self):
+        "monomials, free variables, constants"
+        return len(self.c), len(self.var_names), len(self.const_names)
+
+    def save(self, filename):
+        "writes the artifact as compressed .npz"
+        arrays = dict((k, getattr(self, k)) for k in self.ARRAYS)
+        arrays.update((k, np.array(getattr(self, k), dtype=str)) for k in self.NAMES)
+        for name in ['A', 'C']:
+            row, col, data = getattr(self, name)
+            arrays[name + '_row'], arrays[name + '_col'], arrays[name + '_data'] = row, col, data
+        arrays['cost_units'] = np.array(self.cost_units, dtype=str)
+        np.savez_compressed(filename, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        "reads an artifact written by save"
+        data = np.load(filename)
+        kwargs = dict((k, data[k]) for k in cls.ARRAYS)
+        kwargs.update((k, [str(s) for s in data[k]]) for k in cls.NAMES)
+        for name in ['A', 'C']:
+            kwargs[name] = (data[name + '_row'], data[name + '_col'], data[name + '_data'])
+        kwargs['cost_units'] = str(data['cost_units'])
+        return cls(**kwargs)
+
+    def constant_indices(self, name):
+        "indices of the constants with a full or bare (for relaxed constants, unrelaxed) name"
+        if name in self.const_names:
+            return [self.const_names.index(name)]
+        return [k for k, bare in enumerate(self.const_bare) if bare == name]
+
+    def constant_vector(self, substitutions=None):
+        """
+        Returns the constant values with some replaced
+
+        ARGUMENTS
+        ---------
+        substitutions: dictionary of constant name (full or bare; a bare
+                       name sets every element of a vector constant) to value
+                       in the constant's units
+        """
+        values = self.const_values.copy()
+        for name, value in (substitutions or {}).items():
+            idxs = self.constant_indices(name)
+            if not idxs:
+                raise KeyError("%s is not a constant of the artifact" % name)
+            values[idxs] = value
+        return values
+
+    def log_coefficients(self, values):
+        "log of the monomial coefficients for a vector of constant values"
+        row, col, data = self.C
+        logc = np.log(self.c)
+        np.add.at(logc, row, data*np.log(values[col]))
+        return logc
+
+    def compiled(self):
+        """
+        Returns the solver structure (exponent matrix, posynomial sizes),
+        built once and shared by every solve of the artifact
+        """
+        if getattr(self, '_compiled', None) is None:
+            from cvxopt import spmatrix
+            nmon, nvar, _ = self.shape
+            row, col, data = self.A
+            F = spmatrix(data.tolist(), row.tolist(), col.tolist(), (nmon, nvar))
+            K = np.bincount(self.p_idxs, minlength=self.nposys).tolist()
+            self._compiled = F, K
+        return self._compiled
+
+    def solve(self, substitutions=None, solver='cvxopt'):
+        """
+        Solves the GP with some constants replaced
+
+        ARGUMENTS
+        ---------
+        substitutions: see constant_vector
+        solver: only 'cvxopt' is supported
+
+        RETURNS
+        -------
+        dictionary with cost, variables {full name: value}, sensitivities
+        {full constant name: d log(cost)/d log(constant)} and status
+        """
+        values = self.constant_vector(substitutions)
+        return self.solve_coefficients(self.log_coefficients(values), solver)
+
+    def solve_coefficients(self, g, solver='cvxopt'):
+        """
+        Solves the GP for a vector of log monomial coefficients
+        (see log_coefficients), returning the same as solve
+        """
+        if solver != 'cvxopt':
+            raise ValueError("unknown solver %s" % solver)
+        from cvxopt import solvers, matrix
+        F, K = self.compiled()
+        solvers.options['show_progress'] = False
+        out = solvers.gp(K, F, matrix(g))
+        logx = np.array(out['x']).ravel()
+
+        # monomial sensitivities: posynomial dual times monomial share
+        row, col, data = self.A
+        logm = np.array(g, dtype=float)
+        np.add.at(logm, row, data*logx[col])
+        monos = np.exp(logm)
+        posyvals = np.bincount(self.p_idxs, weights=monos, minlength=self.nposys)
+        la = np.ones(self.nposys)
+        la[1:] = np.array(out['znl']).ravel()
+        nu = la[self.p_idxs]*monos/posyvals[self.p_idxs]
+        crow, ccol, cdata = self.C
+        sens = np.bincount(ccol, weights=nu[crow]*cdata, minlength=len(self.const_names))
+        return {'status': out['status'], 'cost': float(posyvals[0]),
+                'cost_units': self.cost_units,
+                'variables': dict(zip(self.var_names, np.exp(logx).tolist())),
+                'sensitivities': dict(zip(self.const_names, sens.tolist()))}
+
+    def value(self, result, name):
+        "looks up a free variable of a solve result by full or bare name"
+        if name in result['variables']:
+            return result['variables'][name]
+        values = [result['variables'][full]
+                  for full, bare in zip(self.var_names, self.var_bare) if bare == name]
+        if not values:
+            raise KeyError("%s is not a variable of the artifact" % name)
+        return values[0] if len(values) == 1 else np.array(values)
+
+def load_artifact(filename):
+    "reads an artifact, see GPArtifact.load"
+    return GPArtifact.load(filename)
+
+def test():
+    "re-solves the last GP of a relaxed SP from its artifact and against gpkit"
+    import os
+    import shutil
+    import tempfile
+    from gpkit import Variable, Model, SignomialsEnabled, GeometricProgram
+    from gpkit.small_scripts import mag
+    from relaxed_constants import relaxed_constants
+    x, y, z = Variable('x'), Variable('y'), Variable('z')
+    a, b, c = Variable('a', 0.5), Variable('b', 0.1), Variable('c', 2.)
+    with SignomialsEnabled():
+        # a is only in the signomial constraint, so in the linearized GP
+        constraints = [x + a*y >= 1, y <= b, z >= c*x]
+    sol = relaxed_constants(Model(x + z, constraints)).localsolve(verbosity=0, reltol=1e-8)
+    gp = sol.program.gps[-1]
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "gp.npz")
+        export_gp(gp, filename)
+        artifact = load_artifact(filename)
+    finally:
+        shutil.rmtree(directory)
+    assert sorted(artifact.const_bare) == ['a', 'b', 'c']
+    assert np.isclose(artifact.solve()['cost'], mag(sol['cost']))
+    for name, value in [('a', 0.6), ('b', 0.12), ('c', 2.5)]:
+        result = artifact.solve({name: value})
+        key, = [k for k in gp.substitutions if _bare(k) == name and "Relax" in k.models]
+        substitutions = dict(gp.substitutions)
+        substitutions[key] = value
+        expected = GeometricProgram(gp.cost, list(gp), substitutions).solve(verbosity=0)
+        assert np.isclose(result['cost'], mag(expected['cost']), rtol=1e-5), name
+        assert np.isclose(artifact.value(result, 'x'), mag(expected('x')), rtol=1e-5), name
+        assert np.isclose(result['sensitivities'][str(key)],
+                          expected['sensitivities']['constants'][key], rtol=1e-3, atol=1e-6), name
+
+if __name__ == "__main__":
+    import sys
+    artifact = load_artifact(sys.argv[1])
+    subs = dict((arg.split("=")[0], float(arg.split("=")[1])) for arg in sys.argv[2:])
+    result = artifact.solve(subs)
+    print("%i monomials, %i free variables, %i constants" % artifact.shape)
+    print("status %s, cost %.6g %s" % (result['status'], result['cost'], result['cost_units']))
+    top = sorted(result['sensitivities'].items(), key=lambda item: -abs(item[1]))[:10]
+    for name, sens in top:
+        print("    %-50s %+.4f" % (name, sens))
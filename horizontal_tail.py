@@ -5,6 +5,7 @@ from gpkit import Variable, Model, units, SignomialsEnabled, Vectorize, Signomia
 from gpkit.tools import te_exp_minus1
 from gpkit.constraints.tight import Tight as TCS
 from wingbox import WingBox
+from fits import fit_constraint
 
 class HorizontalTailNoStruct(Model):
     """
@@ -143,20 +144,11 @@ class HorizontalTailPerformance(Model):
              ])
 
         if fitDrag:
-            constraints.extend([
-                #Martin's TASOPT tail drag fit
-                   CD0h**6.48983 >= (5.28751e-20 * (Rec)**0.900672 * (self.HT['\\tau_{ht}'])**0.912222 * (state['M'])**8.64547
-                        + 1.67605e-28 * (Rec)**0.350958 * (self.HT['\\tau_{ht}'])**6.29187 * (state['M'])**10.2559
-                        + 7.09757e-25 * (Rec)**1.39489 * (self.HT['\\tau_{ht}'])**1.96239 * (state['M'])**0.567066
-                        + 3.73076e-14 * (Rec)**-2.57406 * (self.HT['\\tau_{ht}'])**3.12793 * (state['M'])**0.448159
-                        + 1.44343e-12 * (Rec)**-3.91046 * (self.HT['\\tau_{ht}'])**4.66279 * (state['M'])**7.68852)
-
-                #Philippe thesis drag fit
-##                CD0h**0.125 >= 0.19*(self.HT['\\tau_{ht}'])**0.0075 *(Rec)**0.0017
-##                            + 1.83e+04*(self.HT['\\tau_{ht}'])**3.54*(Rec)**-0.494
-##                            + 0.118*(self.HT['\\tau_{ht}'])**0.0082 *(Rec)**0.00165
-##                            + 0.198*(self.HT['\\tau_{ht}'])**0.00774*(Rec)**0.00168,
-                ])
+            # Martin's TASOPT tail drag fit by default (see fits.ACTIVE)
+            constraints.extend(fit_constraint('ht_cd0', CD0h,
+                                              {'Re': Rec,
+                                               'tau': self.HT['\\tau_{ht}'],
+                                               'M': state['M']}))
         else:
             #HT drag constraints in AircraftP
             None
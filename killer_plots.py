@@ -10,44 +10,34 @@ from gpkit.small_scripts import mag
 # Solution saving
 from saveSol import genSolOut
 
-# Models and substitutions
-from aircraft import Mission
-from SPaircraft import optimize_aircraft
-from subs.optimalD8 import get_optimalD8_subs
-from subs.optimal737 import get_optimal737_subs
-from subs.M072_737 import get_M072_737_subs
-from subs.D8_no_BLI import get_D8_no_BLI_subs
-from subs.D8_eng_wing import get_D8_eng_wing_subs
+# Technology insertion chain
+from chain import run_chain, STANDARD_CHAIN
+from solution_archive import column
 
 def standard_killer_plot():
     """
     Generates the standard killer plots from the TASOPT paper
     """
-    Nclimb = 3; Ncruise = 2; Nmission = 1;
-    subsList = [get_optimal737_subs(), get_M072_737_subs(), get_D8_eng_wing_subs(), get_D8_no_BLI_subs(), get_optimalD8_subs(), get_optimalD8_subs()]
-    configList = ['optimal737', 'M072_737', 'D8_eng_wing', 'D8_no_BLI', 'optimalD8', 'optimalD8']
-    fixedBPRList = [True, True, True, True, True, False]
-    pRatOptList = [False, False, False, False, False, True]
-    mutategpargList = [False, False, False, False, False, False]
-    sol = {}; wf = [];
-    for i in range(0,6):
-        m = Mission(Nclimb, Ncruise, configList[i], Nmission)
-        m.cost = m['W_{f_{total}}'].sum()
-        substitutions = subsList[i]
-        substitutions.update({'R_{req}': 3000.*units('nmi'),
-                              'n_{pass}': 180.})
-        sol[i] = optimize_aircraft(m, substitutions, fixedBPRList[i], pRatOptList[i], mutategpargList[i])
-        wf.append(sol[i]('W_{f_{total}}'))
+    records = run_chain(STANDARD_CHAIN)
+    wf = column(records, 'W_{f_{total}}', 'lbf')
 
-    wing_sens = [sol[i]['sensitivities']['constants']['C_{wing}'] for i in range(0,6)]
-    HT_sens = [sol[i]['sensitivities']['constants']['C_{ht}'] for i in range(0,6)]
-    VT_sens = [sol[i]['sensitivities']['constants']['C_{VT}'] for i in range(0,6)]
-    fuse_sens = [sol[i]['sensitivities']['constants']['C_{fuse}'] for i in range(0,6)]
-    engine_sens = [sol[i]['sensitivities']['constants']['C_{engsys}'] for i in range(0,6)]
-    lg_sens = [sol[i]['sensitivities']['constants']['C_{lg}'] for i in range(0,6)]
-    Mmin_sens = [sol[i]['sensitivities']['constants']['M_{min}'] for i in range(0,6)]
+    wing_sens = column(records, 'C_{wing}', sensitivity=True)
+    HT_sens = column(records, 'C_{ht}', sensitivity=True)
+    VT_sens = column(records, 'C_{VT}', sensitivity=True)
+    fuse_sens = column(records, 'C_{fuse}', sensitivity=True)
+    engine_sens = column(records, 'C_{engsys}', sensitivity=True)
+    lg_sens = column(records, 'C_{lg}', sensitivity=True)
+    Mmin_sens = column(records, 'M_{min}', sensitivity=True)
+    missing = [name for name, sens in [('C_{wing}', wing_sens), ('C_{ht}', HT_sens),
+                                       ('C_{VT}', VT_sens), ('C_{fuse}', fuse_sens),
+                                       ('C_{engsys}', engine_sens), ('C_{lg}', lg_sens),
+                                       ('M_{min}', Mmin_sens)]
+               if not np.all(np.isfinite(sens))]
+    if missing:
+        raise ValueError("sensitivities to %s are missing from the chain records"
+                         % ", ".join(missing))
 
-    ytest = [mag(wf[i]/wf[0])[0] for i in range(0,6)]
+    ytest = list(np.ravel(wf/wf[0]))
     xtest = [0, 1, 2, 3, 4, 5]
     xlabels = ['Optimized 737-800 M = 0.8', 'Slow to M = 0.72', 'D8 fuselage, Pi tail', 'Rear podded engines', 'Integrated engines, BLI = D8', 'Optimize engine', '2020 Engines']
 
@@ -1,58 +1,23 @@
 "tasopt_tail_polarfits.py"
+import sys
+import os
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from gpfit.fit import fit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xfoil_polars import polar_columns, polar_dataset
+from fit_codegen import write_gpfit, data_ranges
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from fit_validity import data_hull
 plt.rcParams.update({'font.size':15})
 
-def text_to_df(filename):
-    "parse XFOIL polars and concatente data in DataFrame"
-    lines = list(open(filename))
-    for i, l in enumerate(lines):
-        lines[i] = l.split("\n")[0]
-        for j in 10-np.arange(9):
-            if " "*j in lines[i]:
-                lines[i] = lines[i].replace(" "*j, " ")
-            if "---" in lines[i]:
-                start = i
-    data = {}
-    titles = lines[start-1].split(" ")[1:]
-    for t in titles:
-        data[t] = []
-
-    for l in lines[start+1:]:
-        for i, v in enumerate(l.split(" ")[1:]):
-            data[titles[i]].append(v)
-
-    df = pd.DataFrame(data)
-    df = df.astype(float)
-    return df
-
 def fit_setup(thick_range, re_range, M_range):
     "set up x and y parameters for gp fitting"
-    cd = []
-    tau = []
-    mach = []
-    re = []
-    for m in M_range:
-        for n in thick_range:
-            for r in re_range:
-                dataf = text_to_df("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
-                if len(dataf["CD"]) != 0:
-                    cd.append(dataf["CD"])
-                    re.append(r)
-                    tau.append(float(n))
-                    mach.append(m)
-
-    u1 = np.hstack(re)
-    u2 = np.hstack(tau)
-    print u2
-    u3 = np.hstack(mach)
-    w = np.hstack(cd)
-    u1 = u1.astype(np.float)
-    u2 = u2.astype(np.float)
-    u3 = u3.astype(np.float)
-    w = w.astype(np.float)
+    data = polar_dataset("blade.t%s.cl0.Re%dk.M%s.pol", thick_range, re_range, M_range)
+    u1 = data[:, 1]
+    u2 = data[:, 0]
+    u3 = data[:, 2]
+    w = data[:, 4]
     u = [u1, u2, u3]
     x = np.log(u)
     y = np.log(w)
@@ -88,6 +53,13 @@ def make_fit(thick_range, re_range, M_range):
     cstrt, rms = fit(x, y, 5, 'SMA')
     print "RMS"
     print rms
+    # store it as the next version of the ht_cd0 fit; Re and tau are in the
+    # polar file units, add the new version to fit_validity.TRAINING_SCALE
+    inputs = ['Re', 'tau', 'M']
+    source = ('model_fitting/Tail Fits/tasopt_tail_cl0_fits.py, '
+              'blade.t%s-t%s cl0 polars' % (thick_range[0], thick_range[-1]))
+    print write_gpfit('ht_cd0', cstrt, rms, 'CD0h', inputs, data_ranges(x, inputs),
+                      source, 'TASOPT tail airfoil zero lift drag fit', hull=data_hull(x.T))
 
 def plot_fits(thick_range, re_range, M_range):
     "plot fit compared to data"
@@ -104,7 +76,7 @@ def plot_fits(thick_range, re_range, M_range):
             delcount = 0
             for i in range(len(re_range)):
                 r = re_range[i]
-                dataf = text_to_df("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CD"]) != 0:
                     cd.append(dataf["CD"])
                 else:
@@ -139,7 +111,7 @@ def plot_fits(thick_range, re_range, M_range):
             delcount = 0
             for i in range(len(re_range)):
                 r = re_range[i]
-                dataf = text_to_df("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CD"]) != 0:
                     cd.append(dataf["CD"])
                 else:
@@ -175,7 +147,7 @@ def plot_data(thick_range, re_range, M_range):
             delcount = 0
             for i in range(len(re_range)):
                 r = re_range[i]
-                dataf = text_to_df("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CD"]) != 0:
                     cd.append(dataf["CD"])
                 else:
@@ -206,7 +178,7 @@ def plot_data(thick_range, re_range, M_range):
             delcount = 0
             for i in range(len(re_range)):
                 r = re_range[i]
-                dataf = text_to_df("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.t%s.cl0.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CD"]) != 0:
                     cd.append(dataf["CD"])
                 else:
@@ -1,68 +1,27 @@
 "TASOPT c series airfoil fits"
+import sys
+import os
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 from gpfit.fit import fit
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from xfoil_polars import polar_columns, polar_dataset
+from fit_codegen import write_gpfit, data_ranges
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+from fit_validity import data_hull
 plt.rcParams.update({'font.size':15})
 
-def text_to_df(filename):
-    "parse XFOIL polars and concatente data in DataFrame"
-    lines = list(open(filename))
-    for i, l in enumerate(lines):
-        lines[i] = l.split("\n")[0]
-        for j in 10-np.arange(9):
-            if " "*j in lines[i]:
-                lines[i] = lines[i].replace(" "*j, " ")
-            if "---" in lines[i]:
-                start = i
-    data = {}
-    titles = lines[start-1].split(" ")[1:]
-    for t in titles:
-        data[t] = []
-
-    for l in lines[start+1:]:
-        for i, v in enumerate(l.split(" ")[1:]):
-            data[titles[i]].append(v)
-
-    df = pd.DataFrame(data)
-    df = df.astype(float)
-    return df
-
 def fit_setup(thick_range, re_range, M_range):
     "set up x and y parameters for gp fitting"
-    cd = []
-    tau = []
-    mach = []
-    re = []
-    cl = []
-    for m in M_range:
-        for n in thick_range:
-            for r in re_range:
-                dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
-                for i in range(len(dataf["CD"])):
-                    if dataf["CD"][i] and dataf["CL"][i] != 0:
-                        cd.append(dataf["CD"][i])
-                        cl.append(dataf["CL"][i])
-                        re.append(r)
-                        tau.append(float(n)/1000)
-                        mach.append(m)
-
-    u1 = np.hstack(re)
-    print u1
-    u2 = np.hstack(tau)
-    print u2
-    u3 = np.hstack(mach)
-    u4 = np.hstack(cl)
-##    print len(u1)
-##    print len(u2)
-##    print len(u3)
-##    print len(u4)
-    w = np.hstack(cd)
-##    print len(w)
-    u1 = u1.astype(np.float)
-    u2 = u2.astype(np.float)
-    u3 = u3.astype(np.float)
-    w = w.astype(np.float)
+    data = polar_dataset("blade.c%s.Re%dk.M%s.pol", thick_range, re_range, M_range,
+                         tau_scale=1./1000)
+    # drop unconverged points and the CL = 0 point
+    data = data[(data[:, 4] != 0) & (data[:, 3] != 0)]
+    u1 = data[:, 1]
+    u2 = data[:, 0]
+    u3 = data[:, 2]
+    u4 = data[:, 3]
+    w = data[:, 4]
     u = [u1, u2, u3, u4]
     x = np.log(u)
     y = np.log(w)
@@ -104,6 +63,12 @@ def make_fit(thick_range, re_range, M_range):
     cstrt, rms = fit(x, y, 4, 'SMA')
     print "RMS"
     print rms
+    # store it as the next version of the wing_cdp fit
+    inputs = ['Re/1000', 'tau', 'cos(Lambda)M', 'CL']
+    source = ('model_fitting/Wing_Fits/TASOPT_c_series_airfoil_fits.py, '
+              'blade.c%s-c%s polars' % (thick_range[0], thick_range[-1]))
+    print write_gpfit('wing_cdp', cstrt, rms, 'CDp', inputs, data_ranges(x, inputs),
+                      source, 'TASOPT c series airfoil profile drag fit', hull=data_hull(x.T))
 
 def plot_fits(thick_range, re_range, M_range, cl_range):
     "plot fit compared to data"
@@ -118,7 +83,7 @@ def plot_fits(thick_range, re_range, M_range, cl_range):
 ##                cl = []
 ##                
 ##                r = re_range[i]
-##                dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+##                dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
 ##                if len(dataf["CL"]) != 0:
 ##                    cd.append(dataf["CD"])
 ##                    cl.append(dataf["CL"])
@@ -139,7 +104,7 @@ def plot_fits(thick_range, re_range, M_range, cl_range):
 ##                cl = []
 ##                
 ##                r = re_range[i]
-##                dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+##                dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
 ##                if len(dataf["CL"]) != 0:
 ##                    cd.append(dataf["CD"])
 ##                    cl.append(dataf["CL"])
@@ -161,7 +126,7 @@ def plot_fits(thick_range, re_range, M_range, cl_range):
 ##                m_vec = []
 ##                cl = []
 ##                for m in M_range:
-##                    dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+##                    dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
 ##                    for j in range(len(dataf["CL"])):
 ##                        if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
 ##                            cd.append(dataf["CD"][j])
@@ -190,7 +155,7 @@ def plot_fits(thick_range, re_range, M_range, cl_range):
                 w = []
                 for m in M_range:
                     ms = res = np.linspace(M_range[0], M_range[-1], len(res))
-                    dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                    dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                     for j in range(len(dataf["CL"])):
                         if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
                             cd.append(dataf["CD"][j])
@@ -222,7 +187,7 @@ def plot_fits(thick_range, re_range, M_range, cl_range):
 ##                cl = []
 ##                re_plot = []
 ##                for r in re_range:
-##                    dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+##                    dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
 ##                    for j in range(len(dataf["CL"])):
 ##                        if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
 ##                            cd.append(dataf["CD"][j])
@@ -250,7 +215,7 @@ def plot_data(thick_range, re_range, M_range, cl_range):
                 cl = []
                 
                 r = re_range[i]
-                dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CL"]) != 0:
                     cd.append(dataf["CD"])
                     cl.append(dataf["CL"])
@@ -271,7 +236,7 @@ def plot_data(thick_range, re_range, M_range, cl_range):
                 cl = []
                 
                 r = re_range[i]
-                dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                 if len(dataf["CL"]) != 0:
                     cd.append(dataf["CD"])
                     cl.append(dataf["CL"])
@@ -293,7 +258,7 @@ def plot_data(thick_range, re_range, M_range, cl_range):
                 m_vec = []
                 cl = []
                 for m in M_range:
-                    dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                    dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                     for j in range(len(dataf["CL"])):
                         if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
                             cd.append(dataf["CD"][j])
@@ -317,7 +282,7 @@ def plot_data(thick_range, re_range, M_range, cl_range):
                     m_vec = []
                     cl = []
                     for m in M_range:
-                        dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                        dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                         for j in range(len(dataf["CL"])):
                             if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
                                 cd.append(dataf["CD"][j])
@@ -344,7 +309,7 @@ def plot_data(thick_range, re_range, M_range, cl_range):
                 cl = []
                 re_plot = []
                 for r in re_range:
-                    dataf = text_to_df("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
+                    dataf = polar_columns("blade.c%s.Re%dk.M%s.pol" % (n, r, m))
                     for j in range(len(dataf["CL"])):
                         if dataf["CL"][j] <= cl_range[i]+0.01 and dataf["CL"][j] >= cl_range[i]-0.01:
                             cd.append(dataf["CD"][j])
@@ -0,0 +1,225 @@
+"""
+Writes fitted constraints as versioned, importable modules in the fits package
+"""
+
+import os
+import sys
+
+FITDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "fits")
+
+TEMPLATE = '''"%(name)s: %(description)s"
+# generated by model_fitting/fit_codegen.py, do not edit by hand
+
+TYPE = %(Type)r
+OUTPUT = %(output)r
+INPUTS = %(inputs)s
+ALPHA = %(alpha)s
+C = [
+%(C)s
+]
+EXPONENTS = [
+%(exponents)s
+]
+RANGES = {
+%(ranges)s
+}
+RMS = %(rms)r
+SOURCE = %(source)r
+'''
+
+# optional convex hull of the training data in log space, A*log(u) + b <= 0
+HULL_TEMPLATE = '''HULL_A = [
+%(A)s
+]
+HULL_B = [%(b)s]
+'''
+
+def _num(value):
+    "shortest repr of a float that round trips (same in python 2 and 3)"
+    return repr(float(value))
+
+def fit_source(name, Type, output, inputs, alpha, C, exponents, ranges=None,
+               rms=None, source="", description="", hull=None):
+    """
+    Returns the source code of a fit module
+
+    ARGUMENTS
+    ---------
+    name: module name, e.g. 'wing_cdp_v2'
+    Type: 'SMA', 'ISMA' or 'MA'
+    output: name of the fitted quantity
+    inputs: list of input names
+    alpha: output exponent (SMA), list of per term output exponents (ISMA),
+           or 1 (MA)
+    C: list of term coefficients
+    exponents: list of per term lists of input exponents
+    ranges: dictionary of input name to (min, max) training values
+    rms: RMS error of the fit
+    source: training data and script
+    description: one line description
+    hull: (optional) (A, b) halfspaces of the training data hull in log space,
+          see fit_validity.data_hull
+    """
+    if ranges is None:
+        ranges = {}
+    if Type == 'ISMA':
+        alpha = "[%s]" % ", ".join(_num(a) for a in alpha)
+    else:
+        alpha = _num(alpha)
+    code = TEMPLATE % {
+        'name': name,
+        'description': description,
+        'Type': str(Type),
+        'output': str(output),
+        'inputs': "[%s]" % ", ".join(repr(str(i)) for i in inputs),
+        'alpha': alpha,
+        'C': "\n".join("    %s," % _num(c) for c in C),
+        'exponents': "\n".join("    [%s]," % ", ".join(_num(e) for e in exps)
+                               for exps in exponents),
+        'ranges': "\n".join("    %r: %s," % (str(i), None if ranges.get(i) is None else
+                                              "(%s, %s)" % (_num(ranges[i][0]),
+                                                            _num(ranges[i][1])))
+                            for i in inputs),
+        'rms': None if rms is None else float(rms),
+        'source': str(source),
+    }
+    if hull is not None:
+        A, b = hull
+        code += HULL_TEMPLATE % {
+            'A': "\n".join("    [%s]," % ", ".join(_num(a) for a in row) for row in A),
+            'b': ", ".join(_num(v) for v in b)}
+    return code
+
+def write_fit(slot, Type, output, inputs, alpha, C, exponents, ranges=None,
+              rms=None, source="", description="", fitdir=FITDIR, hull=None):
+    """
+    Writes a fit as the next version of a slot in the fits package
+
+    See fit_source for the arguments.
+
+    RETURNS
+    -------
+    name of the written module, e.g. 'wing_cdp_v2'
+    """
+    version = 0
+    for filename in os.listdir(fitdir):
+        if filename.startswith(slot + "_v") and filename.endswith(".py"):
+            number = filename[len(slot) + 2:-3]
+            if number.isdigit():
+                version = max(version, int(number) + 1)
+    name = "%s_v%i" % (slot, version)
+    with open(os.path.join(fitdir, name + ".py"), "w") as f:
+        f.write(fit_source(name, Type, output, inputs, alpha, C, exponents,
+                           ranges, rms, source, description, hull))
+    return name
+
+def read_fit(name, fitdir=FITDIR):
+    "returns the fit_source arguments of an existing fit module"
+    filename = os.path.join(fitdir, name + ".py")
+    fit = {}
+    with open(filename) as f:
+        exec(compile(f.read(), filename, 'exec'), fit)
+    return {'Type': fit['TYPE'], 'output': fit['OUTPUT'], 'inputs': fit['INPUTS'],
+            'alpha': fit['ALPHA'], 'C': fit['C'], 'exponents': fit['EXPONENTS'],
+            'ranges': fit['RANGES'], 'rms': fit['RMS'], 'source': fit['SOURCE'],
+            'description': fit['__doc__'].split(": ", 1)[1],
+            'hull': (fit['HULL_A'], fit['HULL_B']) if 'HULL_A' in fit else None}
+
+def rewrite_fit(name, fitdir=FITDIR, **changes):
+    """
+    Writes an existing fit module again with some of its fields changed
+
+    ARGUMENTS
+    ---------
+    name: module name, e.g. 'wing_cdp_v1'
+    changes: fit_source arguments to replace, e.g. ranges and hull
+    """
+    fields = read_fit(name, fitdir)
+    fields.update(changes)
+    with open(os.path.join(fitdir, name + ".py"), "w") as f:
+        f.write(fit_source(name, **fields))
+
+def terms_from_gpfit(cstrt, ninputs):
+    """
+    Extracts the terms of a gpfit constraint
+
+    gpfit names the inputs u_1 ... u_n and the output w. Each constraint is
+    turned into posynomials p <= 1, whose terms are c * u**a * w**-alpha.
+
+    ARGUMENTS
+    ---------
+    cstrt: constraint returned by gpfit.fit.fit
+    ninputs: number of fit inputs
+
+    RETURNS
+    -------
+    Type: 'SMA', 'ISMA' or 'MA'
+    alpha, C, exponents: as taken by write_fit
+    """
+    if isinstance(cstrt, (list, tuple)):
+        constraints = cstrt
+    elif hasattr(cstrt, 'flat'):
+        constraints = cstrt.flat()
+    else:
+        # a single (S)MA inequality
+        constraints = [cstrt]
+    posys = []
+    for constraint in constraints:
+        posys += constraint.as_posyslt1()
+    C, exponents, alphas = [], [], []
+    for posy in posys:
+        for exp, c in zip(posy.exps, posy.cs):
+            byname = dict((key.name, float(e)) for key, e in exp.items())
+            alphas.append(-byname.get('w', 0.))
+            exponents.append([byname.get('u_%i' % (i + 1), 0.)
+                              for i in range(ninputs)])
+            C.append(float(getattr(c, 'magnitude', c)))
+    if len(posys) > 1:
+        # max affine: one monomial constraint w >= c*u**a per term
+        return 'MA', 1., C, exponents
+    if len(set(alphas)) == 1:
+        # output on its own, p = posy/w**alpha
+        return 'SMA', alphas[0], C, exponents
+    return 'ISMA', alphas, C, exponents
+
+def write_gpfit(slot, cstrt, rms, output, inputs, ranges=None, source="",
+                description="", fitdir=FITDIR, hull=None):
+    """
+    Writes the constraint returned by gpfit.fit.fit as a fit module
+
+    RETURNS
+    -------
+    name of the written module
+    """
+    Type, alpha, C, exponents = terms_from_gpfit(cstrt, len(inputs))
+    return write_fit(slot, Type, output, inputs, alpha, C, exponents, ranges,
+                     rms, source, description, fitdir, hull)
+
+def data_ranges(x, inputs):
+    """
+    Returns the training range of each input from the log space fit data
+    (as returned by the fit_setup functions)
+    """
+    import numpy as np
+    x = np.exp(np.atleast_2d(x))
+    return dict((name, (float(row.min()), float(row.max())))
+                for name, row in zip(inputs, x))
+
+def test():
+    "checks that every stored fit is exactly what fit_source writes for it"
+    for filename in sorted(os.listdir(FITDIR)):
+        if filename == "__init__.py" or not filename.endswith(".py"):
+            continue
+        name = filename[:-3]
+        with open(os.path.join(FITDIR, filename)) as f:
+            assert f.read() == fit_source(name, **read_fit(name)), \
+                "%s was edited by hand; write it with rewrite_fit" % name
+
+if __name__ == "__main__":
+    # refit the TASOPT c series wing drag fit and store it as a new version
+    # the fitting scripts read their polars from the working directory
+    os.chdir(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Wing_Fits"))
+    sys.path.append(os.getcwd())
+    from TASOPT_c_series_airfoil_fits import make_fit
+    make_fit(["100", "110", "120", "130", "140", "145"], range(10000, 35000, 5000),
+             [0.4, 0.5, 0.6, 0.7, 0.8, 0.9])
@@ -0,0 +1,150 @@
+"""
+Model selection for GP compatible fits over the number of terms and fit type
+"""
+
+from time import time
+from multiprocessing import Pool
+import numpy as np
+from gpfit.fit import fit
+
+# gpfit fit types, in order of preference when RMS and size tie
+TYPES = ['SMA', 'ISMA', 'MA']
+
+def fit_size(K, Type):
+    """
+    Returns the (monomial terms, constraints) a K term fit adds to the GP
+
+    MA fits are K monomial constraints, SMA and ISMA fits are a single
+    posynomial constraint with K terms.
+    """
+    if Type == 'MA':
+        return K, K
+    return K, 1
+
+def _fit_worker(args):
+    "fits one (K, Type) combination (module level so it pickles)"
+    x, y, K, Type, seed = args
+    np.random.seed(seed)
+    starttime = time()
+    try:
+        _, rms = fit(x, y, K, Type)
+        rms = float(rms)
+    except Exception:
+        # a failed fit just drops out of the selection
+        rms = np.nan
+    terms, constraints = fit_size(K, Type)
+    return {'K': K, 'Type': Type, 'rms': rms, 'terms': terms,
+            'constraints': constraints, 'time': time() - starttime}
+
+def fit_candidates(x, y, Ks=range(1, 7), types=TYPES, processes=None, seed=0):
+    """
+    Fits every (K, Type) combination in a process pool
+
+    ARGUMENTS
+    ---------
+    x, y: log space fit data, as returned by the fit_setup functions
+    Ks: numbers of terms to try
+    types: gpfit fit types to try
+    processes: number of worker processes (default: cpu count, 1 for serial)
+    seed: random seed of every fit, so results are repeatable
+
+    RETURNS
+    -------
+    list of dictionaries with K, Type, rms, terms, constraints and fit time [s]
+    """
+    jobs = [(x, y, K, Type, seed) for Type in types for K in Ks]
+    if processes == 1:
+        return [_fit_worker(job) for job in jobs]
+    pool = Pool(processes)
+    try:
+        return pool.map(_fit_worker, jobs)
+    finally:
+        pool.close()
+        pool.join()
+
+def recommend(results, budget):
+    """
+    Returns the cheapest fit with an RMS error within budget
+
+    Fits are ranked by monomial terms, then constraints, then RMS error;
+    returns None if no fit meets the budget.
+    """
+    feasible = [r for r in results if np.isfinite(r['rms']) and r['rms'] <= budget]
+    if not feasible:
+        return None
+    return min(feasible, key=lambda r: (r['terms'], r['constraints'], r['rms'],
+                                        TYPES.index(r['Type'])
+                                        if r['Type'] in TYPES else len(TYPES)))
+
+def select_fit(x, y, budget, Ks=range(1, 7), types=TYPES, processes=None,
+               seed=0, verbose=True):
+    """
+    Fits every candidate, recommends the cheapest fit within the error budget
+    and refits it in this process so its constraint can be used directly
+
+    ARGUMENTS
+    ---------
+    x, y: log space fit data
+    budget: largest acceptable RMS error
+    Ks, types, processes, seed: see fit_candidates
+    verbose: print the RMS error against term count table
+
+    RETURNS
+    -------
+    results: list of all candidates (see fit_candidates)
+    best: recommended candidate, None if nothing meets the budget
+    cstrt: gpfit constraint of the recommended fit (None if best is None)
+    """
+    results = fit_candidates(x, y, Ks, types, processes, seed)
+    best = recommend(results, budget)
+    if verbose:
+        print_table(results, best)
+    cstrt = None
+    if best is not None:
+        np.random.seed(seed)
+        cstrt, _ = fit(x, y, best['K'], best['Type'])
+    return results, best, cstrt
+
+def print_table(results, best=None):
+    "prints RMS error against term count for every candidate"
+    print("%-5s %3s %6s %6s %12s %8s" % ("Type", "K", "terms", "constr",
+                                         "RMS", "t [s]"))
+    for r in sorted(results, key=lambda r: (r['terms'], r['constraints'], r['rms'])):
+        print("%-5s %3i %6i %6i %12.6g %8.2f %s" % (
+            r['Type'], r['K'], r['terms'], r['constraints'], r['rms'],
+            r['time'], "<--" if r is best else ""))
+
+def plot_selection(results, budget=None, filename=None):
+    "plots RMS error against monomial term count for each fit type"
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots()
+    for Type in TYPES:
+        rs = sorted([r for r in results if r['Type'] == Type], key=lambda r: r['terms'])
+        if rs:
+            ax.semilogy([r['terms'] for r in rs], [r['rms'] for r in rs], "-o",
+                        label=Type)
+    if budget is not None:
+        ax.axhline(budget, color="k", ls="--", label="budget")
+    ax.set_xlabel("Monomial terms")
+    ax.set_ylabel("RMS error")
+    ax.legend()
+    ax.grid()
+    if filename:
+        fig.savefig(filename, bbox_inches="tight")
+    return fig, ax
+
+if __name__ == "__main__":
+    import os
+    from xfoil_polars import polar_dataset
+
+    # TASOPT c series wing drag fit (wing.WingPerformance uses the 4 term SMA)
+    data = polar_dataset("blade.c%s.Re%dk.M%s.pol",
+                         ["100", "110", "120", "130", "140", "145"],
+                         range(10000, 35000, 5000),
+                         [0.4, 0.5, 0.6, 0.7, 0.8, 0.9], tau_scale=1./1000,
+                         directory=os.path.join(os.path.dirname(
+                             os.path.abspath(__file__)), "Wing_Fits"))
+    data = data[(data[:, 4] != 0) & (data[:, 3] != 0)]
+    x = np.log([data[:, 1], data[:, 0], data[:, 2], data[:, 3]])
+    y = np.log(data[:, 4])
+    select_fit(x, y, budget=0.06)
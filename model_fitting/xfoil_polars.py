@@ -0,0 +1,190 @@
+"""
+Shared XFOIL polar reader with a persistent, mtime invalidated dataset cache
+
+(named xfoil_polars rather than polars so it does not shadow the polars
+dataframe package on the path of the fit scripts)
+"""
+
+import os
+import json
+import hashlib
+from collections import OrderedDict
+from multiprocessing import Pool
+import numpy as np
+
+# columns of the cached dataset
+COLUMNS = ['tau', 'Re', 'M', 'CL', 'CD']
+
+# directory (relative to the polar files) holding cached datasets
+CACHEDIR = '.polar_cache'
+
+# below this many files parsing in a process pool is not worth the startup
+MINPARALLEL = 64
+
+def read_polar(filename):
+    """
+    Reads an XFOIL polar file
+
+    The table is located by the '---' line under the column titles and
+    parsed in a single numpy call instead of line by line.
+
+    ARGUMENTS
+    ---------
+    filename: path of the .pol file
+
+    RETURNS
+    -------
+    titles: list of column titles (alpha, CL, CD, CDp, CM, Top_Xtr, Bot_Xtr)
+    table: (npoints, ncolumns) array, empty if XFOIL did not converge
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    start = None
+    for i, line in enumerate(lines):
+        if "---" in line:
+            start = i
+    if start is None:
+        raise ValueError("%s is not an XFOIL polar" % filename)
+    titles = lines[start-1].split()
+    values = np.array(" ".join(lines[start+1:]).split(), dtype=float)
+    return titles, values.reshape(-1, len(titles))
+
+def polar_columns(filename):
+    "returns {title: column array} of an XFOIL polar, e.g. polar_columns(f)['CD']"
+    titles, table = read_polar(filename)
+    return OrderedDict((title, table[:, j]) for j, title in enumerate(titles))
+
+def _read_cl_cd(filename):
+    "returns the CL and CD columns of a polar (module level so it pickles)"
+    titles, table = read_polar(filename)
+    return table[:, titles.index('CL')], table[:, titles.index('CD')]
+
+def polar_files(template, thick_range, re_range, M_range, tau_scale=1.):
+    """
+    Lists the polar files of a sweep with the parameters of each file
+
+    ARGUMENTS
+    ---------
+    template: filename template taking (thickness, Re [k], M),
+              e.g. "blade.c%s.Re%dk.M%s.pol"
+    thick_range, re_range, M_range: sweep values, as in the fit scripts
+    tau_scale: tau = float(thickness)*tau_scale (1/1000 for blade.c100 = 0.1)
+
+    RETURNS
+    -------
+    list of (filename, tau, Re, M), in the M, thickness, Re loop order of
+    the fit scripts
+    """
+    files = []
+    for m in M_range:
+        for n in thick_range:
+            for r in re_range:
+                files.append((template % (n, r, m), float(n)*tau_scale,
+                              float(r), float(m)))
+    return files
+
+def polar_dataset(template, thick_range, re_range, M_range, tau_scale=1.,
+                  directory='.', cache=True, processes=None):
+    """
+    Loads every polar of a sweep into a single (npoints, 5) array with the
+    columns tau, Re, M, CL, CD
+
+    The dataset is cached as a .npy file next to the polars and memory mapped
+    on later calls; the cache is rebuilt when any polar file of the sweep is
+    added, removed or modified (by mtime).
+
+    ARGUMENTS
+    ---------
+    template, thick_range, re_range, M_range, tau_scale: see polar_files
+    directory: directory holding the polar files
+    cache: whether to read and write the cache
+    processes: number of parsing processes (default: cpu count)
+
+    RETURNS
+    -------
+    (npoints, 5) array, read only when loaded from the cache
+    """
+    files = polar_files(template, thick_range, re_range, M_range, tau_scale)
+    paths = [os.path.join(directory, f[0]) for f in files]
+    mtimes = dict((f[0], os.path.getmtime(p)) for f, p in zip(files, paths))
+
+    if cache:
+        key = hashlib.md5(json.dumps([template, [str(n) for n in thick_range],
+                                      [str(r) for r in re_range],
+                                      [str(m) for m in M_range],
+                                      tau_scale]).encode()).hexdigest()
+        cachedir = os.path.join(directory, CACHEDIR)
+        datafile = os.path.join(cachedir, key + '.npy')
+        metafile = os.path.join(cachedir, key + '.json')
+        if os.path.exists(datafile) and os.path.exists(metafile):
+            with open(metafile) as f:
+                if json.load(f) == mtimes:
+                    return np.load(datafile, mmap_mode='r')
+
+    if processes != 1 and len(paths) >= MINPARALLEL:
+        pool = Pool(processes)
+        try:
+            polars = pool.map(_read_cl_cd, paths)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        polars = [_read_cl_cd(p) for p in paths]
+
+    npoints = sum(len(cl) for cl, _ in polars)
+    data = np.empty((npoints, len(COLUMNS)))
+    i = 0
+    for (_, tau, re, m), (cl, cd) in zip(files, polars):
+        j = i + len(cl)
+        data[i:j, 0] = tau
+        data[i:j, 1] = re
+        data[i:j, 2] = m
+        data[i:j, 3] = cl
+        data[i:j, 4] = cd
+        i = j
+
+    if cache:
+        if not os.path.isdir(cachedir):
+            os.makedirs(cachedir)
+        np.save(datafile, data)
+        with open(metafile, 'w') as f:
+            json.dump(mtimes, f)
+    return data
+
+def clear_cache(directory='.'):
+    "removes every cached dataset in a polar directory"
+    cachedir = os.path.join(directory, CACHEDIR)
+    if os.path.isdir(cachedir):
+        for filename in os.listdir(cachedir):
+            os.remove(os.path.join(cachedir, filename))
+
+def test():
+    "parses a small XFOIL polar sweep, directly and through the cache"
+    import shutil
+    import tempfile
+    header = ["", "       XFOIL         Version 6.99", "",
+              " Calculated polar for: blade", "",
+              " Mach =   0.700     Re =     5.000 e 6     Ncrit =   9.000", "",
+              "   alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr",
+              "  ------- -------- --------- --------- -------- -------- --------"]
+    rows = {'t10': ["   0.000   0.5000   0.00800   0.00300  -0.1000   0.5000   0.6000",
+                    "   1.000   0.6200   0.00850   0.00350  -0.1010   0.4800   0.6100"],
+            't12': []}
+    directory = tempfile.mkdtemp()
+    try:
+        for n, lines in rows.items():
+            with open(os.path.join(directory, "blade.%s.Re5000k.M0.7.pol" % n), 'w') as f:
+                f.write("\n".join(header + lines) + "\n")
+        columns = polar_columns(os.path.join(directory, "blade.t10.Re5000k.M0.7.pol"))
+        assert list(columns)[:3] == ['alpha', 'CL', 'CD']
+        assert np.allclose(columns['CD'], [0.008, 0.0085])
+        titles, table = read_polar(os.path.join(directory, "blade.t12.Re5000k.M0.7.pol"))
+        assert table.shape == (0, len(titles))
+        for _ in range(2):
+            data = polar_dataset("blade.t%s.Re%dk.M%s.pol", ['10', '12'], [5000], ['0.7'],
+                                 tau_scale=0.01, directory=directory)
+            assert np.allclose(data, [[0.1, 5000, 0.7, 0.5, 0.008],
+                                      [0.1, 5000, 0.7, 0.62, 0.0085]])
+        assert len(os.listdir(os.path.join(directory, CACHEDIR))) == 2
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,328 @@
+"""
+Monte Carlo uncertainty propagation over technology and margin factors
+
+    python monte_carlo.py optimal737 2000 samples.csv
+
+Samples are drawn from distributions over substitutions (the weight margin
+factors by default) and solved in a process pool, each worker building the
+model once and warm starting every sample from the nominal design (see
+batch_solve). Each sample is appended to a CSV file with one column per
+input and output as soon as it is solved, and the running mean and
+percentiles are checked every few samples so the run stops once they are
+stable.
+"""
+
+import os
+import csv
+import numpy as np
+from multiprocessing import Pool
+
+from batch_solve import _init_sp_worker, _sp_worker
+
+# substitution: (distribution, parameters), see sample; values must stay positive
+DISTRIBUTIONS = {
+    'C_{wing}': ('normal', 1., 0.05),
+    'C_{ht}': ('normal', 1., 0.05),
+    'C_{VT}': ('normal', 1., 0.05),
+    'C_{fuse}': ('normal', 1., 0.05),
+    'C_{engsys}': ('normal', 1., 0.05),
+    'C_{lg}': ('normal', 1., 0.05),
+}
+
+# scalar outputs collected for every sample
+OUTPUTS = ['W_{f_{total}}', 'W_{total}', 'W_{dry}', 'b', 'AR']
+
+PERCENTILES = [5, 50, 95]
+
+def sample(distributions, n, seed=None):
+    """
+    Draws samples of substitutions
+
+    ARGUMENTS
+    ---------
+    distributions: dictionary of substitution name to one of
+                   ('normal', mean, standard deviation)
+                   ('lognormal', median, standard deviation of the log)
+                   ('uniform', low, high)
+                   ('triangular', low, mode, high)
+    n: number of samples
+    seed: random seed
+
+    RETURNS
+    -------
+    dictionary of name to array of n values
+    """
+    rng = np.random.RandomState(seed)
+    samples = {}
+    for name in sorted(distributions):
+        kind, params = distributions[name][0], distributions[name][1:]
+        if kind == 'normal':
+            values = rng.normal(params[0], params[1], n)
+        elif kind == 'lognormal':
+            values = params[0]*np.exp(rng.normal(0., params[1], n))
+        elif kind == 'uniform':
+            values = rng.uniform(params[0], params[1], n)
+        elif kind == 'triangular':
+            values = rng.triangular(params[0], params[1], params[2], n)
+        else:
+            raise ValueError("unknown distribution %s" % kind)
+        if np.any(values <= 0):
+            raise ValueError("%s has non-positive samples" % name)
+        samples[name] = values
+    return samples
+
+class RunningStatistics(object):
+    """
+    Mean, standard error and percentiles of each output over the samples
+    solved so far, with the estimates kept at every checkpoint
+    """
+    def __init__(self, names, percentiles=PERCENTILES):
+        self.names = list(names)
+        self.percentiles = list(percentiles)
+        self.values = dict((name, []) for name in self.names)
+        self.history = []
+
+    def __len__(self):
+        return len(self.values[self.names[0]]) if self.names else 0
+
+    def add(self, outputs):
+        "adds the outputs of one solved sample"
+        for name in self.names:
+            self.values[name].append(float(outputs[name]))
+
+    def estimates(self):
+        "returns {output: {n, mean, std, sem, p<percentile>...}}"
+        out = {}
+        for name in self.names:
+            v = np.array(self.values[name])
+            est = {'n': len(v), 'mean': v.mean(), 'std': v.std(ddof=1) if len(v) > 1 else np.nan}
+            est['sem'] = est['std']/np.sqrt(len(v))
+            for p, value in zip(self.percentiles, np.percentile(v, self.percentiles)):
+                est['p%g' % p] = value
+            out[name] = est
+        return out
+
+    def checkpoint(self):
+        "stores the current estimates and returns them"
+        estimates = self.estimates()
+        self.history.append(estimates)
+        return estimates
+
+    def converged(self, rtol, window=3):
+        """
+        True when the standard error of every mean is below rtol of the mean
+        and no mean or percentile moved by more than rtol over the last
+        window checkpoints
+        """
+        if len(self.history) < window + 1:
+            return False
+        last = self.history[-1]
+        for name in self.names:
+            if not last[name]['sem'] < rtol*abs(last[name]['mean']):
+                return False
+            for stat in ['mean'] + ['p%g' % p for p in self.percentiles]:
+                ref = last[name][stat]
+                for est in self.history[-window - 1:-1]:
+                    if abs(est[name][stat] - ref) > rtol*abs(ref):
+                        return False
+        return True
+
+def _write_row(writer, f, row):
+    writer.writerow(row)
+    f.flush()
+
+def _next_sample(filename, header):
+    """
+    Returns the index of the next sample appended to a CSV file, None if the
+    file is new or empty
+
+    Raises ValueError if the file has other columns than header.
+    """
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        rows = list(csv.reader(f))
+    if not rows:
+        return None
+    if rows[0] != header:
+        raise ValueError("%s has columns %s, not %s" % (filename, rows[0], header))
+    return max([int(row[0]) + 1 for row in rows[1:] if row] + [0])
+
+def monte_carlo(config, distributions=DISTRIBUTIONS, outputs=OUTPUTS, nsamples=1000,
+                filename=None, processes=None, seed=0, rtol=0.005, check_every=20,
+                window=3, min_samples=100, Nclimb=3, Ncruise=2):
+    """
+    Propagates substitution uncertainty through a production configuration
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    distributions: see sample
+    outputs: scalar variable names to collect (in their model units)
+    nsamples: maximum number of samples
+    filename: (optional) CSV file the samples are appended to as they are solved;
+              an existing file must have the same columns, and the samples
+              appended to it are numbered on from its last sample and drawn
+              from the seed sequence (seed, first new sample number), so a
+              rerun adds new samples rather than repeating the earlier ones
+    processes: worker processes (default: cpu count, 1 for serial)
+    rtol, window: convergence tolerance, see RunningStatistics.converged;
+                  None runs every sample
+    check_every: samples between checkpoints of the running statistics
+    min_samples: samples solved before stopping early
+
+    RETURNS
+    -------
+    dictionary with the inputs and outputs {name: array over solved
+    samples}, status (list over attempted samples), the final estimates,
+    the checkpoint history and whether the run converged
+    """
+    names = sorted(distributions)
+    header = ['sample', 'status'] + names + list(outputs)
+    start = _next_sample(filename, header) if filename else None
+    if start and seed is not None:
+        seed = [seed, start]
+    inputs = sample(distributions, nsamples, seed)
+    jobs = [(dict((name, inputs[name][i]) for name in names), list(outputs))
+            for i in range(nsamples)]
+    stats = RunningStatistics(outputs)
+    solved, status = [], []
+    converged = False
+
+    f = writer = None
+    if filename:
+        f = open(filename, 'a')
+        writer = csv.writer(f)
+        if start is None:
+            _write_row(writer, f, header)
+
+    if processes == 1:
+        pool = None
+        _init_sp_worker(config, Nclimb, Ncruise)
+        results = (_sp_worker(job) for job in jobs)
+    else:
+        pool = Pool(processes, _init_sp_worker, (config, Nclimb, Ncruise))
+        results = pool.imap(_sp_worker, jobs)
+    try:
+        for i, result in enumerate(results):
+            status.append(result['status'])
+            ok = 'cost' in result
+            if ok:
+                solved.append(i)
+                stats.add(result['outputs'])
+            if writer:
+                _write_row(writer, f, [(start or 0) + i, result['status']] + [inputs[name][i] for name in names]
+                           + [result['outputs'][name] if ok else np.nan for name in outputs])
+            if ok and len(stats) % check_every == 0:
+                stats.checkpoint()
+                if (rtol is not None and len(stats) >= min_samples
+                        and stats.converged(rtol, window)):
+                    converged = True
+                    break
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if f:
+            f.close()
+
+    return {'inputs': dict((name, inputs[name][solved]) for name in names),
+            'outputs': dict((name, np.array(stats.values[name])) for name in outputs),
+            'status': status, 'estimates': stats.estimates() if len(stats) else {},
+            'history': stats.history, 'converged': converged}
+
+def load_samples(filename):
+    """
+    Reads a Monte Carlo CSV file
+
+    RETURNS
+    -------
+    dictionary of column name to array (status as a list)
+    """
+    with open(filename) as f:
+        rows = list(csv.DictReader(f))
+    out = {}
+    for name in (rows[0].keys() if rows else []):
+        values = [row[name] for row in rows]
+        out[name] = values if name == 'status' else np.array(values, dtype=float)
+    return out
+
+def summary(result):
+    "prints the estimates of a monte_carlo run"
+    nsolved = sum(s == 'optimal' for s in result['status'])
+    print("%i of %i samples solved, %s" % (
+        nsolved, len(result['status']), "converged" if result['converged'] else "not converged"))
+    for name, est in sorted(result['estimates'].items()):
+        print("    %-16s mean %.5g +- %.2g  " % (name, est['mean'], est['sem'])
+              + "  ".join("p%g %.5g" % (p, est['p%g' % p]) for p in PERCENTILES))
+
+def test():
+    "draws samples, checks convergence of running statistics and reads a sample file"
+    import shutil
+    import tempfile
+    distributions = {'a': ('normal', 1., 0.05), 'b': ('lognormal', 2., 0.1),
+                     'c': ('uniform', 0.5, 1.5), 'd': ('triangular', 1., 2., 4.)}
+    samples = sample(distributions, 5000, seed=1)
+    assert sorted(samples) == ['a', 'b', 'c', 'd']
+    assert all(len(v) == 5000 for v in samples.values())
+    assert abs(samples['a'].mean() - 1.) < 0.005
+    assert abs(np.median(samples['b']) - 2.) < 0.02
+    assert samples['c'].min() >= 0.5 and samples['c'].max() <= 1.5
+    assert samples['d'].min() >= 1. and samples['d'].max() <= 4.
+    assert np.all(sample(distributions, 5000, seed=1)['b'] == samples['b'])
+    for bad in [('normal', 0., 1.), ('beta', 1., 1.)]:
+        try:
+            sample({'x': bad}, 100, seed=1)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("%s was sampled" % (bad,))
+
+    # a tight distribution converges once the window of checkpoints is stable
+    stats = RunningStatistics(['y'])
+    values = sample({'y': ('normal', 10., 0.01)}, 200, seed=2)['y']
+    for i, value in enumerate(values):
+        stats.add({'y': value})
+        if (i + 1) % 20 == 0:
+            stats.checkpoint()
+            assert stats.converged(1e-3) == (len(stats.history) > 3)
+    assert len(stats) == 200
+    assert not stats.converged(1e-6)
+    # a drifting mean does not converge
+    drifting = RunningStatistics(['y'])
+    for i in range(200):
+        drifting.add({'y': 1. + i})
+        if (i + 1) % 20 == 0:
+            drifting.checkpoint()
+    assert not drifting.converged(0.01)
+
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "samples.csv")
+        header = ['sample', 'status', 'a', 'W']
+        assert _next_sample(filename, header) is None
+        with open(filename, 'a') as f:
+            writer = csv.writer(f)
+            _write_row(writer, f, header)
+            _write_row(writer, f, [0, 'optimal', 1.02, 5e4])
+            _write_row(writer, f, [1, 'unknown', 0.97, np.nan])
+        loaded = load_samples(filename)
+        assert loaded['status'] == ['optimal', 'unknown']
+        assert loaded['sample'].tolist() == [0, 1]
+        assert loaded['W'][0] == 5e4 and np.isnan(loaded['W'][1])
+        assert _next_sample(filename, header) == 2
+        try:
+            _next_sample(filename, ['sample', 'status', 'b', 'W'])
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("appended to a file with other columns")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    import sys
+    config = sys.argv[1] if len(sys.argv) > 1 else 'optimal737'
+    nsamples = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    filename = sys.argv[3] if len(sys.argv) > 3 else None
+    summary(monte_carlo(config, nsamples=nsamples, filename=filename))
@@ -0,0 +1,288 @@
+"""
+Pareto frontiers between competing objectives by the epsilon constraint method
+
+    python pareto.py optimal737 W_{f_{total}} TotalTime
+
+The first objective is minimized with the others constrained below epsilon
+values, which are constants of one model built per worker, so moving along
+the frontier only changes substitutions. The frontier is traced in
+branches: contiguous runs of epsilon values (for a pair), or one epsilon
+slice of the third objective (for a triple), each solved in its own worker
+with every point warm started from its nearest solved neighbour. After the
+initial grid, points are added where the frontier bends most.
+"""
+
+import sys
+import numpy as np
+from time import time
+from collections import OrderedDict
+from multiprocessing import Pool, cpu_count
+
+from gpkit import Model, Variable, units
+from gpkit.small_scripts import mag
+
+# the objectives of objective_table; L/D is maximized, through its inverse
+OBJECTIVES = OrderedDict([
+    ('W_{f_{total}}', lambda m: m['W_{f_{total}}'].sum()),
+    ('W_{dry}', lambda m: m['W_{dry}'].sum()),
+    ('b', lambda m: m['b'].sum()),
+    ('AR', lambda m: m['AR'].sum()),
+    ('W_{engine}', lambda m: m['W_{engine}'].sum()),
+    ('TotalTime', lambda m: m['TotalTime'].sum()),
+    ('1/(L/D)', lambda m: (1/m['L/D'][m.Nclimb]).sum()),
+    ('W_{lg}', lambda m: m['W_{lg}'].sum()),
+])
+
+# epsilon of an inactive objective constraint, relative to no bound
+INACTIVE = 1e10
+
+def _unitstr(expr):
+    u = getattr(expr, 'units', None)
+    return str(getattr(u, 'units', u)) if u is not None else ""
+
+def _magnitude(value, unitstr):
+    if unitstr and hasattr(value, 'to'):
+        value = value.to(unitstr)
+    return float(np.sum(mag(value)))
+
+def epsilon_model(config, objectives, Nclimb=3, Ncruise=2):
+    """
+    Builds the epsilon constraint model of a production configuration
+
+    ARGUMENTS
+    ---------
+    objectives: names of OBJECTIVES; the first is minimized, the others
+                are bounded by constants named \\epsilon_{<name>}, in the
+                objective's units, initially inactive and never relaxed
+
+    RETURNS
+    -------
+    (relaxed model, {objective: expression}, {objective: units}, epsilon keys)
+    """
+    from SPaircraft import build_mission, relax_aircraft
+    m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise)
+    exprs = OrderedDict((name, OBJECTIVES[name](m)) for name in objectives)
+    unitstrs = dict((name, _unitstr(expr)) for name, expr in exprs.items())
+    constraints, epskeys = [], []
+    for name in objectives[1:]:
+        eps = Variable('\\epsilon_{%s}' % name, INACTIVE, '-', 'Epsilon bound on %s' % name)
+        ref = units(unitstrs[name]) if unitstrs[name] else 1.
+        constraints.append(exprs[name] <= eps*ref)
+        epskeys.append(eps.key)
+    m_eps = Model(exprs[objectives[0]], [m] + constraints)
+    m_relax = relax_aircraft(m_eps, substitutions, fixedBPR, pRatOpt,
+                             exclude=[key.name for key in epskeys])
+    return m_relax, exprs, unitstrs, epskeys
+
+def _solve(model, exprs, unitstrs, x0=None):
+    starttime = time()
+    sol = model.localsolve(verbosity=0, iteration_limit=200, reltol=0.01, x0=x0)
+    values = OrderedDict((name, _magnitude(sol(expr), unitstrs[name]))
+                         for name, expr in exprs.items())
+    return sol, values, time() - starttime
+
+def _anchor(job):
+    "minimizes one objective alone, returning every objective's value"
+    config, objective, objectives, Nclimb, Ncruise = job
+    order = [objective] + [name for name in objectives if name != objective]
+    model, exprs, unitstrs, _ = epsilon_model(config, order, Nclimb, Ncruise)
+    try:
+        _, values, soltime = _solve(model, exprs, unitstrs)
+    except Exception as error:
+        return {'objective': objective, 'status': 'error: %s' % error}
+    return {'objective': objective, 'status': 'optimal', 'values': values, 'time': soltime}
+
+_STATE = {}
+
+def _init_worker(config, objectives, Nclimb, Ncruise):
+    "builds the epsilon model and solves it unconstrained once per worker"
+    model, exprs, unitstrs, epskeys = epsilon_model(config, objectives, Nclimb, Ncruise)
+    sol, _, _ = _solve(model, exprs, unitstrs)
+    _STATE.update(model=model, exprs=exprs, unitstrs=unitstrs, epskeys=epskeys,
+                  nominal=sol['freevariables'], solved={})
+
+def _nearest(eps):
+    "free variables of the solved point nearest in log epsilon"
+    solved = _STATE['solved']
+    if not solved:
+        return _STATE['nominal']
+    logeps = np.log(eps)
+    key = min(solved, key=lambda k: np.sum((np.log(k) - logeps)**2))
+    return solved[key]
+
+def _branch(points):
+    "solves a branch of epsilon points in order, each from its nearest neighbour"
+    results = []
+    for eps in points:
+        eps = tuple(float(e) for e in eps)
+        for key, value in zip(_STATE['epskeys'], eps):
+            _STATE['model'].substitutions[key] = value
+        try:
+            sol, values, soltime = _solve(_STATE['model'], _STATE['exprs'],
+                                          _STATE['unitstrs'], _nearest(eps))
+        except Exception as error:
+            results.append({'eps': eps, 'status': 'error: %s' % error})
+            continue
+        _STATE['solved'][eps] = sol['freevariables']
+        results.append({'eps': eps, 'status': 'optimal', 'values': values, 'time': soltime})
+    return results
+
+def bends(x, y):
+    """
+    Turning angle [rad] at every interior point of a polyline, in
+    coordinates normalized to their range (0 at the ends)
+    """
+    x = (x - x.min())/max(np.ptp(x), 1e-30)
+    y = (y - y.min())/max(np.ptp(y), 1e-30)
+    angles = np.arctan2(np.diff(y), np.diff(x))
+    out = np.zeros(len(x))
+    out[1:-1] = np.abs(np.diff(angles))
+    return out
+
+def _slices(points, objectives):
+    "groups solved points by their epsilon on the third objective"
+    groups = OrderedDict()
+    for p in points:
+        if p['status'] == 'optimal':
+            groups.setdefault(p['eps'][1:], []).append(p)
+    return groups
+
+def refine_points(points, objectives, n):
+    """
+    Returns up to n new epsilon points, at the geometric middle of the
+    longer interval next to the points where the frontier bends most
+    """
+    candidates = []
+    for rest, group in _slices(points, objectives).items():
+        group = sorted(group, key=lambda p: p['eps'][0])
+        if len(group) < 3:
+            continue
+        x = np.log([p['values'][objectives[1]] for p in group])
+        y = np.log([p['values'][objectives[0]] for p in group])
+        e = np.array([p['eps'][0] for p in group])
+        for i, bend in enumerate(bends(x, y)):
+            if bend <= 0:
+                continue
+            j = i - 1 if np.hypot(x[i] - x[i-1], y[i] - y[i-1]) > \
+                np.hypot(x[i+1] - x[i], y[i+1] - y[i]) else i + 1
+            candidates.append((bend, (np.sqrt(e[i]*e[j]),) + rest))
+    candidates.sort(key=lambda c: -c[0])
+    new = []
+    for _, eps in candidates:
+        if eps not in new:
+            new.append(eps)
+        if len(new) == n:
+            break
+    return new
+
+def _branches(points, objectives, nbranches):
+    "splits epsilon points into branches solved in order by one worker"
+    points = sorted(points, key=lambda eps: eps[::-1])
+    if len(objectives) == 3:
+        groups = OrderedDict()
+        for eps in points:
+            groups.setdefault(eps[1:], []).append(eps)
+        return list(groups.values())
+    return [list(b) for b in np.array_split(points, min(nbranches, len(points))) if len(b)]
+
+def pareto_frontier(config, objectives, n=8, refine=8, rounds=2, processes=None,
+                    Nclimb=3, Ncruise=2):
+    """
+    Traces the Pareto frontier of two or three objectives
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    objectives: two or three names of OBJECTIVES, all minimized; the first
+                is the objective of every solve
+    n: epsilon values per constrained objective in the initial grid
+    refine: points added per refinement round, where the frontier bends most
+    rounds: refinement rounds
+    processes: worker processes (default: cpu count)
+
+    RETURNS
+    -------
+    dictionary with the anchors (each objective minimized alone), every
+    solved point (epsilon, values, status, time) and the frontier
+    {objective: array} of the non-dominated points
+    """
+    objectives = list(objectives)
+    if len(objectives) not in [2, 3]:
+        raise ValueError("pareto_frontier traces two or three objectives")
+    args = (config, objectives, Nclimb, Ncruise)
+    pool = Pool(processes)
+    try:
+        anchors = pool.map(_anchor, [(config, name, objectives, Nclimb, Ncruise)
+                                     for name in objectives])
+    finally:
+        pool.close()
+        pool.join()
+    failed = [a['objective'] for a in anchors if a['status'] != 'optimal']
+    if failed:
+        raise RuntimeError("anchor solves failed: %s" % ", ".join(failed))
+
+    # epsilon ranges: from each objective's own minimum to its worst anchor value
+    grids = []
+    for name in objectives[1:]:
+        low = min(a['values'][name] for a in anchors)
+        high = max(a['values'][name] for a in anchors)
+        grids.append(np.logspace(np.log10(low), np.log10(high), n + 2)[1:-1])
+    grid = [tuple(e) for e in np.array(np.meshgrid(*grids, indexing='ij')).reshape(len(grids), -1).T]
+
+    nbranches = processes or cpu_count()
+    pool = Pool(processes, _init_worker, args)
+    points = []
+    try:
+        for branch in pool.map(_branch, _branches(grid, objectives, nbranches)):
+            points.extend(branch)
+        for _ in range(rounds):
+            new = refine_points(points, objectives, refine)
+            if not new:
+                break
+            for branch in pool.map(_branch, _branches(new, objectives, nbranches)):
+                points.extend(branch)
+    finally:
+        pool.close()
+        pool.join()
+
+    return {'objectives': objectives, 'anchors': anchors, 'points': points,
+            'frontier': nondominated(points + anchors, objectives)}
+
+def nondominated(points, objectives):
+    "returns {objective: array} of the solved points no other point dominates"
+    values = np.array([[p['values'][name] for name in objectives]
+                       for p in points if p['status'] == 'optimal'])
+    keep = [i for i, v in enumerate(values)
+            if not np.any(np.all(values <= v, axis=1) & np.any(values < v, axis=1))]
+    values = values[keep][np.argsort(values[keep][:, 1])]
+    return OrderedDict((name, values[:, j]) for j, name in enumerate(objectives))
+
+def test():
+    "checks the frontier filter and the bend measure on synthetic points"
+    objectives = ['W_{f_{total}}', 'TotalTime']
+    points = [{'status': 'optimal', 'values': {'W_{f_{total}}': w, 'TotalTime': t}}
+              for w, t in [(3., 1.), (2., 2.), (1., 3.), (2.5, 2.5), (2., 2.)]]
+    points.append({'status': 'error: infeasible'})
+    frontier = nondominated(points, objectives)
+    assert list(frontier['TotalTime']) == [1., 2., 2., 3.]
+    assert list(frontier['W_{f_{total}}']) == [3., 2., 2., 1.]
+
+    x = np.array([0., 1., 2., 3.])
+    assert np.allclose(bends(x, x), 0)
+    angles = bends(x, np.array([0., 1., 2., 2.]))
+    assert angles[0] == angles[1] == angles[3] == 0
+    assert np.isclose(angles[2], np.arctan(1.5))
+    assert refine_points([], objectives, 4) == []
+
+if __name__ == "__main__":
+    config = sys.argv[1] if len(sys.argv) > 1 else 'optimal737'
+    objectives = sys.argv[2:] or ['W_{f_{total}}', 'TotalTime']
+    starttime = time()
+    result = pareto_frontier(config, objectives)
+    solves = len(result['points']) + len(result['anchors'])
+    print("%i solves in %.1f s, mean %.1f s per frontier point, %.1f s per anchor (cold)" % (
+        solves, time() - starttime,
+        np.mean([p['time'] for p in result['points'] if 'time' in p]),
+        np.mean([a['time'] for a in result['anchors']])))
+    for values in zip(*result['frontier'].values()):
+        print("    " + "  ".join("%s %.5g" % (name, v) for name, v in zip(objectives, values)))
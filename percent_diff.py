@@ -4,6 +4,96 @@ Method to compute and print percent differences between SP D8 model and TASOPT
 
 from gpkit.small_scripts import mag
 
+from tasopt_reference import reference
+
+# quantities compared against TASOPT, by section:
+#   (label, SP variable, units, TASOPT reference key (see tasopt_reference.reference))
+# per segment quantities are compared at the first cruise segment (TASOPT C1)
+SECTIONS = [
+    ("WEIGHT DIFFERENCES", [
+        ("Total Fuel Weight", 'W_{f_{total}}', 'lbf', ('airframe', 'Wfuel')),
+        ("Total Aircraft Weight", 'W_{total}', 'lbf', ('airframe', 'WMTO')),
+        ("Engine Weight", 'W_{engsys}', 'lbf', ('airframe', 'Weng')),
+        ("Fuselage Weight", 'W_{fuse}', 'lbf', ('airframe', 'Wfuse')),
+        ("Payload Weight", 'W_{payload}', 'lbf', ('airframe', 'Wpay')),
+        ("VT Weight", 'W_{vt}', 'lbf', ('airframe', 'Wvtail')),
+        ("HT Weight", 'W_{ht}', 'lbf', ('airframe', 'Whtail')),
+        ("Wing Weight", 'W_{wing}', 'lbf', ('airframe', 'Wwing')),
+        ]),
+    ("WING DIFFERENCES", [
+        ("Wing Span", 'b', 'ft', ('airframe', 'b')),
+        ("Wing Area", 'S', 'ft^2', ('airframe', 'S')),
+        ]),
+    ("HORIZONTAL TAIL DIFFERENCES", [
+        ("HT Area", 'S_{ht}', 'ft^2', ('airframe', 'Sh')),
+        ]),
+    ("VERTICAL TAIL DIFFERENCES", [
+        ("VT Span", 'b_{vt}', 'ft', ('airframe', 'bv')),
+        ("VT Area", 'S_{vt}', 'ft^2', ('airframe', 'Sv')),
+        ]),
+    ("CRUISE SEGMENT 1 DRAG DIFFERENCES", [
+        ("Overall Cd", 'C_D', None, ('C1', 'CD')),
+        ("L/D", 'L/D', None, ('C1', 'L/D')),
+        ("Nacelle Cd", 'C_{d_{nacelle}}', None, ('C1', 'CDnace')),
+        ("HT Cd", 'C_{D_{ht}}', None, ('C1', 'CDhtail')),
+        ("Fuselage Cd", 'C_{D_{fuse}}', None, ('C1', 'CDfuse')),
+        ("VT Cd", 'C_{D_{vis}}', None, ('C1', 'CDvtail')),
+        ("Induced Drag Cd", 'C_{D_{i_w}}', None, ('C1', 'CDi')),
+        ("Wing Profile Cd", 'C_{D_{p_w}}', None, ('C1', 'CDwing')),
+        ]),
+    ("CRUISE SEGMENT 1 TSFC DIFFERENCES", [
+        ("Initial Cruise TSFC", 'TSFC', None, ('C1', 'TSFC')),
+        ]),
+    ("FUSELAGE DIFFERENCES", [
+        ("HB Material Weight", 'W_{hbend}', 'lbf', ('airframe', 'Whbend')),
+        ("VB Material Weight", 'W_{vbend}', 'lbf', ('airframe', 'Wvbend')),
+        ]),
+]
+
+# per segment SP variables
+SEGMENT_VARIABLES = ['C_D', 'L/D', 'C_{d_{nacelle}}', 'C_{D_{ht}}', 'C_{D_{fuse}}',
+                     'C_{D_{vis}}', 'C_{D_{i_w}}', 'C_{D_{p_w}}', 'TSFC']
+
+# TASOPT tail drag coefficients are referenced to the wing area
+AREA_REFERENCED = {'C_{D_{ht}}': 'S_{ht}', 'C_{D_{vis}}': 'S_{vt}'}
+
+# quantities in SECTIONS that are not compared for each aircraft
+SKIPPED = {
+    'M072_737': ['L/D', 'W_{hbend}', 'W_{vbend}'],
+    'D12': ['L/D', 'W_{hbend}', 'W_{vbend}'],
+    'optimal777': ['L/D', 'W_{hbend}', 'W_{vbend}'],
+    'b737800': ['L/D', 'W_{hbend}', 'W_{vbend}'],
+    'optimal737': [],
+    'optimalD8': [],
+}
+
+# factors on the SP value, e.g. engine weight per engine vs. TASOPT total
+FACTORS = {
+    'M072_737': {'W_{engsys}': 2.},
+    'D12': {'W_{engsys}': 2.},
+    'optimal737': {'W_{engsys}': 2.},
+    'optimalD8': {'W_{vt}': 2.},
+}
+
+# quantities whose SP value is vectorized over missions at each segment
+FIRST_MISSION = {
+    'D12': ['C_{D_{i_w}}'],
+    'optimal777': ['C_{D_{i_w}}'],
+}
+
+# the b737800 reference run is not in TASOPT/, so its values stay literal
+LITERAL_REFERENCES = {
+    'b737800': {
+        'W_{f_{total}}': 45057.0, 'W_{total}': 174979.1, 'W_{engsys}': 11632.6,
+        'W_{fuse}': 37025.2, 'W_{payload}': 38715.5, 'W_{vt}': 1764.1,
+        'W_{ht}': 2616.1, 'W_{wing}': 23717.3, 'b': 116.427, 'S': 1342.10,
+        'S_{ht}': 456.86, 'b_{vt}': 24.39, 'S_{vt}': 297.50, 'C_D': 0.03304,
+        'C_{d_{nacelle}}': 0.00191, 'C_{D_{ht}}': 0.00239,
+        'C_{D_{fuse}}': 0.00762, 'C_{D_{vis}}': 0.00163,
+        'C_{D_{i_w}}': 0.01117, 'C_{D_{p_w}}': 0.00833, 'TSFC': 0.64009,
+    },
+}
+
 def percent_diff(sol,aircraft,Nclimb):
     """
     Method to compute and print percent differences between SP D8 model and TASOPT
@@ -15,553 +105,56 @@ def percent_diff(sol,aircraft,Nclimb):
     b737800 compares to TASOPT 737-800
     optimal737 compares to TASOPT 737-800 w/physics based tail sizing
     M072_737 compares to TASOPT 737-800 w/physics based tail sizing and M = 0.72
-    b777300ER compares to TASOPT 777-300ER
+    optimal777 compares to TASOPT 777-300ER
+    optimalD8 compares to TASOPT D8.2
+    D12 compares to TASOPT D12.1
+
+    RETURNS
+    -------
+    dictionary of SP variable to percent difference (empty for aircraft
+    without a TASOPT reference)
     """
-    if aircraft == 'M072_737':
-       #weights to compare for TASOPT 737-800 w/physics based tail sizing and M = 0.72
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 40530.2)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 155258.4)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(2.*mag(sol('W_{engsys}').to('lbf')), 11601.5)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 35360.9)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 38715.5)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{vt}').to('lbf')), 1383.8)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 1424.0)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 16150.7)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 118.500)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 10.1)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 1208.24)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 6)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 367.39)
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), 1.450) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.0)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 22.50)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 253.03)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .1)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.03581)
-        print "\n"
-        # print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 17.252)
-        # print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]), 0.00181)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00154*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00234)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00157*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb]), 0.01242)
-        print "\n"
-        print "Wing Profile Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]),0.00915)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.58399)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        # print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 2021.3)
-        # print "\n"
-        # print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 1210.5)
-
-
-    if aircraft == 'D12':
-       #weights to compare for TASOPT 777-300ER run
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 152030.4)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 528633.7)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(2.*mag(sol('W_{engsys}').to('lbf')), 35537.6)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 107426.3)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 115046.0)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{vt}').to('lbf')), 2368.3)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 9058.3)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 91144.3)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 199.748)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 10.1)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 3989.93)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 6)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 689.07  )
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), 1.450) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.0)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 21.36)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 456.15)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .1)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.02428)
-        print "\n"
-        # print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 17.252)
-        # print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]), 0.00062)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00154*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00521)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00093*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb][0]), 0.00899)
-        print "\n"
-        print "Wing Profile Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]), 0.00723)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.54649)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        # print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 2021.3)
-        # print "\n"
-        # print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 1210.5)
-
-    if aircraft == 'optimal777':
-       #weights to compare for TASOPT 777-300ER run
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 212236.0)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 625008.3)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(mag(sol('W_{engsys}').to('lbf')), 53717.8)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 107426.3)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 103541.4)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{vt}').to('lbf')), 4872.7)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 5844.6)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 99869.0)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 197.733)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 10.1)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 4624.26)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 6)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 969.73  )
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), 1.450) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.0)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 38.04)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 615.92)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .1)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.02539)
-        print "\n"
-        # print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 17.252)
-        # print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]), 0.00151)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00126*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00532)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00093*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb][0]), 0.00942)
-        print "\n"
-        print "Wing Profile Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]), 0.00695)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.56581)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        # print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 2021.3)
-        # print "\n"
-        # print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 1210.5)
-
-    if aircraft == 'b737800':
-       #weights to compare for TASOPT 737-800 run
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 45057.0)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 174979.1)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(mag(sol('W_{engsys}').to('lbf')), 11632.6)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 37025.2)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 38715.5)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{vt}').to('lbf')), 1764.1)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 2616.1)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 23717.3)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 116.427)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 10.1)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 1342.10)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 6)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 456.86  )
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), 1.450) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.0)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 24.39)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 297.50)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .1)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.03304)
-        print "\n"
-        # print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 17.252)
-        # print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]), 0.00191)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00239*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00762)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00163*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb]), 0.01117)
-        print "\n"
-        print "Wing Profile Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]), 0.00833)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.64009)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        # print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 2021.3)
-        # print "\n"
-        # print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 1210.5)
-
-    if aircraft == 'optimal737':
-       #weights to compare for TASOPT 737-800 run...sizing w/out specifying tail volume
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 45057.0)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 166502.0)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(2.*mag(sol('W_{engsys}').to('lbf')), 11632.6)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 35641.6)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 38715.5)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{vt}').to('lbf')), 1477.2)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 1463.8)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 21691.8)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 113.586)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 10.1)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 1277.41)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 6)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 313.86  )
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), 1.450) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.0)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 22.99)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 264.29)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .1)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 17.252)
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.03292)
-        print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]),0.00191)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00175*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00801)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00153*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb]), 0.01112)
-        print "\n"
-        print "Wing Profile Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]), 0.00833)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.64030)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 2021.3)
-        print "\n"
-        print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 1210.5)
-    
-    if aircraft == 'optimalD8':
-        #weights to compare for D8.2
-        print "WEIGHT DIFFERENCES"
-        print "\n"
-        print "Total Fuel Weight Percent Diff: %s" % compute_diff(mag(sol('W_{f_{total}}').to('lbf')), 26959.1)
-        print "\n"
-        print "Total Aircraft Weight Percent Diff: %s" % compute_diff(mag(sol('W_{total}').to('lbf')), 134758.2)
-        print "\n"
-        print "Engine Weight Percent Diff: %s" % compute_diff(mag(sol('W_{engsys}').to('lbf')), 10502.8)
-        print "\n"
-        print "Fuselage Weight Percent Diff: %s" % compute_diff(mag(sol('W_{fuse}').to('lbf')), 30487.4)
-        print "\n"
-        print "Payload Weight Percent Diff: %s" % compute_diff(mag(sol('W_{payload}').to('lbf')), 38715.5)
-        print "\n"
-        print "VT Weight Percent Diff: %s" % compute_diff(2.*mag(sol('W_{vt}').to('lbf')), 376.4)
-        print "\n"
-        print "HT Weight Percent Diff: %s" % compute_diff(mag(sol('W_{ht}').to('lbf')), 1578.5)
-        print "\n"
-        print "Wing Weight Percent Diff: %s" % compute_diff(mag(sol('W_{wing}').to('lbf')), 19737.5)
-
-        #wing value to compare
-        print "\n\n\n"
-        print "WING DIFFERENCES"
-        print "\n"
-        print "Wing Span Percent Diff: %s" % compute_diff(mag(sol('b').to('ft')), 140.042)
-##        print "\n"
-##        print "Wing Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR')), 15.7490)
-        print "\n"
-        print "Wing Area Percent Diff: %s" % compute_diff(mag(sol('S').to('ft^2')), 1245.27)
-        
-
-        #HT values to compare
-        print "\n\n\n"
-        print "HORIZONTAL TAIL DIFFERENCES"
-##        print "\n"
-##        print "HT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('AR_{ht}')), 12.0000)
-        print "\n"
-        print "HT Area Percent Diff: %s" % compute_diff(mag(sol('S_{ht}').to('ft^2')), 243.76  )
-##        print "\n"
-##        print "HT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{h}')), .913) 
-        
-
-        #VT values to compare
-        print "\n\n\n"
-        print "VERTICAL TAIL DIFFERENCES"
-        print "\n"
-##        print "VT Aspect Ratio Percent Diff: %s" % compute_diff(mag(sol('A_{vt}')), 2.2000)
-        print "\n"
-        print "VT Span Percent Diff: %s" % compute_diff(mag(sol('b_{vt}').to('ft')), 11.59)
-        print "\n"
-        print "VT Area Percent Diff: %s" % compute_diff(mag(sol('S_{vt}').to('ft^2')), 122.03)
-##        print "\n"
-##        print "VT Volume Coefficient Percent Diff: %s" % compute_diff(mag(sol('V_{vt}')), .03)
-
-
-        #drag values to compare
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 DRAG DIFFERENCES"
-        print "\n"
-        print "Overall Cd Percent Diff: %s" % compute_diff(mag(sol('C_D')[Nclimb]), 0.03212)
-        print "\n"
-        print "L/D Percent Diff: %s" % compute_diff(mag(sol('L/D')[Nclimb]), 21.477)
-        print "\n"
-        print "Nacelle Cd Percent Diff: %s" % compute_diff(mag(sol('C_{d_{nacelle}}')[Nclimb]), 0.00054)
-        print "\n"
-        print "HT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{ht}}')[Nclimb]), 0.00227*sol('S')/sol('S_{ht}'))
-        print "\n"
-        print "Fuselage Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{fuse}}')[Nclimb]), 0.00866)
-        print "\n"
-        print "VT Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{vis}}')[Nclimb]), 0.00089*sol('S')/sol('S_{vt}'))
-        print "\n"
-        print "Wing Cd percent Diff: %s" % compute_diff(mag(sol('C_{D_{p_w}}')[Nclimb]),0.00947)
-        print "Induced Drag Cd Percent Diff: %s" % compute_diff(mag(sol('C_{D_{i_w}}')[Nclimb]), 0.01063)
-        
-        #crusie TSFC
-        print "\n\n\n"
-        print "CRUISE SEGMENT 1 TSFC DIFFERENCES"
-        print "\n"
-        print "Initial Cruise TSFC Percent Diff: %s" % compute_diff(mag(sol('TSFC')[Nclimb]), 0.49971)
-        
-
-        #Fuselage values to compare
-        print "\n\n\n"
-        print "FUSELAGE DIFFERENCES"
-        print "\n"
-        print "\n"
-        print "Weight of HB material: %s "  % compute_diff(mag(sol('W_{hbend}')), 359.7)
-        print "\n"
-        print "Weight of VB material: %s "  % compute_diff(mag(sol('W_{vbend}')), 5.5)
+    diffs = {}
+    if aircraft not in SKIPPED:
+        return diffs
+    first = True
+    for header, entries in SECTIONS:
+        entries = [e for e in entries if e[1] not in SKIPPED[aircraft]]
+        if not first:
+            print("\n\n\n")
+        print(header)
+        first = False
+        for label, var, unit, key in entries:
+            diffs[var] = compare(sol, aircraft, Nclimb, var, unit, key)
+            print("\n")
+            print("%s Percent Diff: %s" % (label, diffs[var]))
+    return diffs
+
+def compare(sol, aircraft, Nclimb, var, unit, key):
+    """
+    Computes the percent difference of one SP variable against TASOPT
+    """
+    value = sol(var)
+    if unit is not None:
+        value = value.to(unit)
+    value = FACTORS.get(aircraft, {}).get(var, 1.)*mag(value)
+    if var in SEGMENT_VARIABLES:
+        value = value[Nclimb]
+        if var in FIRST_MISSION.get(aircraft, []):
+            value = value[0]
+
+    if aircraft in LITERAL_REFERENCES:
+        tasopt = LITERAL_REFERENCES[aircraft][var]
+    else:
+        tasopt = reference(aircraft, *key)[0]
+    if var in AREA_REFERENCED:
+        tasopt = tasopt*mag((sol('S')/sol(AREA_REFERENCED[var])).to('dimensionless'))
+    return compute_diff(value, tasopt)
 
 def compute_diff(sp, tasopt):
     """
     Method to actually compute the percent difference
     """
     diff = 100*(sp-tasopt)/tasopt
-    
+
     return diff
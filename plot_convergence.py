@@ -1,112 +1,118 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import sys
-# Change this
-#sys.path.append("/Users/philippekirschen/Documents/MIT/Research/SPaircraft")
-from gpkit import Model, Variable
-from SPaircraft import run_optimal_737
-from SPaircraft import run_optimal_777
-from SPaircraft import run_optimal_D8
 
-def convergence_plots(aircraft):
-    if aircraft == "737":
-        sol = run_optimal_737('W_{f_{total}}', True, False, False)
-    if aircraft == "777":
-        sol = run_optimal_777('W_{f_{total}}', True, False, False)    
-    if aircraft == "D8":
-        sol = run_optimal_D8('W_{f_{total}}', True, False, False)    
+from convergence_trace import load_traces
 
-    fuel = []
-    fuel_only = []
-    relax = []
-    cost = []
-    i = 0
-    xaxis_fuel = []
-    xaxis_relax = []
-    xaxis = []
-    print sol.program.gps
-    for gp in sol.program.gps:
-        cost += [gp.result['cost']]
-        hold = []
-        i = i+1
-        xaxis.append(i)
-        varkeys = [k for k in gp.varlocs if "Relax" in k.models and
-                                            gp.result(k) >= 1.00001]
-        if varkeys:
-            for v in varkeys:
-                hold.append(gp.result['freevariables'][v])
-            relax.append(sum(hold)**20)
-            xaxis_relax.append(i)
-            fuel += [gp.result['cost']/sum(hold)**20]
-        if not varkeys:
-            fuel += [gp.result['cost']]
-            fuel_only += [gp.result['cost']]
-            xaxis_fuel.append(i)
-            relax.append(1)
-        print varkeys
+# aircraft labels used in the plots and the configuration they solve
+AIRCRAFT = {'737': 'optimal737', '777': 'optimal777', 'D8': 'optimalD8'}
+
+def solve_trace(aircraft):
+    """
+    Solves the standard mission of an aircraft and returns its convergence trace
+    """
+    from SPaircraft import build_mission, optimize_aircraft
+    m, substitutions, fixedBPR, pRatOpt = build_mission(AIRCRAFT[aircraft])
+    sol = optimize_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    return sol.trace
+
+def cost_contributions(trace):
+    """
+    Splits the relaxed objective into the relaxation and fuel burn contributions
+
+    RETURNS
+    -------
+    relax: relaxation product**20 for each GP iteration (1 if nothing relaxed)
+    fuel: cost contribution of the fuel burn for each GP iteration
+    """
+    n = len(trace)
+    relax = np.where(trace.nrelaxed[:n] > 0, trace.relaxation[:n]**20, 1.)
+    fuel = trace.cost[:n]/relax
+    return relax, fuel
+
+def convergence_plots(trace, aircraft):
+    """
+    Plots the cost contributions of a single SP solve
+
+    ARGUMENTS
+    ---------
+    trace: ConvergenceTrace (sol.trace, or loaded with ConvergenceTrace.load)
+    aircraft: label used in titles and file names, e.g. '737'
+    """
+    n = len(trace)
+    xaxis = np.arange(1, n + 1)
+    relax, fuel = cost_contributions(trace)
+    unrelaxed = trace.nrelaxed[:n] == 0
 
-    print relax
-    print fuel
     #plot cost contribution of both fuel burn and relaxed variables
     #on top of one another
     f, axarr = plt.subplots(2, sharex=True)
     axarr[0].semilogy(xaxis, relax, '-o')
     axarr[1].semilogy(xaxis, fuel, '-o')
-    if aircraft == "737":
-        axarr[0].set_title('737 Relaxed Variables Cost Contribution', fontsize=18)
-        axarr[1].set_title('737 Fuel Burn Cost Contribution', fontsize=18)
-    if aircraft == "777":
-        axarr[0].set_title('777 Relaxed Variables Cost Contribution', fontsize=18)
-        axarr[1].set_title('777 Fuel Burn Cost Contribution', fontsize=18)   
-    if aircraft == "D8":
-        axarr[0].set_title('D8 Relaxed Variables Cost Contribution', fontsize=18)
-        axarr[1].set_title('D8 Fuel Burn Cost Contribution', fontsize=18)
+    axarr[0].set_title('%s Relaxed Variables Cost Contribution' % aircraft, fontsize=18)
+    axarr[1].set_title('%s Fuel Burn Cost Contribution' % aircraft, fontsize=18)
     axarr[0].set_ylabel('Cost Contribution', fontsize=18)
     axarr[1].set_ylabel('Cost Contribution', fontsize=18)
     f.text(0.5, 0.04, 'GP Iteration', ha='center', va='center', fontsize=18)
-    plt.savefig('fuel_and_relax_cost.pdf')
-    if aircraft == "737":
-        plt.savefig('737_fuel_and_relax_cost.pdf', bbox_inches="tight")
-    if aircraft == "777":
-        plt.savefig('777_fuel_and_relax_cost.pdf', bbox_inches="tight")  
-    if aircraft == "D8":
-        plt.savefig('D8_fuel_and_relax_cost.pdf', bbox_inches="tight")
+    plt.savefig('%s_fuel_and_relax_cost.pdf' % aircraft, bbox_inches="tight")
     plt.show()
 
     #plot the fuel burn cost only when no relaxed variables
-    plt.plot(xaxis_fuel, fuel_only, '-o')
-    if aircraft == "737":
-        plt.title('737 Fuel Burn Cost Contribution', fontsize=18)
-    if aircraft == "777":
-        plt.title('777 Fuel Burn Cost Contribution', fontsize=18)  
-    if aircraft == "D8":
-        plt.title('D8 Fuel Burn Cost Contribution', fontsize=18)
-    plt.xticks(xaxis_fuel)
+    plt.plot(xaxis[unrelaxed], fuel[unrelaxed], '-o')
+    plt.title('%s Fuel Burn Cost Contribution' % aircraft, fontsize=18)
+    plt.xticks(xaxis[unrelaxed])
     plt.ylabel('Fuel Burn Cost Contribution', fontsize=18)
     plt.xlabel('GP Iteration', fontsize=18)
-    if aircraft == "737":
-        plt.savefig('737_fuel_cost.pdf', bbox_inches="tight")
-    if aircraft == "777":
-        plt.savefig('777_fuel_cost.pdf', bbox_inches="tight")
-    if aircraft == "D8":
-        plt.savefig('D8_fuel_cost.pdf', bbox_inches="tight")
+    plt.savefig('%s_fuel_cost.pdf' % aircraft, bbox_inches="tight")
     plt.show()
 
     #plot the total cost
-    plt.semilogy(xaxis, cost, '-o')
-    if aircraft == "737":
-        plt.title('737 Total Cost', fontsize=18)
-    if aircraft == "777":
-        plt.title('777 Total Cost', fontsize=18) 
-    if aircraft == "D8":
-        plt.title('D8 Total Cost', fontsize=18)
+    plt.semilogy(xaxis, trace.cost[:n], '-o')
+    plt.title('%s Total Cost' % aircraft, fontsize=18)
     plt.xticks(xaxis)
     plt.ylabel('Total Cost', fontsize=18)
     plt.xlabel('GP Iteration', fontsize=18)
-    if aircraft == "737":
-        plt.savefig('737_total_cost.pdf', bbox_inches="tight")
-    if aircraft == "777":
-        plt.savefig('777_total_cost.pdf', bbox_inches="tight")
-    if aircraft == "D8":
-        plt.savefig('D8_total_cost.pdf', bbox_inches="tight")
+    plt.savefig('%s_total_cost.pdf' % aircraft, bbox_inches="tight")
     plt.show()
+
+def trace_summary(traces):
+    """
+    Collects the number of GP iterations, total GP solve time, final cost and
+    number of iterations with relaxed constants of many traces into arrays
+    """
+    return {
+        'iterations': np.array([len(t) for t in traces]),
+        'soltime': np.array([np.nansum(t.soltime[:len(t)]) for t in traces]),
+        'cost': np.array([t.cost[len(t) - 1] if len(t) else np.nan for t in traces]),
+        'relaxed_iterations': np.array([np.count_nonzero(t.nrelaxed[:len(t)]) for t in traces]),
+    }
+
+def plot_traces(traces, title='SP Convergence', filename=None):
+    """
+    Overlays the cost history of many traces (normalized by the final cost)
+    and histograms their GP iteration counts
+    """
+    f, axarr = plt.subplots(1, 2)
+    for trace in traces:
+        n = len(trace)
+        if n:
+            axarr[0].semilogy(np.arange(1, n + 1), trace.cost[:n]/trace.cost[n-1],
+                              '-', color='k', alpha=0.1)
+    axarr[0].set_xlabel('GP Iteration', fontsize=18)
+    axarr[0].set_ylabel('Cost / Final Cost', fontsize=18)
+    axarr[1].hist(trace_summary(traces)['iterations'])
+    axarr[1].set_xlabel('GP Iterations', fontsize=18)
+    f.suptitle(title, fontsize=18)
+    if filename:
+        plt.savefig(filename, bbox_inches="tight")
+    plt.show()
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1:
+        # plot saved traces: python plot_convergence.py trace1.npz trace2.npz ...
+        plot_traces(load_traces(sys.argv[1:]))
+    else:
+        for aircraft in ['737', '777', 'D8']:
+            trace = solve_trace(aircraft)
+            trace.save('%s_convergence.npz' % aircraft)
+            convergence_plots(trace, aircraft)
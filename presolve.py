@@ -0,0 +1,304 @@
+"""
+Presolve that eliminates fixed and monomial equality variables from each GP
+
+A monomial equality m == 1 reaches the GP as the pair of posynomial
+constraints m <= 1 and 1/m <= 1, i.e. the linear equality a*x + log(c) = 0
+in log space. Fixed value links (C_{D_{fuse}} == 0.018081, M_{fuseD} ==
+0.72, ...) are equalities with a single variable. Each equality is solved
+for one of its variables, which is substituted out of every other monomial,
+so the solver sees a smaller GP. The eliminated variables are recovered by
+back substitution, and the duals of the dropped equalities from the
+stationarity conditions of the eliminated variables, so gpkit computes the
+solution and sensitivities as if the full GP had been solved.
+
+    sol = m.localsolve(solver=presolved_solver())
+"""
+
+import numpy as np
+from time import time
+
+# equality rows with no variables left must have |log(c)| below this
+CONSISTENCY_TOL = 1e-8
+# exponents smaller than this after substitution are dropped
+ZERO_TOL = 1e-12
+
+def _triplets(A):
+    "row, col, data arrays of a gpkit CootMatrix or (row, col, data) triplet"
+    if isinstance(A, tuple):
+        return [np.asarray(v) for v in A]
+    return np.asarray(A.row, dtype=int), np.asarray(A.col, dtype=int), np.asarray(A.data, dtype=float)
+
+class Presolved(object):
+    """
+    Reduced GP with the information to expand its solution
+
+    Build with presolve; reduced problem in c, A (row, col, data triplet),
+    p_idxs and k, over the original variables var_idxs and posynomials
+    posy_idxs. None of the equality posynomials is the cost.
+    """
+    def __init__(self, c, A, p_idxs, k):
+        self.orig_c = np.asarray(c, dtype=float)
+        self.orig_A = _triplets(A)
+        self.orig_p_idxs = np.asarray(p_idxs, dtype=int)
+        self.orig_k = list(k)
+        self.nvars = int(self.orig_A[1].max()) + 1 if len(self.orig_A[1]) else 0
+        self.eliminations = []  # (variable, {variable: exponent}, pivot, log c)
+        self.pairs = []         # (posynomial of m, posynomial of 1/m, eliminated?)
+
+    def _eliminate(self):
+        "finds the equality pairs and eliminates one variable per pair"
+        row, col, data = self.orig_A
+        logc = np.log(self.orig_c)
+        rows = [dict() for _ in range(len(logc))]
+        for i, j, a in zip(row, col, data):
+            rows[i][j] = rows[i].get(j, 0.) + a
+        colrows = {}
+        for i, r in enumerate(rows):
+            for j in r:
+                colrows.setdefault(j, set()).add(i)
+
+        first = np.concatenate([[0], np.cumsum(self.orig_k)[:-1]]).astype(int)
+        singles = {}
+        removed = set()
+        for p in range(1, len(self.orig_k)):
+            if self.orig_k[p] != 1:
+                continue
+            i = first[p]
+            key = frozenset(rows[i].items())
+            negated = frozenset((j, -a) for j, a in rows[i].items())
+            partner = [q for q in singles.get(negated, [])
+                       if abs(logc[first[q]] + logc[i]) < CONSISTENCY_TOL]
+            if partner and rows[i]:
+                q = partner[0]
+                singles[negated].remove(q)
+                self.pairs.append([q, p, False])
+                removed.update([q, p])
+            else:
+                singles.setdefault(key, []).append(p)
+
+        for pair in self.pairs:
+            i = first[pair[0]]
+            r = rows[i]
+            if not r:
+                if abs(logc[i]) > CONSISTENCY_TOL:
+                    raise ValueError("inconsistent monomial equalities")
+                continue
+            j = max(r, key=lambda v: abs(r[v]))
+            pivot = r[j]
+            rest = dict((v, a) for v, a in r.items() if v != j)
+            self.eliminations.append((j, rest, pivot, logc[i]))
+            pair[2] = True
+            # substituted into every other monomial, including the
+            # equalities still to be eliminated
+            for other in list(colrows.get(j, ())):
+                if other == i:
+                    continue
+                factor = rows[other].pop(j)/pivot
+                logc[other] -= factor*logc[i]
+                for v, a in rest.items():
+                    value = rows[other].get(v, 0.) - factor*a
+                    if abs(value) < ZERO_TOL:
+                        rows[other].pop(v, None)
+                        colrows[v].discard(other)
+                    else:
+                        if v not in rows[other]:
+                            colrows[v].add(other)
+                        rows[other][v] = value
+            r.pop(j)
+            colrows[j] = set()
+        return rows, logc, removed
+
+    def reduce(self):
+        "eliminates the equalities and builds the reduced GP"
+        starttime = time()
+        rows, logc, removed = self._eliminate()
+        self.posy_idxs = [p for p in range(len(self.orig_k)) if p not in removed]
+        keep = np.isin(self.orig_p_idxs, self.posy_idxs)
+        monos = np.nonzero(keep)[0]
+        eliminated = set(e[0] for e in self.eliminations)
+        used = sorted(set(j for i in monos for j in rows[i]) - eliminated)
+        self.var_idxs = np.array(used, dtype=int)
+        varmap = dict((j, n) for n, j in enumerate(used))
+        posymap = dict((p, n) for n, p in enumerate(self.posy_idxs))
+        row, col, data = [], [], []
+        for n, i in enumerate(monos):
+            for j, a in rows[i].items():
+                row.append(n)
+                col.append(varmap[j])
+                data.append(a)
+        self.c = np.exp(logc[monos])
+        self.A = (np.array(row, dtype=int), np.array(col, dtype=int), np.array(data))
+        self.p_idxs = np.array([posymap[p] for p in self.orig_p_idxs[monos]], dtype=int)
+        self.k = [self.orig_k[p] for p in self.posy_idxs]
+        self.time = time() - starttime
+        return self
+
+    def stats(self):
+        "original and reduced GP dimensions"
+        return {'variables': self.nvars, 'reduced_variables': len(self.var_idxs),
+                'monomials': len(self.orig_c), 'reduced_monomials': len(self.c),
+                'posynomials': len(self.orig_k), 'reduced_posynomials': len(self.k),
+                'eliminated': len(self.eliminations), 'presolve_time': self.time}
+
+    def expand_primal(self, x):
+        "log values of all original variables from the reduced solution"
+        full = np.zeros(self.nvars)
+        full[self.var_idxs] = x
+        for j, rest, pivot, logc in reversed(self.eliminations):
+            full[j] = -(logc + sum(a*full[v] for v, a in rest.items()))/pivot
+        return full
+
+    def expand_duals(self, la, x):
+        """
+        Posynomial duals of the original GP (cost excluded, as solvers
+        return them) from the reduced duals and the full log solution
+
+        The duals of the eliminated equalities solve the stationarity
+        conditions of the eliminated variables.
+        """
+        la_full = np.zeros(len(self.orig_k))
+        la_full[0] = 1.
+        la_full[self.posy_idxs[1:]] = np.ravel(la)
+        row, col, data = self.orig_A
+        z = np.log(self.orig_c)
+        np.add.at(z, row, data*x[col])
+        monos = np.exp(z)
+        posyvals = np.bincount(self.orig_p_idxs, weights=monos, minlength=len(la_full))
+        kept = np.isin(self.orig_p_idxs, self.posy_idxs)
+        nu = np.where(kept, la_full[self.orig_p_idxs]*monos/posyvals[self.orig_p_idxs], 0.)
+        grad = np.bincount(col, weights=nu[row]*data, minlength=self.nvars)
+
+        pairs = [pair for pair in self.pairs if pair[2]]
+        if pairs:
+            first = np.concatenate([[0], np.cumsum(self.orig_k)[:-1]]).astype(int)
+            eliminated = [e[0] for e in self.eliminations]
+            E = np.zeros((len(eliminated), len(pairs)))
+            pos = dict((j, n) for n, j in enumerate(eliminated))
+            for n, (q, _, _) in enumerate(pairs):
+                i = first[q]
+                mask = row == i
+                for j, a in zip(col[mask], data[mask]):
+                    if j in pos:
+                        E[pos[j], n] += a
+            lam = np.linalg.lstsq(E, -grad[eliminated], rcond=None)[0]
+            for (q, p, _), l in zip(pairs, lam):
+                la_full[q] = max(l, 0.)
+                la_full[p] = max(-l, 0.)
+        return la_full[1:]
+
+def presolve(c, A, p_idxs, k):
+    "returns the Presolved reduction of a GP"
+    return Presolved(c, A, p_idxs, k).reduce()
+
+def presolved_solver(history=None):
+    """
+    Returns a gpkit solver function that presolves each GP and solves the
+    reduced GP with cvxopt
+
+    ARGUMENTS
+    ---------
+    history: (optional) list that the stats of every GP are appended to,
+             with the reduced solve time
+
+    RETURNS
+    -------
+    function taking (c, A, p_idxs, k) as gpkit passes them, and cvxopt's
+    options (see tolerance_schedule) as a keyword argument
+    """
+    def presolved_cvxopt(c, A, p_idxs, k, *args, **kwargs):
+        from cvxopt import solvers, spmatrix, matrix
+        reduced = presolve(c, A, p_idxs, k)
+        row, col, data = reduced.A
+        F = spmatrix(data.tolist(), row.tolist(), col.tolist(),
+                     (len(reduced.c), len(reduced.var_idxs)))
+        options = dict(kwargs.get('options', {}))
+        options.setdefault('show_progress', False)
+        starttime = time()
+        out = solvers.gp(reduced.k, F, matrix(np.log(reduced.c)), options=options)
+        soltime = time() - starttime
+        if history is not None:
+            stats = reduced.stats()
+            stats['soltime'] = soltime
+            history.append(stats)
+        x = reduced.expand_primal(np.ravel(out['x']))
+        return {'status': out['status'], 'primal': x,
+                'la': reduced.expand_duals(out['znl'], x)}
+    presolved_cvxopt.backend = 'cvxopt'
+    return presolved_cvxopt
+
+def timed_solver(solverfn, times, name=None):
+    """
+    Wraps a gpkit solver function to append the wall time [s] of every
+    call to times; name (e.g. 'cvxopt') is what gpkit looks up the
+    backend's default arguments by
+    """
+    def timed(c, A, p_idxs, k, *args, **kwargs):
+        starttime = time()
+        out = solverfn(c=c, A=A, p_idxs=p_idxs, k=k, *args, **kwargs)
+        times.append(time() - starttime)
+        return out
+    timed.__name__ = name or solverfn.__name__
+    timed.backend = getattr(solverfn, 'backend', timed.__name__)
+    return timed
+
+def compare_presolve(config, Nclimb=3, Ncruise=2):
+    """
+    Solves a production configuration with and without presolve and
+    reports the GP dimensions and solve times
+
+    RETURNS
+    -------
+    dictionary with the per GP presolve stats, total time [s] of the GP
+    solver calls with and without presolve (presolve itself included) and
+    the relative cost difference
+    """
+    from gpkit.small_scripts import mag
+    from gpkit._cvxopt import cvxoptimize
+    from SPaircraft import build_mission, relax_aircraft
+
+    costs, times = [], []
+    history = []
+    for solverfn, name in [(cvxoptimize, 'cvxopt'), (presolved_solver(history), None)]:
+        m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise)
+        m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+        calls = []
+        sol = m_relax.localsolve(verbosity=0, iteration_limit=200, reltol=0.01,
+                                 solver=timed_solver(solverfn, calls, name))
+        costs.append(float(mag(sol['cost'])))
+        times.append(float(np.sum(calls)))
+    out = {'config': config, 'gps': history, 'soltime': times[0],
+           'presolved_soltime': times[1], 'cost_diff': costs[1]/costs[0] - 1}
+    print("%s: %i -> %i variables, %i -> %i monomials per GP, GP solve time "
+          "%.2f -> %.2f s, cost difference %.2e" % (
+              config, history[-1]['variables'], history[-1]['reduced_variables'],
+              history[-1]['monomials'], history[-1]['reduced_monomials'],
+              times[0], times[1], out['cost_diff']))
+    return out
+
+def test():
+    "checks presolved GP solutions and sensitivities against the full GP"
+    from gpkit import Variable, Model
+    from gpkit.small_scripts import mag
+    x = Variable('x')
+    y = Variable('y')
+    z = Variable('z')
+    w = Variable('w')
+    a = Variable('a', 2., '-')
+    constraints = [x*y == a, z == 0.5*x**2, w == 3., x + 2*y + z/w <= 10, y >= 0.3]
+    m = Model(1/(x*z) + y, constraints)
+    full = m.solve(verbosity=0, solver='cvxopt')
+    history = []
+    reduced = m.solve(verbosity=0, solver=presolved_solver(history))
+    assert history[0]['eliminated'] >= 2
+    assert history[0]['reduced_variables'] < history[0]['variables']
+    assert abs(mag(reduced['cost'])/mag(full['cost']) - 1) < 1e-4
+    for var in [x, y, z, w]:
+        assert abs(mag(reduced(var))/mag(full(var)) - 1) < 1e-4
+    sens, fullsens = reduced['sensitivities']['constants'], full['sensitivities']['constants']
+    assert abs(sens[a] - fullsens[a]) < 1e-3
+
+if __name__ == "__main__":
+    import sys
+    from SPaircraft import CONFIGS
+    for config in sys.argv[1:] or list(CONFIGS):
+        compare_presolve(config)
@@ -1,5 +1,7 @@
+import numpy as np
 from gpkit.constraints.relax import ConstantsRelaxed
 from gpkit import Model
+from gpkit.small_scripts import mag
 
 """
 Methods to precondition an SP so that it solves with a relaxed constants algorithm
@@ -30,6 +32,51 @@ def relaxed_constants(model, include_only=None, exclude=None):
 
     return feas
 
+def update_constants(model, substitutions):
+    """
+    Method to change constants of a model already preconditioned by
+    relaxed_constants
+
+    ConstantsRelaxed moves the value of every relaxed constant onto a new
+    constant (named <name>_{before} in the Relax model, or of the same name
+    in an OriginalValues model in later gpkit versions) and leaves the
+    original key free, so a bare name no longer names the constant that
+    sets the value.
+
+    ARGUMENTS
+    ---------
+    model: model returned by relaxed_constants
+    substitutions: {name or VarKey: value}; a name sets the constants holding
+                   the value of that name (or the constant itself if it was
+                   excluded from relaxation), every element of a vector
+                   constant
+    """
+    bynames = {}
+    for key in model.substitutions:
+        models = key.models or []
+        if "Relax" in models and key.name.endswith("_{before}"):
+            bynames.setdefault(key.name[:-len("_{before}")], []).append(key)
+        elif "OriginalValues" in models or "Relax" not in models:
+            bynames.setdefault(key.name, []).append(key)
+    for name, value in substitutions.items():
+        if not hasattr(name, 'lower'):
+            model.substitutions[name] = value
+            continue
+        keys = bynames.get(name, [])
+        if not keys:
+            raise KeyError("%s is not a constant of the model" % name)
+        if len(set(tuple((k.models or [])[:-1]) for k in keys)) > 1:
+            raise KeyError("%s names constants of several models: %s" % (
+                name, ", ".join(sorted(set(str(k) for k in keys)))))
+        if not hasattr(value, 'units'):
+            value = np.asarray(value)
+        for key in keys:
+            idx = getattr(key, 'idx', None)
+            if idx is not None and np.ndim(mag(value)):
+                model.substitutions[key] = value[idx]
+            else:
+                model.substitutions[key] = value
+
 def post_process(sol):
     """
     Model to print relevant info for a solved model with relaxed constants
@@ -47,3 +94,26 @@ def post_process(sol):
             if i == len(sol.program.gps) - 1:
                 print  "WARNING: The final GP iteration had relaxation values greater than 1"
 
+
+def test():
+    "checks that update_constants changes the relaxed constants by name"
+    from gpkit import Variable, VectorVariable, SignomialsEnabled, units
+    x = Variable('x', 'm')
+    y = Variable('y', 'm')
+    c = Variable('C_{wing}', 2., '-')
+    r = Variable('R', 3., 'm')
+    n = VectorVariable(2, 'n', [1., 2.], '-')
+    with SignomialsEnabled():
+        constraints = [x + y >= c*r + 0.1*y, x >= n.prod()*r, y >= 0.1*r]
+    m = relaxed_constants(Model(x + y, constraints))
+    sol = m.localsolve(verbosity=0)
+    assert abs(mag(sol(x + y)) - 6.3) < 1e-2
+    update_constants(m, {'C_{wing}': 5., 'R': 2*units('m'), 'n': [1., 4.]})
+    sol = m.localsolve(verbosity=0)
+    assert abs(mag(sol(x + y)) - 10.0222) < 1e-2
+    try:
+        update_constants(m, {'C_{fuse}': 1.})
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("an unknown constant was substituted")
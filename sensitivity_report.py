@@ -0,0 +1,250 @@
+"""
+Constant sensitivities of a whole result archive, by submodel
+
+    python sensitivity_report.py archive.jsonl [R_{req} n_{pass} ...]
+
+The sensitivities of every archived design (see solution_archive) are
+gathered into one dense designs x constants matrix, so rankings, submodel
+totals and trends over the sweep parameters are array operations over the
+whole archive rather than loops over solutions:
+
+    rankings: constants ordered by mean |sensitivity| over the designs
+    groups:   sum of |sensitivity| of the constants of each submodel
+    trends:   slope of each sensitivity against the log of each sweep
+              parameter, i.e. its change per e-fold of the parameter
+"""
+
+import sys
+import warnings
+import numpy as np
+from collections import OrderedDict
+
+from solution_archive import load_archive, column
+
+# submodels constants are grouped by, matched against the outermost model
+# of a constant whose name starts with one (so WingNoStruct and
+# WingPerformance are Wing); constants of no submodel are 'Other'
+SUBMODELS = ['Wing', 'Fuselage', 'HorizontalTail', 'VerticalTail', 'LandingGear', 'Engine']
+
+def submodel(name):
+    "returns the submodel of an archive name, e.g. 'C_{wing}|Mission.Aircraft.Wing'"
+    models = name.split("|", 1)[1].split(".") if "|" in name else []
+    for model in models:
+        for group in SUBMODELS:
+            if model.startswith(group):
+                return group
+    return 'Other'
+
+def sensitivity_matrix(records, constants=None):
+    """
+    Gathers the constant sensitivities of every record
+
+    ARGUMENTS
+    ---------
+    records: list of archive records
+    constants: (optional) archive names to gather; default every constant
+               of any record, sorted
+
+    RETURNS
+    -------
+    (designs x constants array, constant names); a vector constant's
+    sensitivity is summed over its elements, NaN where a record lacks it
+    """
+    if constants is None:
+        constants = sorted(set(name for r in records for name in r['sensitivities']))
+    index = dict((name, j) for j, name in enumerate(constants))
+    S = np.full((len(records), len(constants)), np.nan)
+    for i, record in enumerate(records):
+        items = [(index[name], value) for name, value in record['sensitivities'].items()
+                 if name in index]
+        if items:
+            cols, values = zip(*items)
+            S[i, list(cols)] = [np.sum(v) for v in values]
+    return S, list(constants)
+
+def membership(constants):
+    "returns (constants x groups 0/1 array, group names) of SUBMODELS and 'Other'"
+    groups = SUBMODELS + ['Other']
+    G = np.zeros((len(constants), len(groups)))
+    G[np.arange(len(constants)), [groups.index(submodel(c)) for c in constants]] = 1
+    return G, groups
+
+def group_totals(S, constants, absolute=True):
+    """
+    Sums sensitivities by submodel
+
+    ARGUMENTS
+    ---------
+    absolute: sum |sensitivity| (how much the submodel's constants matter)
+              rather than the signed sensitivities, which can cancel
+
+    RETURNS
+    -------
+    (designs x groups array, group names)
+    """
+    G, groups = membership(constants)
+    values = np.nan_to_num(np.abs(S) if absolute else S)
+    return values.dot(G), groups
+
+def rankings(S, constants, top=None):
+    """
+    Ranks constants by mean |sensitivity| over the designs that have them
+
+    RETURNS
+    -------
+    list of (name, submodel, mean, std, min, max, designs), most influential
+    first; mean, std, min and max are of the signed sensitivity
+    """
+    present = np.isfinite(S)
+    count = present.sum(axis=0)
+    with warnings.catch_warnings():
+        # constants no design has are all NaN, and dropped below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mean = np.nanmean(S, axis=0)
+        std = np.nanstd(S, axis=0)
+        low, high = np.nanmin(S, axis=0), np.nanmax(S, axis=0)
+        influence = np.nanmean(np.abs(S), axis=0)
+    order = [j for j in np.argsort(-np.nan_to_num(influence)) if count[j]]
+    return [(constants[j], submodel(constants[j]), mean[j], std[j], low[j], high[j],
+             int(count[j])) for j in order[:top]]
+
+def design_ranks(S):
+    "returns the designs x constants rank (0 = most influential) of |sensitivity|"
+    order = np.argsort(-np.nan_to_num(np.abs(S)), axis=1)
+    ranks = np.empty_like(order)
+    rows = np.arange(S.shape[0])[:, None]
+    ranks[rows, order] = np.arange(S.shape[1])
+    return ranks
+
+def sweep_values(records, name):
+    """
+    Returns the value of a sweep parameter for every record: from its
+    metadata substitutions, its metadata, or else its solved variable
+    (averaged over the elements of a vector), NaN where none is numeric
+    """
+    values = np.full(len(records), np.nan)
+    for i, record in enumerate(records):
+        metadata = record['metadata']
+        value = metadata.get('substitutions', {}).get(name, metadata.get(name))
+        try:
+            values[i] = np.mean(np.asarray(value, dtype=float))
+        except (TypeError, ValueError):
+            pass
+    missing = np.isnan(values)
+    if missing.any():
+        solved = column([r for r, m in zip(records, missing) if m], name)
+        if solved.ndim == 2:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                solved = np.nanmean(solved, axis=1)
+        values[missing] = solved
+    return values
+
+def trends(S, x):
+    """
+    Least squares slope of every constant's sensitivity against log(x),
+    over the designs where both are defined
+
+    ARGUMENTS
+    ---------
+    S: designs x constants sensitivities
+    x: positive sweep parameter value of every design
+
+    RETURNS
+    -------
+    (slope, r2) arrays over the constants, NaN where fewer than three
+    designs or no spread in x
+    """
+    logx = np.log(np.where(x > 0, x, np.nan))[:, None]
+    mask = np.isfinite(S) & np.isfinite(logx)
+    n = mask.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        xbar = np.where(mask, logx, 0).sum(axis=0)/n
+        sbar = np.where(mask, S, 0).sum(axis=0)/n
+        dx = np.where(mask, logx - xbar, 0)
+        ds = np.where(mask, S - sbar, 0)
+        sxx, sss, sxs = (dx*dx).sum(axis=0), (ds*ds).sum(axis=0), (dx*ds).sum(axis=0)
+        slope = sxs/sxx
+        r2 = np.where(sss > 0, sxs**2/(sxx*sss), 1.)
+    bad = (n < 3) | ~(sxx > 0)
+    slope[bad] = np.nan
+    r2[bad] = np.nan
+    return slope, r2
+
+def sensitivity_report(records, sweep=(), top=15, config=None):
+    """
+    Aggregates the sensitivities of an archive and prints the report
+
+    ARGUMENTS
+    ---------
+    records: list of archive records, or archive filename(s)
+    sweep: names of sweep parameters to compute trends over
+    top: constants listed in the rankings and per trend
+    config: (optional) only use records of this configuration
+
+    RETURNS
+    -------
+    dictionary of the sensitivity matrix S, constants, rankings, group
+    totals (designs x groups) with their names, and trends
+    {parameter: (slope, r2)}
+    """
+    if not records or not isinstance(records[0], dict):
+        records = load_archive(records)
+    if config is not None:
+        records = [r for r in records if r['config'] == config]
+    S, constants = sensitivity_matrix(records)
+    totals, groups = group_totals(S, constants)
+    ranked = rankings(S, constants, top)
+    out = {'S': S, 'constants': constants, 'rankings': ranked,
+           'groups': groups, 'group_totals': totals, 'trends': OrderedDict()}
+
+    print("%i designs, %i constants" % S.shape)
+    print("\n%-10s %10s %10s" % ("submodel", "mean|s|", "max|s|"))
+    for j, group in enumerate(groups):
+        print("%-10s %10.4f %10.4f" % (group[:10], np.mean(totals[:, j]), np.max(totals[:, j])))
+    print("\n%-48s %-14s %9s %9s %9s %9s" % ("constant", "submodel", "mean", "std", "min", "max"))
+    for name, group, mean, std, low, high, _ in ranked:
+        print("%-48s %-14s %9.4f %9.4f %9.4f %9.4f" % (name[:48], group, mean, std, low, high))
+
+    for name in sweep:
+        slope, r2 = out['trends'][name] = trends(S, sweep_values(records, name))
+        print("\nd(sensitivity)/d(log %s)" % name)
+        for j in np.argsort(-np.nan_to_num(np.abs(slope)))[:top]:
+            if np.isfinite(slope[j]):
+                print("    %-48s %9.4f  (r2 %.2f)" % (constants[j][:48], slope[j], r2[j]))
+    return out
+
+def test():
+    "aggregates a synthetic archive whose sensitivities vary linearly in log R_{req}"
+    assert submodel('C_{wing}|Mission.Aircraft.WingNoStruct') == 'Wing'
+    assert submodel('m_{fac}|Mission.Aircraft.Fuselage.Wing') == 'Fuselage'
+    assert submodel('M_{min}|Mission') == submodel('n_{pass}') == 'Other'
+    wing, engine, fuse = ('C_{wing}|Mission.Aircraft.Wing', 'C_{engsys}|Mission.Aircraft.Engine',
+                          'C_{fuse}|Mission.Aircraft.Fuselage')
+    R = np.array([1000., 2000., 3000., 4000.])
+    records = [{'metadata': {'substitutions': {'R_{req}': r}},
+                'sensitivities': {wing: 0.1 + 0.05*np.log(r), engine: [-0.1, -0.2]}}
+               for r in R[:3]]
+    records.append({'metadata': {'R_{req}': R[3]},
+                    'sensitivities': {wing: 0.1 + 0.05*np.log(R[3]), fuse: 0.3}})
+    S, constants = sensitivity_matrix(records)
+    assert constants == [engine, fuse, wing]
+    assert np.allclose(S[:3, 0], -0.3) and np.isnan(S[3, 0])
+    assert np.isnan(S[:3, 1]).all() and S[3, 1] == 0.3
+
+    totals, groups = group_totals(S, constants)
+    assert np.allclose(totals[:, groups.index('Engine')], [0.3, 0.3, 0.3, 0])
+    assert np.allclose(totals.sum(axis=1), np.nansum(np.abs(S), axis=1))
+    assert np.allclose(group_totals(S, constants, absolute=False)[0][:3, groups.index('Engine')], -0.3)
+    ranked = rankings(S, constants)
+    assert [r[0] for r in ranked] == [wing, engine, fuse]
+    assert [r[-1] for r in ranked] == [4, 3, 1]
+    assert (design_ranks(S)[3] == [2, 1, 0]).all()
+
+    slope, r2 = trends(S, sweep_values(records, 'R_{req}'))
+    assert np.allclose([slope[2], r2[2]], [0.05, 1])
+    assert np.allclose([slope[0], r2[0]], [0, 1])
+    assert np.isnan(slope[1])
+
+if __name__ == "__main__":
+    sensitivity_report(sys.argv[1], sys.argv[2:])
@@ -1,17 +1,29 @@
 from SimpleWebSocketServer import SimpleWebSocketServer, WebSocket
 import json
-from SPaircraft import Mission
+import threading
+from Queue import Queue
 from saveSol import gendes, gencsm
 from shutil import copyfile
 
 from subs.optimalD8 import get_optimalD8_subs
 from aircraft import Mission
 from SPaircraft import optimize_aircraft
+from design_surrogate import DesignSurrogate, design_record
 
 EXIT = [False]
 ID = 0
 LASTSOL = [None]
 
+CONFIG = 'optimalD8'
+# archive the surrogate is trained from, every exact solve is appended to it
+ARCHIVE = "server_archive.jsonl"
+SURROGATE = DesignSurrogate(CONFIG, ARCHIVE)
+
+# requests waiting for an exact solve, and messages from the solver
+# thread waiting to be sent by the server loop
+SOLVES = Queue()
+OUTBOX = Queue()
+
 
 def genfiles(m, sol):
     global ID
@@ -29,6 +41,47 @@ def gensoltxt(m, sol, ID):
                                          sol["variables"][var]))
 
 
+def solve(data):
+    "solves the optimalD8 Mission with a request's substitutions"
+    substitutions = get_optimalD8_subs()
+    fixedBPR = False
+    pRatOpt = True
+    mutategparg = True
+    m = Mission(3, 2, CONFIG, 1)
+    m.cost = m['W_{f_{total}}']
+
+    for name, value in data.items():
+        try:
+            key = m.aircraft.design_parameters[name]
+            substitutions[key] = value
+        except KeyError:
+            substitutions[name] = value
+
+    sol = optimize_aircraft(m, substitutions, fixedBPR, pRatOpt, mutategparg, x0 = LASTSOL[0])
+    LASTSOL[0] = sol["freevariables"]
+    return m, sol
+
+
+def solver_loop():
+    "solves queued requests one at a time, feeding the results to the surrogate"
+    while True:
+        client, data = SOLVES.get()
+        try:
+            m, sol = solve(data)
+            genfiles(m, sol)
+            record = design_record(m, sol, CONFIG, data)
+            SURROGATE.add_record(record)
+            OUTBOX.put((client, {"status": "optimal",
+                                 "cost": record["cost"],
+                                 "design_parameters": record["metadata"]["design_parameters"],
+                                 "msg": ("Successfully optimized."
+                                         " Fuel burn: %.1f lbf" % sol("W_{f_{total}}").to("lbf").magnitude)}))
+        except Exception as e:
+            OUTBOX.put((client, {"status": "unknown", "msg": "The last solution"
+                                 " raised an exception; tweak it and send again."}))
+            print type(e), e
+
+
 class SPaircraftServer(WebSocket):
 
     def handleMessage(self):
@@ -37,32 +90,16 @@ class SPaircraftServer(WebSocket):
             self.data = json.loads(self.data)
             print self.data
 
-            config = 'optimalD8'
-            substitutions = get_optimalD8_subs()
-            fixedBPR = False
-            pRatOpt = True
-            mutategparg = True
-            m = Mission(3, 2, config, 1)
-            m.cost = m['W_{f_{total}}']
-
-            for name, value in self.data.items():
-                try:
-                    key = m.design_parameters[name]
-                    m.substitutions[key] = value
-                except KeyError as e:
-                    print repr(e)
-
-            sol = optimize_aircraft(m, substitutions, fixedBPR, pRatOpt, mutategparg)
-            LASTSOL[0] = sol
-            genfiles(m, sol)
-
-            self.send({"status": "optimal",
-                       "msg": ("Successfully optimized."
-                               " Optimal heat transfer: %.1f watts "
-                               % sol["variables"][m.Q])})
+            # instant answer from the surrogate, the exact solve follows
+            estimate = SURROGATE.predict(self.data)
+            if estimate is not None:
+                estimate["status"] = "estimate"
+                estimate["msg"] = "Surrogate estimate; exact solution pending."
+                self.send(estimate)
+            SOLVES.put((self, self.data))
         except Exception as e:
-            self.send({"status": "unknown", "msg": "The last solution"
-                      " raised an exception; tweak it and send again."})
+            self.send({"status": "unknown", "msg": "The last request"
+                      " could not be read; tweak it and send again."})
             print type(e), e
 
     def send(self, msg):
@@ -78,17 +115,17 @@ class SPaircraftServer(WebSocket):
 
 
 if __name__ == "__main__":
-    objective = 'W_{f_{total}}'
-    aircraft = 'optimald8'
-    substitutions = get_optimalD8_subs()
-    fixedBPR = False
-    pRatOpt = True
-    mutategparg = True
-    LASTSOL[0] = None
-    sol = optimize_aircraft(objective, aircraft, substitutions, fixedBPR, pRatOpt, mutategparg, x0 = LASTSOL[0])
-    LASTSOL[0] = sol
+    m, sol = solve({})
     genfiles(m, sol)
-    server = SimpleWebSocketServer('', 8000, SPaircraftServer)
+    SURROGATE.add_record(design_record(m, sol, CONFIG, {}))
+    SURROGATE.start_refresher()
+    solver = threading.Thread(target=solver_loop)
+    solver.daemon = True
+    solver.start()
+    server = SimpleWebSocketServer('', 8000, SPaircraftServer, selectInterval=0.1)
     while not EXIT[0]:
         server.serveonce()
+        while not OUTBOX.empty():
+            client, msg = OUTBOX.get()
+            client.send(msg)
     print "Python server has exited."
@@ -0,0 +1,201 @@
+"""
+JSON lines archive of solved designs, loadable into columns for batch analysis
+"""
+
+import json
+from time import time
+import numpy as np
+from gpkit.small_scripts import mag
+
+def key_name(key):
+    """
+    Returns the archive name of a variable key: its name and the models it
+    belongs to, e.g. 'W_{f_{total}}|Mission' (the bare name when it has none)
+    """
+    models = [m for m in getattr(key, 'models', []) if m]
+    if models:
+        return "%s|%s" % (key.name, ".".join(models))
+    return key.name
+
+def _unitstr(key):
+    "returns the units of a variable key as a string pint can parse"
+    units = getattr(key, 'units', None)
+    if units is None:
+        return ""
+    return str(getattr(units, 'units', units))
+
+def _jsonable(value):
+    value = mag(value)
+    if np.ndim(value):
+        return np.asarray(value, dtype=float).tolist()
+    return float(value)
+
+def solution_record(sol, config, **metadata):
+    """
+    Flattens a solution into a JSON serializable record
+
+    ARGUMENTS
+    ---------
+    sol: solved model
+    config: configuration name, e.g. 'optimal737'
+    metadata: anything else to store with the design (Nclimb, substitutions
+              changed for a sweep point, seed, ...)
+
+    RETURNS
+    -------
+    dictionary with config, metadata, cost, variables, units, sensitivities
+    (of constants), names and sensitivity_names (bare name to archive names
+    of variables and of constants) and, when present, the convergence trace
+    """
+    record = {'config': config, 'time': time(), 'metadata': metadata,
+              'cost': _jsonable(sol['cost']), 'variables': {}, 'units': {},
+              'sensitivities': {}, 'names': {}, 'sensitivity_names': {}}
+    for key, value in sol['variables'].items():
+        if getattr(key, 'idx', None) is not None:
+            continue
+        name = key_name(key)
+        record['variables'][name] = _jsonable(value)
+        record['units'][name] = _unitstr(key)
+        record['names'].setdefault(key.name, []).append(name)
+    for key, value in sol['sensitivities']['constants'].items():
+        if getattr(key, 'idx', None) is not None:
+            continue
+        name = key_name(key)
+        record['sensitivities'][name] = _jsonable(value)
+        record['sensitivity_names'].setdefault(key.name, []).append(name)
+    if getattr(sol, 'trace', None) is not None:
+        record['trace'] = sol.trace.to_dict()
+    return record
+
+def append_record(filename, record):
+    "appends a record to a JSON lines archive"
+    with open(filename, 'a') as f:
+        f.write(json.dumps(record) + "\n")
+
+def archive_solution(filename, sol, config, **metadata):
+    "archives a solution, see solution_record"
+    record = solution_record(sol, config, **metadata)
+    append_record(filename, record)
+    return record
+
+def load_archive(filenames):
+    """
+    Loads records from one or more JSON lines archives
+
+    RETURNS
+    -------
+    list of records, in file order
+    """
+    if isinstance(filenames, str):
+        filenames = [filenames]
+    records = []
+    for filename in filenames:
+        with open(filename) as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+    return records
+
+def resolve(record, name, sensitivity=False):
+    """
+    Returns the archive name of a variable given its bare or archive name
+
+    ARGUMENTS
+    ---------
+    sensitivity: resolve among the constants with sensitivities rather than
+                 the variables (in a relaxed constants solution a bare
+                 constant name also names a free variable)
+
+    Raises KeyError if the name is missing or ambiguous.
+    """
+    table = record['sensitivities'] if sensitivity else record['variables']
+    if name in table:
+        return name
+    if not sensitivity:
+        matches = record['names'].get(name, [])
+    elif 'sensitivity_names' in record:
+        matches = record['sensitivity_names'].get(name, [])
+    else:
+        matches = [key for key in table if key.split("|", 1)[0] == name]
+    if len(matches) != 1:
+        raise KeyError("%s is %s in the record" % (
+            name, "ambiguous" if matches else "not"))
+    return matches[0]
+
+def unit_factor(fromunits, tounits, _cache={}):
+    "returns the factor converting a magnitude from one unit to another"
+    if not tounits or fromunits == tounits:
+        return 1.
+    if (fromunits, tounits) not in _cache:
+        from gpkit import units
+        _cache[(fromunits, tounits)] = float(
+            (1.*units(fromunits or "dimensionless")).to(tounits).magnitude)
+    return _cache[(fromunits, tounits)]
+
+def column(records, name, unit=None, index=None, sensitivity=False):
+    """
+    Gathers one variable of every record into an array
+
+    ARGUMENTS
+    ---------
+    records: list of records
+    name: bare or archive name
+    unit: units to convert to (None keeps the stored units)
+    index: (optional) index into vector variables, e.g. a segment number,
+           or a list with one index per record
+    sensitivity: gather the sensitivity instead of the value
+
+    RETURNS
+    -------
+    array over records (NaN where the record lacks the variable); vector
+    variables give a 2D array padded with NaN
+    """
+    values = []
+    for i, record in enumerate(records):
+        idx = index[i] if isinstance(index, list) else index
+        try:
+            key = resolve(record, name, sensitivity)
+            if sensitivity:
+                value = record['sensitivities'][key]
+            else:
+                value = record['variables'][key]
+                value = np.asarray(value)*unit_factor(record['units'][key], unit)
+            if idx is not None:
+                value = np.asarray(value)[idx]
+        except (KeyError, IndexError):
+            value = np.nan
+        values.append(np.asarray(value, dtype=float))
+    size = max([v.size for v in values] + [1])
+    if size == 1:
+        return np.array([v.ravel()[0] if v.size else np.nan for v in values])
+    out = np.full((len(values), size), np.nan)
+    for i, v in enumerate(values):
+        out[i, :v.size] = v.ravel()
+    return out
+
+def columns(records, names, unit=None):
+    "gathers several variables, see column"
+    return dict((name, column(records, name, unit)) for name in names)
+
+def test():
+    "resolves constant names among sensitivities, as in a relaxed constants solution"
+    record = {'variables': {'C_{wing}|Mission.Aircraft.Wing': 1.02,
+                            'C_{wing}|OriginalValues': 1.},
+              'units': {'C_{wing}|Mission.Aircraft.Wing': '',
+                        'C_{wing}|OriginalValues': ''},
+              'names': {'C_{wing}': ['C_{wing}|Mission.Aircraft.Wing',
+                                     'C_{wing}|OriginalValues']},
+              'sensitivities': {'C_{wing}|OriginalValues': 0.12},
+              'sensitivity_names': {'C_{wing}': ['C_{wing}|OriginalValues']}}
+    assert resolve(record, 'C_{wing}', sensitivity=True) == 'C_{wing}|OriginalValues'
+    assert column([record], 'C_{wing}', sensitivity=True)[0] == 0.12
+    try:
+        resolve(record, 'C_{wing}')
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("an ambiguous variable name resolved")
+    # records archived before sensitivity_names fall back to the stored keys
+    del record['sensitivity_names']
+    assert column([record], 'C_{wing}', sensitivity=True)[0] == 0.12
+    assert np.isnan(column([record], 'C_{ht}', sensitivity=True)[0])
@@ -0,0 +1,258 @@
+"""
+GP solver backend benchmarking, per configuration selection and fallback
+
+The locally installed backends are timed on the GPs of each configuration's
+SP solve and the results kept in a history file. select_backend picks the
+fastest backend that has (next to) not failed on a configuration, and
+fallback_solver returns a gpkit solver function that retries a GP on the
+next backend when one fails numerically, so the SP carries on instead of
+restarting.
+
+    python solver_select.py optimal737 optimalD8   # benchmark, then select
+"""
+
+import os
+import json
+import hashlib
+from time import time
+import numpy as np
+
+from build_profile import git_commit
+
+HISTORYFILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".solver_history.json")
+
+# backends in order of preference when there is no history
+BACKENDS = ['mosek', 'cvxopt', 'cvxopt_presolved', 'mosek_cli']
+
+# largest failure rate of a backend that can still be selected; failures
+# on GPs that every backend run on them failed do not count (see backend_stats)
+MAX_FAILURE_RATE = 0.05
+
+def available_backends():
+    "backends installed with gpkit (cvxopt_presolved needs cvxopt)"
+    from gpkit import settings
+    installed = settings.get('installed_solvers', [])
+    return [b for b in BACKENDS
+            if b in installed or (b == 'cvxopt_presolved' and 'cvxopt' in installed)]
+
+def backend_function(name):
+    "returns the solver function of a backend, as gpkit looks it up"
+    if name == 'cvxopt':
+        from gpkit._cvxopt import cvxoptimize
+        return cvxoptimize
+    if name == 'mosek':
+        from gpkit._mosek import expopt
+        return expopt.imize
+    if name == 'mosek_cli':
+        from gpkit._mosek import cli_expopt
+        return cli_expopt.imize_fn("gpkit_mosek")
+    if name == 'cvxopt_presolved':
+        from presolve import presolved_solver
+        return presolved_solver()
+    raise ValueError("unknown backend %s" % name)
+
+def _optimal(out):
+    return str(out.get('status', '')).lower() == 'optimal'
+
+def run_backend(name, c, A, p_idxs, k, **kwargs):
+    """
+    Solves one GP with one backend
+
+    RETURNS
+    -------
+    solver output (None if it failed), solve time [s], ok
+    """
+    starttime = time()
+    try:
+        out = backend_function(name)(c=c, A=A, p_idxs=p_idxs, k=k, **kwargs)
+    except Exception:
+        return None, time() - starttime, False
+    return out, time() - starttime, _optimal(out)
+
+def gp_id(c, A, k):
+    "returns a hash identifying a GP by its coefficients, exponents and posynomial sizes"
+    digest = hashlib.sha1()
+    for array in [c, A.row, A.col, A.data, k]:
+        digest.update(np.asarray(array, dtype=float).tobytes())
+    return digest.hexdigest()
+
+def load_history(filename=HISTORYFILE):
+    "returns {config: {backend: [run, ...]}}, empty if there is no history"
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)
+
+def save_history(history, filename=HISTORYFILE):
+    with open(filename, 'w') as f:
+        json.dump(history, f, indent=1, sort_keys=True)
+
+def record(history, config, backend, soltime, ok, commit=None, gp=None):
+    "appends one GP solve (of the GP with gp_id gp) to the history"
+    history.setdefault(config, {}).setdefault(backend, []).append(
+        {'time': soltime, 'ok': bool(ok), 'commit': commit, 'date': time(), 'gp': gp})
+
+def benchmark_backends(config, backends=None, ngps=None, filename=HISTORYFILE,
+                       Nclimb=3, Ncruise=2):
+    """
+    Times every backend on the GPs of a configuration's SP solve
+
+    ARGUMENTS
+    ---------
+    config: one of SPaircraft.CONFIGS
+    backends: backends to time (default: all available)
+    ngps: number of GPs of the SP to time them on (default: all)
+    filename: history file the runs are added to (None to not save)
+
+    RETURNS
+    -------
+    backend_stats of the configuration
+    """
+    from SPaircraft import build_mission, relax_aircraft
+    if backends is None:
+        backends = available_backends()
+    m, substitutions, fixedBPR, pRatOpt = build_mission(config, Nclimb, Ncruise)
+    m_relax = relax_aircraft(m, substitutions, fixedBPR, pRatOpt)
+    sol = m_relax.localsolve(verbosity=0, iteration_limit=200, reltol=0.01, mutategp=False)
+    history = load_history(filename) if filename else {}
+    commit = git_commit()
+    for gp in sol.program.gps[:ngps]:
+        gpid = gp_id(gp.cs, gp.A, gp.k)
+        for backend in backends:
+            _, soltime, ok = run_backend(backend, gp.cs, gp.A, gp.p_idxs, gp.k)
+            record(history, config, backend, soltime, ok, commit, gpid)
+    if filename:
+        save_history(history, filename)
+    return backend_stats(config, history)
+
+def shared_failures(runs):
+    """
+    Returns the ids of the GPs that failed on every backend that was run
+    on them, given the {backend: [run, ...]} history of a configuration
+    """
+    solved, failed = set(), set()
+    for backend_runs in runs.values():
+        for run in backend_runs:
+            if run.get('gp') is not None:
+                (solved if run['ok'] else failed).add(run['gp'])
+    return failed - solved
+
+def backend_stats(config, history=None):
+    """
+    Returns {backend: {runs, failure_rate, median_time, mean_time}} of the
+    runs recorded for a configuration; runs on GPs that every backend
+    failed (see shared_failures) say nothing about the backend and are left out
+    """
+    if history is None:
+        history = load_history()
+    stats = {}
+    shared = shared_failures(history.get(config, {}))
+    for backend, runs in history.get(config, {}).items():
+        runs = [r for r in runs if r.get('gp') is None or r['gp'] not in shared]
+        times = [r['time'] for r in runs if r['ok']]
+        stats[backend] = {
+            'runs': len(runs),
+            'failure_rate': 1. - len(times)/float(len(runs)) if runs else 0.,
+            'median_time': float(np.median(times)) if times else np.inf,
+            'mean_time': float(np.mean(times)) if times else np.inf}
+    return stats
+
+def backend_order(config, history=None, max_failure_rate=MAX_FAILURE_RATE):
+    """
+    Returns the available backends for a configuration, best first: reliable
+    ones by median time, then the others by failure rate, then those without
+    history in BACKENDS order
+    """
+    stats = backend_stats(config, history)
+    available = available_backends()
+
+    def rank(backend):
+        if backend not in stats:
+            return (2, 0., BACKENDS.index(backend))
+        s = stats[backend]
+        if s['failure_rate'] <= max_failure_rate:
+            return (0, s['median_time'], 0)
+        return (1, s['failure_rate'], s['median_time'])
+    return sorted(available, key=rank)
+
+def select_backend(config, history=None, max_failure_rate=MAX_FAILURE_RATE):
+    "returns the fastest reliable backend for a configuration"
+    return backend_order(config, history, max_failure_rate)[0]
+
+def fallback_solver(backends, history=None, config=None):
+    """
+    Returns a gpkit solver function trying the backends in order
+
+    A GP that fails (exception or non optimal status) on one backend is
+    solved again with the next, inside the same SP iteration. Each attempt
+    is appended to the function's attempts list as (backend, time, ok), and
+    to history under config if both are given.
+    """
+    def fallback(c, A, p_idxs, k, *args, **kwargs):
+        out = None
+        gpid = gp_id(c, A, k) if history is not None and config is not None else None
+        for backend in backends:
+            out, soltime, ok = run_backend(backend, c, A, p_idxs, k, **kwargs)
+            fallback.attempts.append((backend, soltime, ok))
+            if gpid is not None:
+                record(history, config, backend, soltime, ok, gp=gpid)
+            if ok:
+                return out
+        if out is None:
+            raise RuntimeError("every backend failed: %s" % ", ".join(backends))
+        return out
+    fallback.attempts = []
+    return fallback
+
+def auto_solver(config, filename=HISTORYFILE):
+    """
+    Returns a fallback solver for a configuration in backend_order; the
+    attempts are added to the history file by save_attempts
+    """
+    history = load_history(filename)
+    solver = fallback_solver(backend_order(config, history), history, config)
+    solver.history = history
+    solver.filename = filename
+    return solver
+
+def save_attempts(solver):
+    "writes the attempts of an auto_solver to its history file"
+    save_history(solver.history, solver.filename)
+
+def summary(config, history=None):
+    "prints the backend table of a configuration"
+    stats = backend_stats(config, history)
+    print("%s (selected: %s)" % (config, select_backend(config, history)))
+    for backend in sorted(stats, key=lambda b: stats[b]['median_time']):
+        s = stats[backend]
+        print("    %-18s %5i runs, %5.1f%% failed, median %.3f s" % (
+            backend, s['runs'], 100*s['failure_rate'], s['median_time']))
+
+def test():
+    "checks that failures every backend shares are not held against one"
+    history = {}
+    for gp, ok in [('a', True), ('b', True), ('c', False)]:
+        record(history, 'toy', 'cvxopt', 1., ok, gp=gp)
+        record(history, 'toy', 'mosek', 2., ok, gp=gp)
+    record(history, 'toy', 'cvxopt', 1., False, gp='d')
+    record(history, 'toy', 'mosek', 2., True, gp='d')
+    assert shared_failures(history['toy']) == set(['c'])
+    stats = backend_stats('toy', history)
+    assert stats['mosek']['runs'] == 3 and stats['mosek']['failure_rate'] == 0.
+    assert abs(stats['cvxopt']['failure_rate'] - 1/3.) < 1e-12
+
+    from gpkit import Variable, Model
+    x, y = Variable('x'), Variable('y')
+    solver = fallback_solver(['cvxopt'], history, 'toy')
+    sol = Model(x + y, [x*y >= 1]).solve(verbosity=0, solver=solver)
+    assert abs(sol['cost'] - 2) < 1e-4
+    assert solver.attempts[0][0] == 'cvxopt' and solver.attempts[0][2]
+    gp = sol.program
+    assert history['toy']['cvxopt'][-1]['gp'] == gp_id(list(gp.cs), gp.A, gp.k)
+
+if __name__ == "__main__":
+    import sys
+    from SPaircraft import CONFIGS
+    for config in sys.argv[1:] or list(CONFIGS):
+        benchmark_backends(config)
+        summary(config)
@@ -217,6 +217,40 @@ class ClimbSegment(Model):
 
         return self.state, self.climbP
 
+# altitude band [m] of the fitted atmosphere at cruise, climb segments use
+# it scaled by the fraction of the climb they end at
+CRUISE_BAND = (9500., 13500.)
+
+def standard_temperature(h):
+    "temperature [K] of the Atmosphere model at altitude h [m]"
+    return 288.15 - .0065*np.asarray(h, dtype=float)
+
+def fit_temperature(hmin, hmax, n=100):
+    """
+    Minimax monomial fit T = c*h**b of the Atmosphere temperature over an
+    altitude band [m]
+
+    Pressure and density follow from T through monomial relations, so their
+    errors are bounded by the T error raised to 5.257 and 4.257.
+
+    RETURNS
+    -------
+    dictionary of c [K/m**b], b and the maximum relative errors of T, p and rho
+    """
+    logh = np.log(np.linspace(hmin, hmax, n))
+    logT = np.log(standard_temperature(np.exp(logh)))
+    b, logc = np.polyfit(logh, logT, 1)
+    err = logc + b*logh - logT
+    logc -= (err.max() + err.min())/2
+    err = np.abs(logc + b*logh - logT).max()
+    return {'c': np.exp(logc), 'b': b, 'T': np.expm1(err),
+            'p': np.expm1(5.257*err), 'rho': np.expm1(4.257*err)}
+
+def segment_bands(Nclimb, Ncruise, band=CRUISE_BAND):
+    "altitude band [m] of each flight segment for FittedAtmosphere"
+    return ([(band[0]*(i + 1.)/Nclimb, band[1]*(i + 1.)/Nclimb) for i in range(Nclimb)]
+            + [band]*Ncruise)
+
 class FlightState(Model):
     """
     creates atm model for each flight segment, has variables
@@ -224,10 +258,14 @@ class FlightState(Model):
 
     SKIP VERIFICATION
     """
-    def setup(self,**kwargs):
-        #make an atmosphere model
+    def setup(self, atmosphere='standard', bands=CRUISE_BAND, **kwargs):
+        #make an atmosphere model, 'fitted' replaces the temperature
+        #signomial with a monomial fit over each segment's altitude band
         self.alt = Altitude()
-        self.atm = Atmosphere(self.alt)
+        if atmosphere == 'fitted':
+            self.atm = FittedAtmosphere(self.alt, bands)
+        else:
+            self.atm = Atmosphere(self.alt)
 
         #declare variables
         V = Variable('V', 'kts', 'Aircraft Flight Speed')
@@ -337,6 +375,66 @@ class Atmosphere(Model):
 
         return constraints
 
+class FittedAtmosphere(Model):
+    """
+    Atmosphere with the temperature lapse signomial replaced by a monomial
+    fit over an altitude band, so the model is GP compatible
+
+    bands is one (hmin, hmax) band [m] or a list with one per element of the
+    first axis of h (one per flight segment, see segment_bands). Each h is
+    bounded to its band, so the maximum relative fit errors of T, p and rho,
+    kept in self.errors, hold at the solution.
+    """
+    def setup(self, alt, bands=CRUISE_BAND, **kwargs):
+        p_sl = Variable("p_{sl}", 101325, "Pa", "Pressure at sea level")
+        T_sl = Variable("T_{sl}", 288.15, "K", "Temperature at sea level")
+        M_atm = Variable("M_{atm}", .0289644, "kg/mol",
+                         "Molar mass of dry air")
+        p_atm = Variable("P_{atm}", "Pa", "air pressure")
+        R_atm = Variable("R_{atm}", 8.31447, "J/mol/K", "air specific heating value")
+        rho = self.rho = Variable('\\rho', 'kg/m^3', 'Density of air')
+        T_atm = self.T_atm = Variable("T_{atm}", "K", "air temperature")
+
+        h = self.h = alt['h']
+
+        mu  = Variable('\\mu', 'kg/(m*s)', 'Dynamic viscosity')
+
+        T_s = Variable('T_s', 110.4, "K", "Sutherland Temperature")
+        C_1 = Variable('C_1', 1.458E-6, "kg/(m*s*K^0.5)",
+                       'Sutherland coefficient')
+
+        if np.ndim(bands) == 1:
+            bands = [bands]*(np.shape(h)[0] if np.shape(h) else 1)
+        self.fits = [fit_temperature(*band) for band in bands]
+        self.errors = dict((q, max(fit[q] for fit in self.fits)) for q in ['T', 'p', 'rho'])
+
+        #temperature fits and the altitude bands they hold in, one per segment
+        if np.shape(h):
+            temperature = [T_atm[idx] == self.fits[idx[0]]['c']*units('K')
+                           * (h[idx]/units('m'))**self.fits[idx[0]]['b']
+                           for idx in np.ndindex(*np.shape(h))]
+            band = [[h[idx] >= bands[idx[0]][0]*units('m'), h[idx] <= bands[idx[0]][1]*units('m')]
+                    for idx in np.ndindex(*np.shape(h))]
+        else:
+            temperature = [T_atm == self.fits[0]['c']*units('K')*(h/units('m'))**self.fits[0]['b']]
+            band = [h >= bands[0][0]*units('m'), h <= bands[0][1]*units('m')]
+
+        constraints = [
+            # Pressure-altitude relation
+            (p_atm/p_sl)**(1/5.257) == T_atm/T_sl,
+
+            # Ideal gas law
+            rho == p_atm/(R_atm/M_atm*T_atm),
+
+            temperature,
+            band,
+
+            #constraint on mu
+            mu == C_1 * T_atm**1.5 /(6.64*units('K^.28')*T_s**0.72),
+            ]
+
+        return constraints
+
 class Engine(Model):
     """
     place holder engine model
@@ -587,6 +685,16 @@ class Mission(Model):
         # Model.setup(self, W_ftotal + s*units('N'), constraints + ac + climb + cruise, subs)
         return constraints + ac + climb + cruise
 
+def test():
+    "checks the fitted atmosphere holds its error bounds at the band edges"
+    with Vectorize(2):
+        state = FlightState('fitted', [(3000., 4500.), CRUISE_BAND])
+    for objective, edge in [(state['h'].prod(), 0), (1/state['h'].prod(), 1)]:
+        sol = Model(objective, [state], {state['V']: 230*units('m/s')}).solve(verbosity=0)
+        h = sol(state['h']).to('m').magnitude
+        T = sol(state['T_{atm}']).to('K').magnitude
+        assert np.allclose(h, [3000., CRUISE_BAND[0]] if edge == 0 else [4500., CRUISE_BAND[1]])
+        assert (np.abs(T/standard_temperature(h) - 1) <= 1.0001*state.atm.errors['T']).all()
 
 if __name__ == '__main__':
     #build required submodels
@@ -0,0 +1,233 @@
+"""
+Parser and cached reference table for the TASOPT .out files in TASOPT/
+"""
+
+import os
+import re
+import json
+
+TASOPTDIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TASOPT")
+CACHEFILE = os.path.join(TASOPTDIR, ".tasopt_reference.json")
+
+# TASOPT run each aircraft configuration is validated against
+REFERENCE_FILES = {
+    'optimal737': '737_small_tail.out',
+    'M072_737': '737_ST_M072.out',
+    'optimal777': '777.out',
+    'optimalD8': 'd82.out',
+    'D80': 'd80.out',
+    'D12': 'd121.out',
+}
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eEdD][-+]?\d+)?"
+# "Wfuel   +  40530.2  lb", "CLhCGfwd=  -0.700", "b       = 118.500  ft"
+_PARAMETER = re.compile(r"^\s*([^\s=+]+?)\s*[=+]\s*(%s)\s*(\S*)\s*$" % _NUMBER)
+# "C1: CDhtail= 0.00234", "RO: TSFC   =  0.43080     1/hr"
+_POINT = re.compile(r"^\s*([A-Z][A-Z0-9]):\s*(\S.*?)\s*=\s*(%s)\s*(\S*)\s*$" % _NUMBER)
+_PROFILEROW = re.compile(r"^\s*([A-Z][A-Z0-9]):\s+(%s(?:\s+%s)+)\s*$" % (_NUMBER, _NUMBER))
+
+def _float(string):
+    "parses a Fortran style number"
+    return float(string.replace('D', 'e').replace('d', 'e'))
+
+def parse_out(filename):
+    """
+    Parses a TASOPT .out file
+
+    ARGUMENTS
+    ---------
+    filename: path of the .out file
+
+    RETURNS
+    -------
+    dictionary with
+        config: TASOPT configuration name
+        airframe: {name: [value, unit]} weights and geometry
+        missions: list (one per fleet mission) of dictionaries with
+            performance: {name: [value, unit]} cruise and takeoff summary
+            profile: {point: {column: value}} mission profile summary table
+            points: {point: {name: [value, unit]}} per point aero and engine
+                    data, e.g. points['C1']['CDhtail']
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    out = {'config': None, 'airframe': {}, 'missions': []}
+    section = None
+    mission = None
+    columns = None
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("Config:"):
+            out['config'] = stripped[len("Config:"):].strip()
+            continue
+        if stripped.startswith("Airframe parameters"):
+            section = 'airframe'
+            continue
+        if stripped.startswith("Fleet mission"):
+            mission = {'performance': {}, 'profile': {}, 'points': {}}
+            out['missions'].append(mission)
+            section = 'performance'
+            continue
+        if stripped.startswith("Mission profile summary"):
+            section = 'profile'
+            columns = None
+            continue
+        if stripped.startswith("Aero, Engine parameters"):
+            section = 'points'
+            continue
+        if stripped.startswith("====="):
+            section = None
+            continue
+
+        if section == 'profile':
+            if columns is None:
+                if stripped.startswith("R "):
+                    columns = stripped.split()
+                continue
+            match = _PROFILEROW.match(line)
+            if match:
+                values = [_float(v) for v in match.group(2).split()]
+                mission['profile'][match.group(1)] = dict(zip(columns, values))
+            elif stripped.startswith("---"):
+                section = 'points'
+            continue
+
+        if section == 'points':
+            match = _POINT.match(line)
+            if match:
+                point, name, value, unit = match.groups()
+                mission['points'].setdefault(point, {})[name] = [_float(value), unit]
+            continue
+
+        if section in ('airframe', 'performance'):
+            match = _PARAMETER.match(line)
+            if match:
+                name, value, unit = match.groups()
+                target = out['airframe'] if section == 'airframe' else mission['performance']
+                target.setdefault(name, [_float(value), unit])
+    return out
+
+def _mtimes(directory):
+    return dict((f, os.path.getmtime(os.path.join(directory, f)))
+                for f in sorted(os.listdir(directory)) if f.endswith(".out"))
+
+def reference_table(directory=TASOPTDIR, cachefile=CACHEFILE, cache=True):
+    """
+    Returns every parsed .out file in a directory, keyed by file name
+
+    The parsed table is cached as JSON and reparsed when any .out file is
+    added, removed or modified.
+    """
+    mtimes = _mtimes(directory)
+    if cache and os.path.exists(cachefile):
+        with open(cachefile) as f:
+            cached = json.load(f)
+        if cached.get('mtimes') == mtimes:
+            return cached['files']
+    files = dict((f, parse_out(os.path.join(directory, f))) for f in mtimes)
+    if cache:
+        with open(cachefile, 'w') as f:
+            json.dump({'mtimes': mtimes, 'files': files}, f)
+    return files
+
+def reference(aircraft, *key, **kwargs):
+    """
+    Looks up one reference value for an aircraft configuration
+
+    ARGUMENTS
+    ---------
+    aircraft: key of REFERENCE_FILES
+    key: ('airframe', name), ('performance', name), ('profile', point, column)
+         or (point, name), e.g. ('airframe', 'Wfuel') or ('C1', 'CDhtail')
+    mission: (keyword) fleet mission index, default 0
+
+    RETURNS
+    -------
+    value, unit ('' if the file gives none)
+    """
+    mission = kwargs.get('mission', 0)
+    table = kwargs.get('table') or reference_table()
+    data = table[REFERENCE_FILES[aircraft]]
+    if key[0] == 'airframe':
+        return tuple(data['airframe'][key[1]])
+    if key[0] == 'performance':
+        return tuple(data['missions'][mission]['performance'][key[1]])
+    if key[0] == 'profile':
+        return data['missions'][mission]['profile'][key[1]][key[2]], ''
+    return tuple(data['missions'][mission]['points'][key[0]][key[1]])
+
+def flat_table(table=None):
+    """
+    Returns the reference table as flat records
+    (file, mission, section, point, name, value, unit), e.g. for a DataFrame
+    """
+    if table is None:
+        table = reference_table()
+    records = []
+    for filename in sorted(table):
+        data = table[filename]
+        for name, (value, unit) in sorted(data['airframe'].items()):
+            records.append((filename, None, 'airframe', None, name, value, unit))
+        for i, mission in enumerate(data['missions']):
+            for name, (value, unit) in sorted(mission['performance'].items()):
+                records.append((filename, i, 'performance', None, name, value, unit))
+            for point, row in sorted(mission['profile'].items()):
+                for name, value in sorted(row.items()):
+                    records.append((filename, i, 'profile', point, name, value, ''))
+            for point, values in sorted(mission['points'].items()):
+                for name, (value, unit) in sorted(values.items()):
+                    records.append((filename, i, 'points', point, name, value, unit))
+    return records
+
+def test():
+    "parses a small .out file, directly and through the cache"
+    import shutil
+    import tempfile
+    lines = [" =============================================================",
+             " Config:  737-800   ", "",
+             " Airframe parameters...", "",
+             " Wfuel   +  45057.0  lb",
+             " (max)      41122.2  lb",
+             " WMTO    = 166502.0  lb",
+             " =============================================================",
+             " Fleet mission   1", "",
+             " Cruise performance...", "",
+             " Range =   3000. nmi",
+             " L/D   =  17.314", "",
+             " Mission profile summary...", "",
+             "           R        h        t       Mach",
+             "         [nmi]     [ft]     [hr]",
+             " TO:      0.00      0.0   0.0000  0.26403",
+             " C1:    115.05  35000.0   0.3275  0.80000D+00", "",
+             " -----------------------------------------------------------",
+             " Aero, Engine parameters...", "",
+             " C1: CDhtail= 0.00180",
+             " C1: TSFC   =  0.64030     1/hr",
+             " =============================================================",
+             " Fleet mission   2", "",
+             " Range =   2000. nmi"]
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "737.out")
+        with open(filename, 'w') as f:
+            f.write("\n".join(lines) + "\n")
+        data = parse_out(filename)
+        assert data['config'] == '737-800'
+        assert data['airframe'] == {'Wfuel': [45057., 'lb'], 'WMTO': [166502., 'lb']}
+        first, second = data['missions']
+        assert first['performance'] == {'Range': [3000., 'nmi'], 'L/D': [17.314, '']}
+        assert first['profile']['C1'] == {'R': 115.05, 'h': 35000., 't': 0.3275, 'Mach': 0.8}
+        assert sorted(first['profile']) == ['C1', 'TO']
+        assert first['points'] == {'C1': {'CDhtail': [0.0018, ''], 'TSFC': [0.6403, '1/hr']}}
+        assert second['performance']['Range'] == [2000., 'nmi']
+
+        cachefile = os.path.join(directory, os.path.basename(CACHEFILE))
+        table = reference_table(directory, cachefile)
+        assert os.path.exists(cachefile)
+        assert reference_table(directory, cachefile) == json.loads(json.dumps(table))
+        assert reference('optimal737', 'C1', 'TSFC',
+                         table={REFERENCE_FILES['optimal737']: data}) == (0.6403, '1/hr')
+        assert flat_table(table)[0] == ("737.out", None, 'airframe', None, 'WMTO', 166502., 'lb')
+    finally:
+        shutil.rmtree(directory)
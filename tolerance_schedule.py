@@ -0,0 +1,208 @@
+"""
+Adaptive convergence tolerance schedule for the relaxed constants SP solve
+"""
+
+from time import time
+from contextlib import contextmanager
+import numpy as np
+from gpkit.small_scripts import mag
+
+from convergence_trace import RELAXTOL
+
+# cvxopt GP tolerances on the duality gap (abstol, reltol) and constraint
+# violation (feastol); TIGHT_GP are cvxopt's defaults. gpkit checks every GP
+# solution to 1e-3 relative, so LOOSE_GP solutions still pass its check.
+LOOSE_GP = {'abstol': 1e-5, 'reltol': 1e-4, 'feastol': 1e-5}
+MEDIUM_GP = {'abstol': 1e-6, 'reltol': 1e-5, 'feastol': 1e-6}
+TIGHT_GP = {'abstol': 1e-7, 'reltol': 1e-6, 'feastol': 1e-7}
+
+# Each stage is one localsolve, warm started from the end of the previous
+# stage. Early stages run loose while the relaxation variables are still far
+# from 1; only the last stage runs at the tolerance the solution is reported at.
+#   reltol: SP stopping tolerance on relative cost change between GPs
+#   iteration_limit: maximum number of GP solves in the stage
+#   solver_kwargs: (optional) {backend: keyword arguments} passed through to
+#                  the GP solver when the solve uses that backend. Only cvxopt
+#                  (and presolve's cvxopt solver) takes tolerances through
+#                  gpkit; mosek runs every stage at its own defaults. Every
+#                  stage sets cvxopt's tolerances, because gpkit keeps solver
+#                  arguments from one solve to the next.
+DEFAULT_SCHEDULE = [
+    {'reltol': 0.1, 'iteration_limit': 50,
+     'solver_kwargs': {'cvxopt': {'options': LOOSE_GP}}},
+    {'reltol': 0.03, 'iteration_limit': 50,
+     'solver_kwargs': {'cvxopt': {'options': MEDIUM_GP}}},
+    {'reltol': 0.01, 'iteration_limit': 200,
+     'solver_kwargs': {'cvxopt': {'options': TIGHT_GP}}},
+]
+
+def solver_backend(solver=None):
+    """
+    Returns the backend name a localsolve solver argument solves with: the
+    default solver for None, the backend attribute of a solver function
+    (see presolve.presolved_solver), else the function's name
+    """
+    if solver is None:
+        from gpkit import settings
+        return settings.get('default_solver')
+    if callable(solver):
+        return getattr(solver, 'backend', solver.__name__)
+    return solver
+
+def relaxation_product(sol):
+    """
+    Returns the product of all constant relaxation variables in a solution
+
+    ARGUMENTS
+    ---------
+    sol: solution of a model wrapped by relaxed_constants
+
+    RETURNS
+    -------
+    product of the relaxation values (1 if nothing is relaxed)
+    """
+    relax = [mag(sol['freevariables'][k]) for k in sol['freevariables']
+             if "Relax" in (k.models or ())]
+    if not relax:
+        return 1.
+    return float(np.prod([np.prod(v) for v in relax]))
+
+def scheduled_localsolve(model, schedule=None, verbosity=4, mutategp=False,
+                         x0=None, relaxtol=RELAXTOL, trace=None, **kwargs):
+    """
+    Solves an SP with a sequence of increasingly tight tolerances
+
+    The schedule stops early once the relaxation product is back to 1 and the
+    cost moved by less than the final stage's reltol across a whole stage, so
+    the tight stages are only run when they can still change the answer.
+
+    ARGUMENTS
+    ---------
+    model: relaxed model to solve (output of relaxed_constants)
+    schedule: list of stage dictionaries, see DEFAULT_SCHEDULE
+    verbosity, mutategp, x0: as for localsolve
+    relaxtol: tolerance on the relaxation product for the stopping test
+    trace: (optional) ConvergenceTrace that records every GP of every stage
+    kwargs: passed to every localsolve call
+
+    RETURNS
+    -------
+    sol: solution of the last stage run; sol.stages holds the per-stage
+         reltol, GP count, wall time, cost and relaxation product
+    """
+    if schedule is None:
+        schedule = DEFAULT_SCHEDULE
+    finaltol = schedule[-1]['reltol']
+    backend = solver_backend(kwargs.get('solver'))
+    stages = []
+    prevcost = None
+    with _restored_solver_kwargs():
+        for i, stage in enumerate(schedule):
+            stagekwargs = dict(kwargs)
+            stagekwargs.update(stage.get('solver_kwargs', {}).get(backend, {}))
+            starttime = time()
+            sol = model.localsolve(verbosity=verbosity,
+                                   iteration_limit=stage.get('iteration_limit', 200),
+                                   reltol=stage['reltol'], mutategp=mutategp,
+                                   x0=x0, **stagekwargs)
+            cost = float(mag(sol['cost']))
+            relax = relaxation_product(sol)
+            stages.append({'reltol': stage['reltol'],
+                           'gps': len(sol.program.gps),
+                           'time': time() - starttime,
+                           'cost': cost,
+                           'relaxation': relax})
+            if trace is not None:
+                trace.record_program(sol.program, i)
+            x0 = sol['freevariables']
+            if (i < len(schedule) - 1 and prevcost is not None
+                    and relax <= 1. + relaxtol
+                    and abs(prevcost - cost)/(prevcost + cost) <= finaltol):
+                break
+            prevcost = cost
+    sol.stages = stages
+    return sol
+
+@contextmanager
+def _restored_solver_kwargs():
+    """
+    gpkit 0.7 merges solver arguments into its module level defaults, so
+    stage tolerances would stick to every later solve; restores them after
+    """
+    try:
+        from gpkit.constraints.gp import DEFAULT_SOLVER_KWARGS
+    except ImportError:
+        DEFAULT_SOLVER_KWARGS = {}
+    saved = dict((k, dict(v)) for k, v in DEFAULT_SOLVER_KWARGS.items())
+    try:
+        yield
+    finally:
+        DEFAULT_SOLVER_KWARGS.clear()
+        DEFAULT_SOLVER_KWARGS.update(saved)
+
+def benchmark_schedules(configs=None, schedule=None):
+    """
+    Compares the fixed reltol=0.01 solve against a tolerance schedule
+
+    ARGUMENTS
+    ---------
+    configs: list of configuration names (default: all production configs)
+    schedule: tolerance schedule to compare (default: DEFAULT_SCHEDULE)
+
+    RETURNS
+    -------
+    results: dictionary keyed by config with the solve time, number of
+             GP solves and W_{f_{total}} [lbf] of both solves
+    """
+    from SPaircraft import CONFIGS, build_mission, optimize_aircraft
+
+    if configs is None:
+        configs = list(CONFIGS)
+    if schedule is None:
+        schedule = DEFAULT_SCHEDULE
+
+    results = {}
+    for config in configs:
+        results[config] = {}
+        for name, sched in [('fixed', None), ('adaptive', schedule)]:
+            m, substitutions, fixedBPR, pRatOpt = build_mission(config)
+            starttime = time()
+            sol = optimize_aircraft(m, substitutions, fixedBPR, pRatOpt,
+                                    schedule=sched)
+            soltime = time() - starttime
+            if sched is None:
+                ngps = len(sol.program.gps)
+            else:
+                ngps = sum(stage['gps'] for stage in sol.stages)
+            results[config][name] = {
+                'time': soltime,
+                'gps': ngps,
+                'W_{f_{total}}': float(np.sum(mag(sol('W_{f_{total}}').to('lbf')))),
+            }
+
+    print("%-12s %10s %10s %8s %8s %12s" % ("config", "t_fixed", "t_adapt",
+                                             "GPs", "GPs", "dW_f [%]"))
+    for config in configs:
+        fixed, adapt = results[config]['fixed'], results[config]['adaptive']
+        print("%-12s %10.1f %10.1f %8i %8i %12.4f" % (
+            config, fixed['time'], adapt['time'], fixed['gps'], adapt['gps'],
+            100.*(adapt['W_{f_{total}}'] - fixed['W_{f_{total}}'])/fixed['W_{f_{total}}']))
+    return results
+
+def test():
+    "checks that stage tolerances reach cvxopt and do not outlive the schedule"
+    from gpkit import Variable, Model, SignomialsEnabled
+    from gpkit.constraints.gp import DEFAULT_SOLVER_KWARGS
+    x = Variable('x')
+    y = Variable('y')
+    with SignomialsEnabled():
+        constraints = [x >= 1 - y, y <= 0.1]
+    before = dict((k, dict(v)) for k, v in DEFAULT_SOLVER_KWARGS.items())
+    sol = scheduled_localsolve(Model(x, constraints), verbosity=0, solver='cvxopt')
+    assert abs(mag(sol['cost']) - 0.9) < 1e-3
+    assert sum(stage['gps'] for stage in sol.stages) >= 3
+    assert DEFAULT_SOLVER_KWARGS == before
+    assert solver_backend('mosek') == 'mosek'
+
+if __name__ == '__main__':
+    benchmark_schedules()
@@ -0,0 +1,256 @@
+"""
+Batch validation of archived solutions against TASOPT
+
+Every quantity compared by percent_diff is gathered from all records of a
+solution archive into one array, so the percent differences of a whole
+result set (any mix of configurations) come out of a few array operations.
+"""
+
+import csv
+import json
+import numpy as np
+
+from percent_diff import (SECTIONS, SEGMENT_VARIABLES, AREA_REFERENCED, SKIPPED,
+                          FACTORS, FIRST_MISSION, LITERAL_REFERENCES, compute_diff)
+from tasopt_reference import reference, reference_table
+from solution_archive import load_archive, column
+
+# allowed absolute percent difference from TASOPT, by SP variable
+DEFAULT_TOLERANCE = 10.
+TOLERANCES = {
+    'C_{d_{nacelle}}': 25.,
+    'C_{D_{ht}}': 25.,
+    'C_{D_{vis}}': 25.,
+    'C_{D_{fuse}}': 15.,
+    'C_{D_{i_w}}': 15.,
+    'C_{D_{p_w}}': 15.,
+    'W_{hbend}': 25.,
+    'W_{vbend}': 25.,
+}
+
+# number of climb segments of records without it in their metadata
+# (the first cruise segment follows the climb segments)
+DEFAULT_NCLIMB = 3
+
+def quantities():
+    "returns the (label, SP variable, units, TASOPT key) of every compared quantity"
+    return [entry for _, entries in SECTIONS for entry in entries]
+
+def reference_values(configs, table=None):
+    """
+    Returns the TASOPT value of every quantity for each configuration
+
+    RETURNS
+    -------
+    (nconfigs, nquantities) array, NaN where the quantity is not compared
+    """
+    if table is None:
+        table = reference_table()
+    entries = quantities()
+    out = np.full((len(configs), len(entries)), np.nan)
+    for i, config in enumerate(configs):
+        if config not in SKIPPED:
+            continue
+        for j, (_, var, _, key) in enumerate(entries):
+            if var in SKIPPED[config]:
+                continue
+            if config in LITERAL_REFERENCES:
+                out[i, j] = LITERAL_REFERENCES[config].get(var, np.nan)
+            else:
+                out[i, j] = reference(config, *key, table=table)[0]
+    return out
+
+def validate(records, tolerances=None, table=None):
+    """
+    Computes the percent differences of archived solutions from TASOPT
+
+    ARGUMENTS
+    ---------
+    records: records of a solution archive (see solution_archive), or the
+             archive file name(s)
+    tolerances: dictionary of SP variable to allowed absolute percent
+                difference, overriding TOLERANCES
+    table: TASOPT reference table (default: tasopt_reference.reference_table())
+
+    RETURNS
+    -------
+    dictionary with
+        labels, variables: of the compared quantities
+        configs: configuration of each record
+        sp, tasopt, diff: (nrecords, nquantities) arrays of the SP value,
+                          TASOPT value and percent difference, NaN where not
+                          compared
+        tolerance: (nquantities,) allowed absolute percent difference
+        passed: (nrecords, nquantities) boolean, True where not compared
+        validated: (nrecords,) boolean, False where the configuration has no
+                   TASOPT reference and nothing was compared
+        design_passed: (nrecords,) boolean, False where not validated
+    """
+    if not isinstance(records, list):
+        records = load_archive(records)
+    tol = dict(TOLERANCES)
+    tol.update(tolerances or {})
+    entries = quantities()
+    configs = [r['config'] for r in records]
+    unique = sorted(set(configs))
+    configidx = np.array([unique.index(c) for c in configs], dtype=int)
+    segment = [r['metadata'].get('Nclimb', DEFAULT_NCLIMB) for r in records]
+
+    sp = np.full((len(records), len(entries)), np.nan)
+    factor = np.ones((len(unique), len(entries)))
+    for j, (_, var, unit, _) in enumerate(entries):
+        for i, config in enumerate(unique):
+            factor[i, j] = FACTORS.get(config, {}).get(var, 1.)
+        if var in SEGMENT_VARIABLES:
+            index = [(s, 0) if var in FIRST_MISSION.get(c, []) else s
+                     for s, c in zip(segment, configs)]
+        else:
+            index = None
+        values = column(records, var, unit, index)
+        # multimission designs are compared on their first mission
+        sp[:, j] = values if values.ndim == 1 else values[:, 0]
+    sp = sp*factor[configidx]
+
+    tasopt = reference_values(unique, table)[configidx]
+    # TASOPT tail drag coefficients are referenced to the wing area
+    S = column(records, 'S', 'ft^2')
+    for j, (_, var, _, _) in enumerate(entries):
+        if var in AREA_REFERENCED:
+            tasopt[:, j] *= S/column(records, AREA_REFERENCED[var], 'ft^2')
+
+    sp[np.isnan(tasopt)] = np.nan
+    diff = compute_diff(sp, tasopt)
+    tolerance = np.array([tol.get(var, DEFAULT_TOLERANCE) for _, var, _, _ in entries])
+    with np.errstate(invalid='ignore'):
+        passed = ~(np.abs(diff) > tolerance)
+    # a quantity with a reference but no SP value fails
+    passed &= ~(np.isnan(sp) & np.isfinite(tasopt))
+    # a design with nothing to compare to is not validated, not passed
+    validated = np.isfinite(tasopt).any(axis=1)
+    return {'labels': [e[0] for e in entries], 'variables': [e[1] for e in entries],
+            'configs': configs, 'sp': sp, 'tasopt': tasopt, 'diff': diff,
+            'tolerance': tolerance, 'passed': passed, 'validated': validated,
+            'design_passed': passed.all(axis=1) & validated}
+
+def all_passed(result):
+    "returns whether some designs of validate were validated and all of those passed"
+    validated = result['validated']
+    return bool(validated.any() and result['design_passed'][validated].all())
+
+def _number(value):
+    return None if np.isnan(value) else float(value)
+
+def write_json(result, filename):
+    "writes the result of validate as JSON, one entry per record"
+    designs = []
+    for i, config in enumerate(result['configs']):
+        designs.append({
+            'design': i, 'config': config,
+            'validated': bool(result['validated'][i]),
+            'passed': bool(result['design_passed'][i]),
+            'quantities': dict(
+                (var, {'sp': _number(result['sp'][i, j]),
+                       'tasopt': _number(result['tasopt'][i, j]),
+                       'diff': _number(result['diff'][i, j]),
+                       'passed': bool(result['passed'][i, j])})
+                for j, var in enumerate(result['variables'])
+                if np.isfinite(result['tasopt'][i, j]))})
+    with open(filename, 'w') as f:
+        json.dump({'tolerance': dict(zip(result['variables'],
+                                         result['tolerance'].tolist())),
+                   'passed': all_passed(result),
+                   'unvalidated': int((~result['validated']).sum()),
+                   'designs': designs}, f, indent=1)
+
+def write_csv(result, filename):
+    "writes the result of validate as CSV, one row per compared quantity"
+    with open(filename, 'w') as f:
+        writer = csv.writer(f)
+        writer.writerow(['design', 'config', 'label', 'variable', 'sp', 'tasopt',
+                         'percent_diff', 'tolerance', 'passed'])
+        for i, j in zip(*np.nonzero(np.isfinite(result['tasopt']))):
+            writer.writerow([i, result['configs'][i], result['labels'][j],
+                             result['variables'][j], result['sp'][i, j],
+                             result['tasopt'][i, j], result['diff'][i, j],
+                             result['tolerance'][j], bool(result['passed'][i, j])])
+
+def summary(result):
+    "prints the failed quantities of validate, per configuration"
+    configs = np.array(result['configs'])
+    print("%i of %i validated designs within tolerance of TASOPT" % (
+        result['design_passed'].sum(), result['validated'].sum()))
+    for config in sorted(set(result['configs'])):
+        rows = configs == config
+        if not result['validated'][rows].any():
+            print("%s: %i designs not validated, no TASOPT reference" % (
+                config, rows.sum()))
+            continue
+        failed = ~result['passed'][rows]
+        print("%s: %i of %i designs passed" % (
+            config, result['design_passed'][rows].sum(), rows.sum()))
+        for j in np.nonzero(failed.any(axis=0))[0]:
+            diffs = result['diff'][rows, j]
+            print("    %s: %i failures, percent diff %.2f to %.2f (tolerance %.1f)" % (
+                result['labels'][j], failed[:, j].sum(), np.nanmin(diffs),
+                np.nanmax(diffs), result['tolerance'][j]))
+
+def test():
+    "validates synthetic records, one of them of a configuration without a reference"
+    import os
+    import shutil
+    import tempfile
+    reference = LITERAL_REFERENCES['b737800']
+    record = {'config': 'b737800', 'metadata': {}, 'variables': {}, 'units': {},
+              'names': {}}
+    for _, var, unit, _ in quantities():
+        if var not in reference:
+            continue
+        value = reference[var]
+        if var in AREA_REFERENCED:
+            value *= reference['S']/reference[AREA_REFERENCED[var]]
+        if var in SEGMENT_VARIABLES:
+            value = [value]*(DEFAULT_NCLIMB + 2)
+        record['variables'][var] = value
+        record['units'][var] = unit or ''
+    heavy = json.loads(json.dumps(record))
+    heavy['variables']['W_{total}'] *= 1.2
+    unreferenced = json.loads(json.dumps(record))
+    unreferenced['config'] = 'E175'
+    result = validate([record, heavy, unreferenced], table={})
+    assert result['validated'].tolist() == [True, True, False]
+    assert result['design_passed'].tolist() == [True, False, False]
+    j = result['variables'].index('W_{total}')
+    assert np.isclose(result['diff'][1, j], 20.)
+    assert result['passed'][1].sum() == len(result['variables']) - 1
+    assert not result['passed'][1, j]
+    assert not np.isfinite(result['diff'][2]).any()
+    assert not all_passed(result)
+    assert all_passed(validate([record, unreferenced], table={}))
+    assert not all_passed(validate([unreferenced], table={}))
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, "validation.json")
+        write_json(result, filename)
+        with open(filename) as f:
+            written = json.load(f)
+        assert not written['passed'] and written['unvalidated'] == 1
+        assert [d['validated'] for d in written['designs']] == [True, True, False]
+        assert written['designs'][2]['quantities'] == {}
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+    parser = argparse.ArgumentParser(description="validate a solution archive against TASOPT")
+    parser.add_argument('archives', nargs='+', help="solution archive file(s)")
+    parser.add_argument('--json', help="write the results to a JSON file")
+    parser.add_argument('--csv', help="write the results to a CSV file")
+    args = parser.parse_args()
+    result = validate(load_archive(args.archives))
+    if args.json:
+        write_json(result, args.json)
+    if args.csv:
+        write_csv(result, args.csv)
+    summary(result)
+    sys.exit(0 if all_passed(result) else 1)
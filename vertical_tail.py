@@ -5,6 +5,7 @@ from gpkit import Variable, Model, units, SignomialsEnabled, Vectorize
 from gpkit.constraints.sigeq import SignomialEquality
 from gpkit.constraints.tight import Tight as TCS
 from wingbox import WingBox
+from fits import fit_constraint
 
 class VerticalTail(Model):
     """
@@ -197,21 +198,11 @@ class VerticalTailPerformance(Model):
               ])
 
         if fitDrag:
-            constraints.extend([
-                #Martin's TASOPT tail fit
-                    CDvis**1.18909 >= 2.43701e-77 * (Rec)**-0.52841 * (self.vt['\\tau_{vt}'])**133.796 * (state['M'])**1022.7
-                                + 0.00304307 * (Rec)**-0.409988 * (self.vt['\\tau_{vt}'])**1.22062 * (state['M'])**1.55119
-                                + 0.000196709 * (Rec)**0.214479 * (self.vt['\\tau_{vt}'])**-0.0383195 * (state['M'])**-0.137561
-                                + 6.59349e-50 * (Rec)**-0.498092 * (self.vt['\\tau_{vt}'])**1.55922 * (state['M'])**-114.577
-
-            #Philippe thesis fit
-            # Vertical tail viscous drag in cruise
-            # Data fit from Xfoil
-##            CDvis**0.125 >= 0.19*(self.vt['\\tau_{vt}'])**0.0075 *(Rec)**0.0017
-##                        + 1.83e+04*(self.vt['\\tau_{vt}'])**3.54*(Rec)**-0.494
-##                        + 0.118*(self.vt['\\tau_{vt}'])**0.0082 *(Rec)**0.00165
-##                        + 0.198*(self.vt['\\tau_{vt}'])**0.00774*(Rec)**0.00168,
-            ])
+            # Martin's TASOPT tail fit by default (see fits.ACTIVE)
+            constraints.extend(fit_constraint('vt_cdvis', CDvis,
+                                              {'Re': Rec,
+                                               'tau': self.vt['\\tau_{vt}'],
+                                               'M': state['M']}))
         else:
             None
             #drag constraints found in aircraftP